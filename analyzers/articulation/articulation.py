@@ -1,14 +1,12 @@
-from copy import deepcopy
-
 import pandas as pd
 from functools import lru_cache
-from music21 import converter, stream
 
 from data_processing import derive_observed_grades
 from analyzers.articulation.articulation_confidence import get_articulation_confidence 
+from analyzers.shared.score_ir import load_score_ir
 
-from models import BaseAnalyzer, PartialNoteData, ArticulationGradeRules
-from utilities import iter_measure_events
+from models import BaseAnalyzer, ArticulationGradeRules, NoteTableBuilder
+from utilities import span
 
 
 # ----------------------------
@@ -20,8 +18,11 @@ class ArticulationAnalyzer(BaseAnalyzer):
     Expects BaseAnalyzer to store self.rules (dict[grade -> rules_for_grade])
     """
 
-    def analyze_confidence(self, score, grade: float):
-        return analyze_articulation_confidence(score, self.rules, grade)
+    def extract_features(self, score):
+        return extract_articulation_features(score)
+
+    def score_grade(self, features, grade: float):
+        return score_articulation_features(features, self.rules, grade)
 
     def analyze_target(self, score, target_grade: float):
         return analyze_articulation_target(score, self.rules, target_grade)
@@ -60,23 +61,17 @@ def run_articulation(
     target_grade: float,
     *,
     score=None,
-    score_factory=None,
     progress_cb=None,
     run_observed=True,
     analysis_options=None,
+    grade_executor=None,
+    curve_cache=None,
 ):
     rules = load_articulation_rules()
     analyzer = ArticulationAnalyzer(rules)
+    score = load_score_ir(score_path, score)
 
-    if score_factory is None:
-        if score is not None:
-            score_factory = lambda: deepcopy(score)
-        elif score_path is not None:
-            score_factory = lambda: converter.parse(score_path)
-        else:
-            raise ValueError("score_path or score_factory is required")
-
-    # 1) Observed grade + confidence curve (fresh parse per grade)
+    # 1) Observed grade + confidence curve (shared read-only score)
     grades = None
     if analysis_options is not None:
         run_observed = analysis_options.run_observed
@@ -84,9 +79,13 @@ def run_articulation(
 
     if run_observed:
         kwargs = {
-            "score_factory": score_factory,
-            "analyze_confidence": analyzer.analyze_confidence,
+            "score": score,
+            "extract_features": analyzer.extract_features,
+            "analyze_confidence": analyzer.score_grade,
             "progress_cb": progress_cb,
+            "executor": grade_executor,
+            "curve_cache": curve_cache,
+            "curve_key": ("articulation",),
         }
         if grades is not None:
             kwargs["grades"] = grades
@@ -94,10 +93,9 @@ def run_articulation(
     else:
         observed, confidences = None, {}
 
-    # 2) Target-grade UI data (single parse)
-    if score is None:
-        score = score_factory()
-    analysis_notes, overall_conf = analyzer.analyze_target(score, target_grade)
+    # 2) Target-grade UI data
+    with span("target_pass", parts=len(score.parts)):
+        analysis_notes, overall_conf = analyzer.analyze_target(score, target_grade)
 
     return {
         "observed_grade": observed,
@@ -111,27 +109,47 @@ def run_articulation(
 # Confidence-only pass
 # ----------------------------
 
-def analyze_articulation_confidence(score, rules: dict[float, ArticulationGradeRules], grade: float):
+def articulated_events(measure):
+    """Sounding notes of a measure that carry articulations."""
+    for n in measure.iter_events():
+        if n.is_rest or not n.articulations:
+            continue
+        yield n
+
+
+def extract_articulation_features(score) -> dict[tuple[str, ...], float]:
+    """
+    Grade-invariant pass: total duration per distinct articulation combination.
+    """
+    durations: dict[tuple[str, ...], float] = {}
+
+    for part in score.parts:
+        for m in part.measures:
+            for n in articulated_events(m):
+                durations[n.articulations] = durations.get(n.articulations, 0.0) + float(n.duration)
+
+    return durations
+
+
+def score_articulation_features(features: dict[tuple[str, ...], float], rules: dict[float, ArticulationGradeRules], grade: float):
     """
     Returns a single confidence scalar for this grade, or None if no articulated notes exist.
     """
     total_weighted = 0.0
     total_dur = 0.0
 
-    for part in score.parts:
-        for m in part.getElementsByClass(stream.Measure):
-            for n in iter_measure_events(m):
-                if n.isRest or not n.articulations:
-                    continue
-
-                conf, _, _ = get_articulation_confidence(n, rules, grade)
-                d = float(n.duration.quarterLength)
-                total_weighted += float(conf) * d
-                total_dur += d
+    for articulations, d in features.items():
+        conf, _, _ = get_articulation_confidence(articulations, rules, grade)
+        total_weighted += float(conf) * d
+        total_dur += d
 
     return (total_weighted / total_dur) if total_dur > 0 else None
 
 
+def analyze_articulation_confidence(score, rules: dict[float, ArticulationGradeRules], grade: float):
+    return score_articulation_features(extract_articulation_features(score), rules, grade)
+
+
 # ----------------------------
 # Target-grade detailed pass
 # ----------------------------
@@ -139,7 +157,7 @@ def analyze_articulation_confidence(score, rules: dict[float, ArticulationGradeR
 def analyze_articulation_target(score, rules: dict[float, ArticulationGradeRules], target_grade: float):
     """
     Returns:
-      analysis_notes: {part_name: {"articulation_data": [PartialNoteData...], "articulation_confidence": float|None}}
+      analysis_notes: {part_name: {"articulation_data": NoteTable, "articulation_confidence": float|None}}
       overall_conf: float|None
     """
     analysis_notes: dict = {}
@@ -147,48 +165,21 @@ def analyze_articulation_target(score, rules: dict[float, ArticulationGradeRules
     overall_total = 0.0
 
     for part in score.parts:
-        part_name = part.partName or "Unknown Part"
-        part_notes: list[PartialNoteData] = []
+        part_name = part.name or "Unknown Part"
+        part_notes = NoteTableBuilder(part_name, target_grade)
 
         part_weighted = 0.0
         part_total = 0.0
 
-        for m in part.getElementsByClass(stream.Measure):
-            for n in iter_measure_events(m):
-                if n.isRest or not n.articulations:
-                    continue
-
-                written_pitch = None
-                written_midi = None
-                if getattr(n, "isChord", False) is False and hasattr(n, "pitch"):
-                    written_pitch = n.pitch.nameWithOctave
-                    written_midi = n.pitch.midi
-
-                data = PartialNoteData(
-                    measure=m.number,
-                    offset=float(n.offset),
-                    grade=target_grade,
-                    instrument=part_name,
-                    duration=float(n.duration.quarterLength),
-                    written_pitch=written_pitch,
-                    written_midi_value=written_midi,
-                )
-
-                conf, comment, ctype = get_articulation_confidence(n, rules, target_grade)
-                data.articulation_confidence = float(conf)
-
-                if conf == 0 and ctype:
-                    data.comments[ctype] = comment
-
-                part_notes.append(data)
-
-                part_weighted += float(conf) * data.duration
-                part_total += data.duration
+        for m in part.measures:
+            for conf, duration in add_measure_articulation_notes(part_notes, m, rules, target_grade):
+                part_weighted += conf * duration
+                part_total += duration
 
         part_conf = (part_weighted / part_total) if part_total > 0 else None
 
         analysis_notes[part_name] = {
-            "articulation_data": part_notes,
+            "articulation_data": part_notes.build(),
             "articulation_confidence": part_conf,
         }
 
@@ -198,3 +189,33 @@ def analyze_articulation_target(score, rules: dict[float, ArticulationGradeRules
 
     overall_conf = (overall_weighted / overall_total) if overall_total > 0 else None
     return analysis_notes, overall_conf
+
+
+def build_measure_articulation_notes(m, part_name: str, rules: dict[float, ArticulationGradeRules], target_grade: float):
+    """Scored articulation notes of one measure, and their (confidence, duration) terms."""
+    notes = NoteTableBuilder(part_name, target_grade)
+    terms = add_measure_articulation_notes(notes, m, rules, target_grade)
+    return notes.build(), terms
+
+
+def add_measure_articulation_notes(notes: NoteTableBuilder, m, rules: dict[float, ArticulationGradeRules], target_grade: float):
+    """Appends the scored articulation rows of one measure to notes; returns their (confidence, duration) terms."""
+    terms = []
+    for n in articulated_events(m):
+        conf, comment, ctype = get_articulation_confidence(n.articulations, rules, target_grade)
+        duration = float(n.duration)
+
+        row = notes.append(
+            measure=m.number,
+            offset=float(n.offset),
+            duration=duration,
+            written_pitch=n.written_pitch,
+            written_midi_value=n.written_midi,
+            articulation_confidence=float(conf),
+        )
+
+        if conf == 0 and ctype:
+            notes.add_comment(row, ctype, comment)
+
+        terms.append((float(conf), duration))
+    return terms
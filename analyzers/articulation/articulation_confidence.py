@@ -1,7 +1,7 @@
 from utilities import get_closest_grade
 
 
-def get_articulation_confidence(note, rules, grade):
+def get_articulation_confidence(articulation_names, rules, grade):
     # Map music21 articulation names to our field names
     art_mapping = {
         'staccato': 'staccato',
@@ -11,7 +11,7 @@ def get_articulation_confidence(note, rules, grade):
         'slur': 'slur'
     }
     
-    articulations = [art_mapping.get(art.name, art.name) for art in note.articulations]
+    articulations = [art_mapping.get(name, name) for name in articulation_names]
     
     rule_grade = get_closest_grade(grade, rules.keys())
     if rule_grade is None:
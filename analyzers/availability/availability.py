@@ -1,9 +1,7 @@
-from copy import deepcopy
-
 from data_processing import build_instrument_data, derive_observed_grades
+from analyzers.shared.score_ir import load_score_ir
 from models import BaseAnalyzer
-from utilities import validate_part_for_availability
-from music21 import converter
+from utilities import span, validate_part_for_availability
 from statistics import mean
 
 
@@ -35,22 +33,16 @@ def run_availability(
     target_grade: float,
     *,
     score=None,
-    score_factory=None,
     progress_cb=None,
     run_observed=True,
     analysis_options=None,
+    grade_executor=None,
+    curve_cache=None,
 ):
     data = build_instrument_data()
     rules = {i: data[i].availability for i in data}
     analyzer = AvailabilityAnalyzer(rules)
-
-    if score_factory is None:
-        if score is not None:
-            score_factory = lambda: deepcopy(score)
-        elif score_path is not None:
-            score_factory = lambda: converter.parse(score_path)
-        else:
-            raise ValueError("score_path or score_factory is required")
+    score = load_score_ir(score_path, score)
 
     grades = None
     if analysis_options is not None:
@@ -59,9 +51,12 @@ def run_availability(
 
     if run_observed:
         kwargs = {
-            "score_factory": score_factory,
+            "score": score,
             "analyze_confidence": analyzer.analyze_confidence,
             "progress_cb": progress_cb,
+            "executor": grade_executor,
+            "curve_cache": curve_cache,
+            "curve_key": ("availability",),
         }
         if grades is not None:
             kwargs["grades"] = grades
@@ -69,9 +64,8 @@ def run_availability(
     else:
         observed, confidences = None, {}
 
-    if score is None:
-        score = score_factory()
-    overall_conf, analysis_notes = analyze_availablity_target(score, rules, target_grade)
+    with span("target_pass", parts=len(score.parts)):
+        overall_conf, analysis_notes = analyze_availablity_target(score, rules, target_grade)
     
     return {
         "observed_grade": observed,
@@ -85,10 +79,10 @@ def analyze_availability_confidence(score, rules: dict, grade):
     conf_data = []
     penalty_total = 0.0
     for part in score.parts:
-        if part.partName and "percussion" in part.partName.lower():
+        if part.name and "percussion" in part.name.lower():
             conf_data.append(1)
             continue
-        vaildated_part = validate_part_for_availability(part.partName)
+        vaildated_part = validate_part_for_availability(part.name)
         if vaildated_part not in rules:
             continue
         else:
@@ -105,7 +99,7 @@ def analyze_availablity_target(score, rules: dict, target_grade):
     analysis_notes = {}
     penalty_total = 0.0
     for part in score.parts:
-        original_part_name, vaildated_part = part.partName, validate_part_for_availability(part.partName)
+        original_part_name, vaildated_part = part.name, validate_part_for_availability(part.name)
         analysis_notes[original_part_name] = {}
         if original_part_name and "percussion" in original_part_name.lower():
             analysis_notes[original_part_name]["availability_confidence"] = 1
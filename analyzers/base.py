@@ -1,9 +1,5 @@
-class BaseAnalyzer:
-    def __init__(self, rules):
-        self.rules = rules
+from models.base_analyzer import BaseAnalyzer
 
-    def analyze_confidence(self, score, grade):
-        raise NotImplementedError
-
-    def analyze_target(self, score, target_grade):
-        raise NotImplementedError
+__all__ = [
+    "BaseAnalyzer",
+]
@@ -1,17 +1,18 @@
-from copy import deepcopy
-
 from models import BaseAnalyzer
-from utilities import get_rounded_grade
-from music21 import converter
+from utilities import get_rounded_grade, span
 from statistics import mean
 
 from data_processing import derive_observed_grades
+from analyzers.shared.score_ir import load_score_ir
 from .helpers import load_dynamics_rules, derive_dynamics_data
 
 class DynamicsAnalyzer(BaseAnalyzer):
-    
-    def analyze_confidence(self, score, grade: float):
-        return analyze_dynamics_confidence(score, self.rules, grade)
+
+    def extract_features(self, score):
+        return derive_dynamics_data(score)
+
+    def score_grade(self, features, grade: float):
+        return score_dynamics_features(features, self.rules, grade)
 
     def analyze_target(self, score, target_grade: float):
         return analyze_dynamics_target(score, self.rules, target_grade)
@@ -21,21 +22,15 @@ def run_dynamics(
     target_grade,
     *,
     score=None,
-    score_factory=None,
     progress_cb=None,
     run_observed=True,
     analysis_options=None,
+    grade_executor=None,
+    curve_cache=None,
 ):
     rules_table = load_dynamics_rules()
     analyzer = DynamicsAnalyzer(rules_table)
-
-    if score_factory is None:
-        if score is not None:
-            score_factory = lambda: deepcopy(score)
-        elif score_path is not None:
-            score_factory = lambda: converter.parse(score_path)
-        else:
-            raise ValueError("score_path or score_factory is required")
+    score = load_score_ir(score_path, score)
 
     grades = None
     if analysis_options is not None:
@@ -44,9 +39,13 @@ def run_dynamics(
 
     if run_observed:
         kwargs = {
-            "score_factory": score_factory,
-            "analyze_confidence": analyzer.analyze_confidence,
+            "score": score,
+            "extract_features": analyzer.extract_features,
+            "analyze_confidence": analyzer.score_grade,
             "progress_cb": progress_cb,
+            "executor": grade_executor,
+            "curve_cache": curve_cache,
+            "curve_key": ("dynamics",),
         }
         if grades is not None:
             kwargs["grades"] = grades
@@ -54,9 +53,8 @@ def run_dynamics(
     else:
         observed, confidences = None, {}
 
-    if score is None:
-        score = score_factory()
-    analysis_notes, overall_conf = analyzer.analyze_target(score, target_grade)
+    with span("target_pass", parts=len(score.parts)):
+        analysis_notes, overall_conf = analyzer.analyze_target(score, target_grade)
 
     return {
         "observed_grade": observed,
@@ -66,10 +64,12 @@ def run_dynamics(
     }
 
 def analyze_dynamics_confidence(score, rules_table, grade):
+    return score_dynamics_features(derive_dynamics_data(score), rules_table, grade)
+
+def score_dynamics_features(dynamics_data, rules_table, grade):
     rounded_grade = get_rounded_grade(grade)
     rules = rules_table.get(rounded_grade, {})
     part_confidences = []
-    dynamics_data = derive_dynamics_data(score)
     for part in dynamics_data:
         part_valid = 0.0
         part_total = 0.0
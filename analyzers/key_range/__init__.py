@@ -2,6 +2,7 @@ from .analyzer import (
     KeyRangeAnalyzer,
     analyze_confidence_key,
     analyze_confidence_range,
+    make_key_range_analyzer,
     run_key_range,
 )
 
@@ -9,6 +10,7 @@ __all__ = [
     "KeyRangeAnalyzer",
     "analyze_confidence_key",
     "analyze_confidence_range",
+    "make_key_range_analyzer",
     "run_key_range",
 ]
 
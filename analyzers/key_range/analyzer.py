@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 from copy import deepcopy
+from functools import partial
 
 from analyzers.base import BaseAnalyzer
-from analyzers.key_range.extract import extract_key_segments, extract_note_data
+from analyzers.key_range.extract import extract_key_segments, extract_note_data, extract_part_notes
+from analyzers.key_range.range_engine import build_range_table, pack_range_features, range_confidence_curve, stack_range_features
 from analyzers.key_range.rules import total_key_confidence, compute_range_confidence
-from utilities import parse_part_name, validate_part_for_range_analysis, get_rounded_grade, traffic_light
-from music21 import converter
+from analyzers.shared.score_ir import load_score_ir
+from utilities import parse_part_name, validate_part_for_range_analysis, get_rounded_grade, span, traffic_light
 
 
 class KeyRangeAnalyzer(BaseAnalyzer):
@@ -19,6 +21,8 @@ class KeyRangeAnalyzer(BaseAnalyzer):
         super().__init__(combined_ranges)  # BaseAnalyzer stores this on self.rules
         self._key_segments_base = key_segments_base
         self._key_confidence_fn = key_confidence_fn
+        self._range_table = build_range_table(combined_ranges)
+        self._features = None
 
     def _get_key_segments(self, score, grade: float):
         if self._key_segments_base is None:
@@ -32,64 +36,69 @@ class KeyRangeAnalyzer(BaseAnalyzer):
     # CONFIDENCE CURVE (for derive_observed_grades)
     # -------------------------------------------------------------
 
-    def analyze_confidence(self, score, grade: float):
+    def extract_features(self, score):
+        """
+        Grade-invariant pass: key segments plus the pitched notes of every part
+        that maps to a range bucket, packed for the batch range engine. Cached per
+        score so the range and key sweeps share a single extraction.
+        """
+        if self._features is not None and self._features[0] is score:
+            return self._features[1]
 
-        ranges = self.rules
-        range_grade = float(get_rounded_grade(grade))
+        key_segments = self._get_key_segments(score, None)
 
-        # --- Key segments ---
-        key_segments = self._get_key_segments(score, grade)
-
-        for k in key_segments:
-            k.confidence = self._key_confidence_fn(k.key, grade, k.quality)
+        range_parts = {}
+        for part in score.parts:
+            original_part_name = part.name or "Unknown Part"
+            canonical = self.range_instrument(original_part_name)
 
-        combined_conf_key = (
-            sum((k.confidence or 0.0) * (k.exposure or 0.0) for k in key_segments)
-            if key_segments else 0.0
-        )
+            # If we can’t map the part to an instrument bucket, skip range scoring for it
+            if canonical is None:
+                continue
 
-        # --- Note extraction (no confidence yet) ---
-        note_map = extract_note_data(score, grade, ranges, key_segments)
+            range_parts[original_part_name] = (
+                canonical,
+                extract_part_notes(part, original_part_name, None, key_segments),
+            )
 
-        total_exposure = 0.0
-        total_conf = 0.0
+        # Use the last key segment quality as a fallback
+        key_quality = key_segments[-1].quality if key_segments else "major"
+        range_features = self.pack_range_features(range_parts.values(), key_quality)
 
-        # Compute range confidence per note
-        for original_part_name, pdata in note_map.items():
-            pname = parse_part_name(original_part_name)
-            canonical = validate_part_for_range_analysis(pname)
+        features = (key_segments, range_features)
+        self._features = (score, features)
+        return features
 
-            # If we can’t map the part to an instrument bucket, skip range scoring for it
-            if not canonical or canonical not in ranges:
-                continue
+    def range_instrument(self, original_part_name: str) -> str | None:
+        """The range bucket a part's notes are packed under, or None if it has none."""
+        canonical = validate_part_for_range_analysis(parse_part_name(original_part_name))
+        if not canonical or canonical not in self.rules:
+            return None
+        return canonical
 
-            if range_grade not in ranges[canonical]:
-                continue
+    def pack_range_features(self, parts, key_quality: str):
+        """parts: iterable of (range_instrument, notes)."""
+        return pack_range_features(self._range_table, parts, key_quality)
 
-            core = ranges[canonical][range_grade]["core"]
-            ext = ranges[canonical][range_grade]["extended"]
-            total = ranges[canonical]["total_range"]
+    def stack_range_features(self, pieces, key_quality: str):
+        return stack_range_features(self._range_table, pieces, key_quality)
 
-            # Use the last key segment quality as a fallback
-            key_quality = key_segments[-1].quality if key_segments else "major"
+    def score_grade(self, features, grade: float):
+        return (self.score_grade_range(features, grade), self.score_grade_key(features, grade))
 
-            for note in pdata.get("Note Data", []):
-                conf = compute_range_confidence(
-                    note,
-                    core=core,
-                    ext=ext,
-                    total=total,
-                    target_grade=grade,
-                    key_quality=key_quality,
-                )
-                exposure = float(note.duration or 0.0)
-                note.range_exposure = exposure
-                total_exposure += exposure
-                total_conf += conf * exposure
+    def score_curve_range(self, features, grades) -> list[float]:
+        _, range_features = features
+        return range_confidence_curve(self._range_table, range_features, grades)
 
-        avg_range_conf = (total_conf / total_exposure) if total_exposure else 0.0
+    def score_grade_range(self, features, grade: float) -> float:
+        return self.score_curve_range(features, [grade])[0]
 
-        return (avg_range_conf, combined_conf_key)
+    def score_grade_key(self, features, grade: float) -> float:
+        key_segments, _ = features
+        return (
+            sum(self._key_confidence_fn(k.key, grade, k.quality) * (k.exposure or 0.0) for k in key_segments)
+            if key_segments else 0.0
+        )
 
     def analyze_confidence_range(self, score, grade: float) -> float:
         return self.analyze_confidence(score, grade)[0]
@@ -105,56 +114,26 @@ class KeyRangeAnalyzer(BaseAnalyzer):
         """
         Returns (analysis_results, summary) suitable for UI.
         """
-        ranges = self.rules
         range_grade = float(get_rounded_grade(target_grade))
 
         # --- Key segments ---
         key_segments = self._get_key_segments(score, target_grade)
-
-        for k in key_segments:
-            k.confidence = self._key_confidence_fn(k.key, target_grade, k.quality)
-            color = traffic_light(k.confidence)
-            if color == "yellow":
-                k.comments = f"{k.key} {k.quality} is somewhat common in grade {target_grade}"
-            elif color == "orange":
-                k.comments = f"{k.key} {k.quality} is uncommon in grade {target_grade}"
-            elif color == "red":
-                k.comments = f"{k.key} {k.quality} is typically not found in grade {target_grade}"
-
+        self.score_key_segments(key_segments, target_grade)
 
         # --- Note extraction ---
-        note_map = extract_note_data(score, target_grade, ranges, key_segments)
+        note_map = extract_note_data(score, target_grade, self.rules, key_segments)
+        key_quality = key_segments[-1].quality if key_segments else "major"
 
         global_total_conf = 0.0
         global_total_exposure = 0.0
 
         for original_part_name, pdata in note_map.items():
-            pname = parse_part_name(original_part_name)
-            valid_part = validate_part_for_range_analysis(pname)
-
-            if not valid_part or valid_part not in ranges:
-                continue
-            if range_grade not in ranges[valid_part]:
+            bounds = self.range_bounds(original_part_name, range_grade)
+            if bounds is None:
                 continue
 
-            core = ranges[valid_part][range_grade]["core"]
-            ext = ranges[valid_part][range_grade]["extended"]
-            total = ranges[valid_part]["total_range"]
-            key_quality = key_segments[-1].quality if key_segments else "major"
-
-            for note in pdata.get("Note Data", []):
-                conf = compute_range_confidence(
-                    note,
-                    core=core,
-                    ext=ext,
-                    total=total,
-                    target_grade=target_grade,
-                    key_quality=key_quality,
-                )
-                note.range_confidence = conf
-                exposure = float(note.duration or 0.0)
-                note.range_exposure = exposure
-                global_total_conf += conf * exposure
+            for weighted, exposure in self.score_range_notes(pdata["Note Data"], bounds, target_grade, key_quality):
+                global_total_conf += weighted
                 global_total_exposure += exposure
 
         overall_range_conf = (
@@ -174,6 +153,47 @@ class KeyRangeAnalyzer(BaseAnalyzer):
 
         return analysis_notes, summary
 
+    def score_key_segments(self, key_segments, target_grade: float) -> None:
+        for k in key_segments:
+            k.confidence = self._key_confidence_fn(k.key, target_grade, k.quality)
+            color = traffic_light(k.confidence)
+            if color == "yellow":
+                k.comments = f"{k.key} {k.quality} is somewhat common in grade {target_grade}"
+            elif color == "orange":
+                k.comments = f"{k.key} {k.quality} is uncommon in grade {target_grade}"
+            elif color == "red":
+                k.comments = f"{k.key} {k.quality} is typically not found in grade {target_grade}"
+
+    def range_bounds(self, original_part_name: str, range_grade: float):
+        """(core, extended, total) ranges a part's notes are scored against, or None if it is not scored."""
+        canonical = self.range_instrument(original_part_name)
+        if canonical is None or range_grade not in self.rules[canonical]:
+            return None
+        entry = self.rules[canonical]
+        return entry[range_grade]["core"], entry[range_grade]["extended"], entry["total_range"]
+
+    @staticmethod
+    def score_range_notes(notes, bounds, target_grade: float, key_quality: str) -> list[tuple[float, float]]:
+        """Sets range confidence and exposure on each note; returns (weighted confidence, exposure) per note."""
+        core, ext, total = bounds
+        terms = []
+        confidences = []
+        for note in notes:
+            conf = compute_range_confidence(
+                note,
+                core=core,
+                ext=ext,
+                total=total,
+                target_grade=target_grade,
+                key_quality=key_quality,
+            )
+            confidences.append(conf)
+            exposure = float(note.duration or 0.0)
+            terms.append((conf * exposure, exposure))
+        notes.set("range_confidence", confidences)
+        notes.set("range_exposure", [exposure for _, exposure in terms])
+        return terms
+
 
 def analyze_confidence_range(analyzer: KeyRangeAnalyzer, score, grade: float) -> float:
     return analyzer.analyze_confidence_range(score, grade)
@@ -183,6 +203,23 @@ def analyze_confidence_key(analyzer: KeyRangeAnalyzer, score, grade: float) -> f
     return analyzer.analyze_confidence_key(score, grade)
 
 
+def make_key_range_analyzer(string_only: bool = False, *, key_segments_base=None) -> KeyRangeAnalyzer:
+    """The analyzer run_key_range uses: string or combined ranges, and the matching key confidence."""
+    from analyzers.key_range.ranges import load_combined_ranges, load_string_ranges
+    from analyzers.key_range.rules import load_string_key_guidelines, string_key_confidence
+
+    combined_ranges = load_string_ranges("data/range") if string_only else load_combined_ranges("data/range")
+    key_confidence_fn = total_key_confidence
+    if string_only:
+        string_guidelines = load_string_key_guidelines()
+        key_confidence_fn = partial(string_key_confidence, guidelines=string_guidelines)
+    return KeyRangeAnalyzer(
+        combined_ranges,
+        key_segments_base=key_segments_base,
+        key_confidence_fn=key_confidence_fn,
+    )
+
+
 # -------------------------------------------------------------
 # ENTRY POINT
 # -------------------------------------------------------------
@@ -192,15 +229,14 @@ def run_key_range(
     target_grade: float,
     *,
     score=None,
-    score_factory=None,
     progress_cb=None,
     run_observed=True,
     string_only=False,
     analysis_options=None,
+    grade_executor=None,
+    curve_cache=None,
 ):
     from data_processing import derive_observed_grades
-    from analyzers.key_range.ranges import load_combined_ranges, load_string_ranges
-    from analyzers.key_range.rules import load_string_key_guidelines, string_key_confidence
 
     grades = None
     if analysis_options is not None:
@@ -208,32 +244,10 @@ def run_key_range(
         string_only = analysis_options.string_only
         grades = analysis_options.observed_grades
 
-    combined_ranges = load_string_ranges("data/range") if string_only else load_combined_ranges("data/range")
-    key_confidence_fn = total_key_confidence
-    if string_only:
-        string_guidelines = load_string_key_guidelines()
-        key_confidence_fn = lambda key, grade, quality: string_key_confidence(
-            key, grade, quality, string_guidelines
-        )
-
-    if score_factory is None:
-        if score is not None:
-            score_factory = lambda: deepcopy(score)
-        elif score_path is not None:
-            score_factory = lambda: converter.parse(score_path)
-        else:
-            raise ValueError("score_path or score_factory is required")
-
-    base_score = score if score is not None else score_factory()
-    sounding_score = base_score.toSoundingPitch()
-    key_segments_base = extract_key_segments(base_score, target_grade, sounding_score=sounding_score)
-    analyzer = KeyRangeAnalyzer(
-        combined_ranges,
-        key_segments_base=key_segments_base,
-        key_confidence_fn=key_confidence_fn,
-    )
+    score = load_score_ir(score_path, score)
+    analyzer = make_key_range_analyzer(string_only, key_segments_base=extract_key_segments(score, target_grade))
 
-    # Confidence curve across grades (fresh score each run)
+    # Confidence curve across grades (shared read-only score)
     def _progress_range(grade, idx, total):
         if progress_cb is not None:
             progress_cb(grade, idx, total, "range")
@@ -244,9 +258,13 @@ def run_key_range(
 
     if run_observed:
         kwargs = {
-            "score_factory": score_factory,
-            "analyze_confidence": analyzer.analyze_confidence_range,
+            "score": score,
+            "extract_features": analyzer.extract_features,
+            "analyze_curve": analyzer.score_curve_range,
             "progress_cb": _progress_range if progress_cb is not None else None,
+            "executor": grade_executor,
+            "curve_cache": curve_cache,
+            "curve_key": ("key_range", "range", string_only),
         }
         if grades is not None:
             kwargs["grades"] = grades
@@ -256,9 +274,13 @@ def run_key_range(
 
     if run_observed:
         kwargs = {
-            "score_factory": score_factory,
-            "analyze_confidence": analyzer.analyze_confidence_key,
+            "score": score,
+            "extract_features": analyzer.extract_features,
+            "analyze_confidence": analyzer.score_grade_key,
             "progress_cb": _progress_key if progress_cb is not None else None,
+            "executor": grade_executor,
+            "curve_cache": curve_cache,
+            "curve_key": ("key_range", "key", string_only),
         }
         if grades is not None:
             kwargs["grades"] = grades
@@ -268,10 +290,8 @@ def run_key_range(
 
 
     # UI data for target grade
-    if score is None:
-        score = base_score
-
-    analysis_notes, summary = analyzer.analyze_target(score, target_grade)
+    with span("target_pass", parts=len(score.parts)):
+        analysis_notes, summary = analyzer.analyze_target(score, target_grade)
 
     return {
         "observed_grade_range": observed_grade_range,
@@ -1,40 +1,43 @@
 # extract_key_range.py
-from music21 import stream, key, pitch
-from models import KeyData, PartialNoteData
-from utilities import normalize_key_name, get_rounded_grade, iter_measure_events
+import sys
+from bisect import bisect_right
+
+from models import KeyData, NoteTable, NoteTableBuilder
+from utilities import normalize_key_name, get_rounded_grade
 from app_data import PITCH_TO_INDEX
 from utilities import parse_part_name, validate_part_for_range_analysis
 
 
-def extract_key_segments(score, target_grade, *, sounding_score=None):
+def extract_key_segments(score, target_grade):
     """
     Extracts key signature changes and computes exposures.
     Returns a list of KeyData objects.
     """
-    src = sounding_score if sounding_score is not None else score.toSoundingPitch()
-    keys = src.parts[0].recurse().getElementsByClass('KeySignature')
-    if not keys:
-        keys = [key.KeySignature(sharps=None)]
-
-    key_segments = []
-    for ks in keys:
-        measure = ks.getContextByClass(stream.Measure).number
-        tonic = normalize_key_name(ks.tonicPitchNameWithCase).capitalize()
-        quality = ks.type
-
+    key_segments = [
+        KeyData(
+            measure=ks.measure,
+            grade=target_grade,
+            key=ks.tonic,
+            quality=ks.quality,
+            pitch_index=PITCH_TO_INDEX[ks.tonic]
+        )
+        for ks in score.key_signatures
+    ]
+    if not key_segments and score.parts and score.parts[0].measures:
+        # no key signature anywhere: read the score as C major from its first measure
         key_segments.append(
             KeyData(
-                measure=measure,
+                measure=score.parts[0].measures[0].number,
                 grade=target_grade,
-                key=tonic,
-                quality=quality,
-                pitch_index=PITCH_TO_INDEX[tonic]
+                key="C",
+                quality="major",
+                pitch_index=PITCH_TO_INDEX["C"]
             )
         )
 
     # Compute durations + exposure
     if key_segments:
-        total_measures = score.parts[0].measure(-1).number
+        total_measures = score.parts[0].measures[-1].number
         key_segments.sort(key=lambda k: k.measure)
 
         for i in range(len(key_segments)):
@@ -49,79 +52,84 @@ def extract_key_segments(score, target_grade, *, sounding_score=None):
     return key_segments
 
 
+def extract_part_notes(part, part_name, grade, key_segments) -> NoteTable:
+    """
+    Pitched notes of one part with sounding pitch and key-relative index.
+    Nothing here depends on grade beyond the value stamped on each note.
+    """
+    notes = NoteTableBuilder(part_name, grade)
+    # key_segments is sorted by start measure; the active one is the last
+    # starting at or before each measure
+    starts = [ks.measure for ks in key_segments]
+
+    for measure in part.measures:
+        i = bisect_right(starts, measure.number) - 1
+        local_key = key_segments[i] if i >= 0 else None
+        add_measure_notes(notes, measure, local_key)
+
+    return notes.build()
+
+
+def extract_measure_notes(measure, part_name, grade, local_key) -> NoteTable:
+    """extract_part_notes for one measure, under the key segment active there (or None)."""
+    notes = NoteTableBuilder(part_name, grade)
+    add_measure_notes(notes, measure, local_key)
+    return notes.build()
+
+
+def add_measure_notes(notes: NoteTableBuilder, measure, local_key) -> None:
+    for n in measure.iter_events():
+        if not n.is_note:
+            continue
+
+        sounding_midi = n.sounding_midi
+        relative_key_index = None
+        if local_key is not None:
+            relative_key_index = (sounding_midi % 12 - local_key.pitch_index) % 12
+
+        notes.append(
+            measure=measure.number,
+            offset=n.offset,
+            duration=n.duration,
+            written_pitch=sys.intern(normalize_key_name(n.written_pitch)),
+            written_midi_value=n.written_midi,
+            sounding_pitch=sys.intern(normalize_key_name(n.sounding_pitch)),
+            sounding_midi_value=sounding_midi,
+            relative_key_index=relative_key_index,
+        )
+
+
 def extract_note_data(score, target_grade, combined_ranges, key_segments):
     analysis_results = {}
     range_grade = get_rounded_grade(target_grade)
 
     for part in score.parts:
-        original_name = part.partName or "Unknown Part"
-        analysis_results[original_name] = {"Note Data": []}
+        original_name = part.name or "Unknown Part"
+        comment = missing_range_comment(original_name, combined_ranges, range_grade)
 
-        parsed = parse_part_name(original_name)
-        valid_part = validate_part_for_range_analysis(parsed)
+        notes = extract_part_notes(part, original_name, target_grade, key_segments)
 
-        has_range_rules = (
-            valid_part
-            and valid_part != "unknown"
-            and valid_part in combined_ranges
-            and range_grade in combined_ranges[valid_part]
-        )
+        # Range application is optional
+        if comment is not None:
+            for row in range(len(notes)):
+                notes.add_comment(row, "Range", comment)
 
-        if has_range_rules:
-            core_range  = combined_ranges[valid_part][range_grade]["core"]
-            ext_range   = combined_ranges[valid_part][range_grade]["extended"]
-            total_range = combined_ranges[valid_part]["total_range"]
-        else:
-            core_range = ext_range = total_range = None
-
-        for measure in part.getElementsByClass(stream.Measure):
-            local_key = None
-            for ks in reversed(key_segments):
-                if measure.number >= ks.measure:
-                    local_key = ks
-                    break
-
-            for n in iter_measure_events(measure):
-                if not n.isNote:
-                    continue
-
-                inst = n.getContextByClass("Instrument")
-                interval = inst.transposition if inst else None
-
-                written_pitch = normalize_key_name(n.pitch.nameWithOctave)
-                written_midi = n.pitch.midi
-
-                if interval:
-                    sounding_pitch = normalize_key_name(n.pitch.transpose(interval).nameWithOctave)
-                    sounding_midi = n.pitch.transpose(interval).midi
-                else:
-                    sounding_pitch = written_pitch
-                    sounding_midi = written_midi
-
-                data = PartialNoteData(
-                    measure=n.measureNumber,
-                    offset=n.offset,
-                    grade=target_grade,
-                    instrument=original_name,
-                    duration=n.quarterLength,
-                    written_pitch=written_pitch,
-                    written_midi_value=written_midi,
-                    sounding_pitch=sounding_pitch,
-                    sounding_midi_value=sounding_midi,
-                )
-
-                if local_key is not None:
-                    pitch_class = sounding_midi % 12
-                    data.relative_key_index = (pitch_class - local_key.pitch_index) % 12
-
-                # Range application is optional
-                if has_range_rules:
-                    # TODO: apply your range confidence buckets here
-                    pass
-                else:
-                    data.range_confidence = None
-                    data.comments["Range"] = f"No range dataset for '{original_name}' (normalized: '{valid_part}')"
-
-                analysis_results[original_name]["Note Data"].append(data)
+        analysis_results[original_name] = {"Note Data": notes}
 
     return analysis_results
+
+
+def missing_range_comment(original_name, combined_ranges, range_grade) -> str | None:
+    """The "Range" comment for notes of a part with no range data at range_grade; None when it has some."""
+    parsed = parse_part_name(original_name)
+    valid_part = validate_part_for_range_analysis(parsed)
+
+    has_range_rules = (
+        valid_part
+        and valid_part != "unknown"
+        and valid_part in combined_ranges
+        and range_grade in combined_ranges[valid_part]
+    )
+    if has_range_rules:
+        return None
+    return f"No range dataset for '{original_name}' (normalized: '{valid_part}')"
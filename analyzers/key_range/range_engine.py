@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import numpy as np
+
+from app_data import MAJOR_DIATONIC_MAP, MINOR_DIATONIC_MAP
+from models import RangeFeatures, RangeTable
+from utilities import get_rounded_grade
+from utilities.instrument_rules import crosses_break
+
+from analyzers.key_range.rules import harmonic_tolerance_penalty
+
+
+def build_range_table(combined_ranges: dict) -> RangeTable:
+    """
+    Precomputes the bounds compute_range_confidence reads from load_combined_ranges,
+    so a whole batch of notes can be scored with array comparisons.
+    """
+    instruments = tuple(combined_ranges)
+    grades = tuple(sorted({g for entry in combined_ranges.values() for g in entry if g != "total_range"}))
+    shape = (len(instruments), len(grades))
+
+    has_grade = np.zeros(shape, dtype=bool)
+    core_low = np.full(shape, np.inf)
+    core_high = np.full(shape, -np.inf)
+    ext_low = np.full(shape, np.inf)
+    ext_high = np.full(shape, -np.inf)
+    total_low = np.full(len(instruments), np.inf)
+    total_high = np.full(len(instruments), -np.inf)
+
+    for i, name in enumerate(instruments):
+        entry = combined_ranges[name]
+        if "total_range" in entry:
+            total_low[i], total_high[i] = entry["total_range"][0], entry["total_range"][1]
+        for j, grade in enumerate(grades):
+            if grade not in entry:
+                continue
+            has_grade[i, j] = True
+            # discrete (string) tables are read the same way the scalar rule reads them: first two values
+            core = entry[grade]["core"]
+            if core:
+                core_low[i, j], core_high[i, j] = core[0], core[1]
+            ext = entry[grade]["extended"]
+            ext_low[i, j], ext_high[i, j] = ext[0], ext[1]
+
+    return RangeTable(
+        instruments=instruments,
+        grades=grades,
+        has_grade=has_grade,
+        core_low=core_low,
+        core_high=core_high,
+        ext_low=ext_low,
+        ext_high=ext_high,
+        total_low=total_low,
+        total_high=total_high,
+    )
+
+
+def pack_range_features(table: RangeTable, parts, key_quality: str) -> RangeFeatures:
+    """
+    parts: iterable of (canonical instrument, NoteTable). Canonical names must be in the table.
+    """
+    parts = [(table.instruments.index(canonical), notes) for canonical, notes in parts]
+
+    def column(fn, dtype):
+        pieces = [np.asarray(fn(bucket, notes), dtype=dtype) for bucket, notes in parts]
+        return np.concatenate(pieces) if pieces else np.zeros(0, dtype=dtype)
+
+    def each(bucket, notes, value):
+        return np.full(len(notes), value)
+
+    return RangeFeatures(
+        sounding_midi=column(lambda b, n: n.values("sounding_midi_value"), float),
+        relative_key_index=column(lambda b, n: [-1 if i is None else i for i in n.values("relative_key_index")], np.intp),
+        bucket=column(lambda b, n: each(b, n, b), np.intp),
+        duration=column(lambda b, n: [float(d or 0.0) for d in n.values("duration")], float),
+        is_clarinet=column(lambda b, n: each(b, n, "Clarinet" in n.instrument), bool),
+        is_first_clarinet=column(lambda b, n: each(b, n, "Clarinet 1" in n.instrument), bool),
+        crosses_break=column(lambda b, n: [crosses_break(p) for p in n.values("written_pitch")], bool),
+        key_quality=key_quality,
+    )
+
+
+def stack_range_features(table: RangeTable, pieces: list[RangeFeatures], key_quality: str) -> RangeFeatures:
+    """Joins features packed piecewise (say one per measure) in order, under one key quality."""
+    if not pieces:
+        return pack_range_features(table, [], key_quality)
+
+    def column(name):
+        return np.concatenate([getattr(piece, name) for piece in pieces])
+
+    return RangeFeatures(
+        sounding_midi=column("sounding_midi"),
+        relative_key_index=column("relative_key_index"),
+        bucket=column("bucket"),
+        duration=column("duration"),
+        is_clarinet=column("is_clarinet"),
+        is_first_clarinet=column("is_first_clarinet"),
+        crosses_break=column("crosses_break"),
+        key_quality=key_quality,
+    )
+
+
+def _diatonic_mask(relative_key_index: np.ndarray, key_quality: str) -> np.ndarray:
+    if key_quality == "major":
+        allowed = MAJOR_DIATONIC_MAP
+    else:
+        allowed = MINOR_DIATONIC_MAP | {11}
+    lookup = np.array([i in allowed for i in range(12)])
+    return (relative_key_index >= 0) & lookup[np.clip(relative_key_index, 0, 11)]
+
+
+def range_confidence_matrix(table: RangeTable, features: RangeFeatures, grades) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Batch equivalent of compute_range_confidence for every note and grade.
+
+    Returns (confidence, scored), both shaped (notes x grades). scored is False
+    where the note's instrument has no range data for the grade's range bucket.
+    """
+    grades = np.asarray([float(g) for g in grades])
+    range_cols = np.array([
+        table.grades.index(float(get_rounded_grade(g))) if float(get_rounded_grade(g)) in table.grades else -1
+        for g in grades
+    ], dtype=np.intp)
+
+    bucket = features.bucket[:, None]
+    cols = np.clip(range_cols, 0, None)[None, :]
+    scored = (range_cols >= 0)[None, :] & table.has_grade[bucket, cols]
+
+    midi = features.sounding_midi[:, None]
+    in_core = (table.core_low[bucket, cols] <= midi) & (midi <= table.core_high[bucket, cols])
+    in_ext = (table.ext_low[bucket, cols] <= midi) & (midi <= table.ext_high[bucket, cols])
+    in_total = (table.total_low[bucket] <= midi) & (midi <= table.total_high[bucket])
+
+    conf = np.select([in_core, in_ext, in_total], [1.0, 0.6, 0.25], default=0.0)
+
+    # clarinet break: not allowed below grade 2, only Clarinet 1 is allowed from 2 up to 3
+    below_two = grades[None, :] < 2.0
+    two_to_three = (grades[None, :] >= 2.0) & (grades[None, :] < 3.0)
+    breaks = (features.is_clarinet & features.crosses_break)[:, None] & (below_two | two_to_three)
+    allowed = two_to_three & features.is_first_clarinet[:, None]
+    conf = np.where(breaks, np.maximum(0.0, conf - np.where(allowed, 0.1, 0.25)), conf)
+
+    penalty = np.array([harmonic_tolerance_penalty(g) for g in grades])[None, :]
+    non_diatonic = ~_diatonic_mask(features.relative_key_index, features.key_quality)[:, None]
+    conf = np.where(non_diatonic, np.maximum(0.0, conf - penalty), conf)
+
+    return np.maximum(0.0, conf), scored
+
+
+def range_confidence_curve(table: RangeTable, features: RangeFeatures, grades) -> list[float]:
+    """
+    Duration-weighted range confidence per grade; 0.0 when nothing is scored.
+    """
+    conf, scored = range_confidence_matrix(table, features, grades)
+    weights = scored * features.duration[:, None]
+    exposure = weights.sum(axis=0)
+    totals = (conf * weights).sum(axis=0)
+    return [float(t / e) if e else 0.0 for t, e in zip(totals, exposure)]
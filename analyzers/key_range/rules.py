@@ -100,7 +100,8 @@ def harmonic_tolerance_penalty(grade):
 
 def compute_range_confidence(note, core, ext, total, target_grade, key_quality):
     """
-    Computes per-note range confidence with harmonic penalties.
+    Computes per-note range confidence with harmonic penalties and UI comments.
+    Target pass only; confidence curves use range_engine.range_confidence_matrix.
     """
     midi = note.sounding_midi_value
     rel = note.relative_key_index
@@ -110,13 +111,13 @@ def compute_range_confidence(note, core, ext, total, target_grade, key_quality):
         conf = 1.0
     elif ext[0] <= midi <= ext[1]:
         conf = 0.6
-        note.comments["range"] = f"{note.written_pitch} in extended range for grade {target_grade}"
+        note.add_comment("range", f"{note.written_pitch} in extended range for grade {target_grade}")
     elif total[0] <= midi <= total[1]:
         conf = 0.25
-        note.comments["range"] = f"{note.written_pitch} out of range for grade {target_grade}"
+        note.add_comment("range", f"{note.written_pitch} out of range for grade {target_grade}")
     else:
         conf = 0.0
-        note.comments["range"] = f"{note.written_pitch} out of range altogether for {note.instrument}"
+        note.add_comment("range", f"{note.written_pitch} out of range altogether for {note.instrument}")
 
     # -------------- Clarinet break penalty --------------
     if clarinet_break_allowed(target_grade, note.instrument) is not None:
@@ -124,20 +125,20 @@ def compute_range_confidence(note, core, ext, total, target_grade, key_quality):
             allowed = clarinet_break_allowed(target_grade, note.instrument)
             if allowed:
                 conf = max(0.0, conf - 0.1)
-                note.comments["crosses_break"] = f"Clarinet break crossed (allowed for grade {target_grade}/{note.instrument})"
+                note.add_comment("crosses_break", f"Clarinet break crossed (allowed for grade {target_grade}/{note.instrument})")
             else:
                 conf = max(0.0, conf - 0.25)
-                note.comments["crosses_break"] = f"Clarinet break crossed (not allowed for grade {target_grade})"
+                note.add_comment("crosses_break", f"Clarinet break crossed (not allowed for grade {target_grade})")
 
     # -------------- Harmonic Tolerance Penalty --------------
     penalty = harmonic_tolerance_penalty(target_grade)
     if key_quality == "major":
         if rel not in MAJOR_DIATONIC_MAP:
             conf = max(0.0, conf - penalty)
-            note.comments["harmonic_tolerance"] = f"Non-diatonic note {note.written_pitch} in major key for grade {target_grade}"
+            note.add_comment("harmonic_tolerance", f"Non-diatonic note {note.written_pitch} in major key for grade {target_grade}")
     else:  # minor
         if (rel not in MINOR_DIATONIC_MAP) and rel != 11:
             conf = max(0.0, conf - penalty)
-            note.comments["harmonic_tolerance"] = f"Non-diatonic note {note.written_pitch} in minor key for grade {target_grade}"
+            note.add_comment("harmonic_tolerance", f"Non-diatonic note {note.written_pitch} in minor key for grade {target_grade}")
 
     return max(0.0, conf)
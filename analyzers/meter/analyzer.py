@@ -1,15 +1,12 @@
 # analyzers/meter/analyzer.py
 from __future__ import annotations
 
-from copy import deepcopy
-
-from music21 import converter
-
 from analyzers.base import BaseAnalyzer
 from analyzers.shared.score_extract import extract_meter_segments
+from analyzers.shared.score_ir import load_score_ir
 from analyzers.rhythm.rules import load_rhythm_rules
 from data_processing import derive_observed_grades
-from utilities import get_closest_grade
+from utilities import get_closest_grade, span
 
 
 def apply_meter_change_penalty(base_total: float, meter_data, grade: float) -> float:
@@ -77,18 +74,13 @@ def run_meter(
     target_grade: float,
     *,
     score=None,
-    score_factory=None,
     progress_cb=None,
     run_observed=True,
     analysis_options=None,
+    grade_executor=None,
+    curve_cache=None,
 ):
-    if score_factory is None:
-        if score is not None:
-            score_factory = lambda: deepcopy(score)
-        elif score_path is not None:
-            score_factory = lambda: converter.parse(score_path)
-        else:
-            raise ValueError("score_path or score_factory is required")
+    score = load_score_ir(score_path, score)
 
     # shared rhythm rules drive both rhythm + meter
     rules = load_rhythm_rules()
@@ -101,9 +93,12 @@ def run_meter(
 
     if run_observed:
         kwargs = {
-            "score_factory": score_factory,
-            "analyze_confidence": lambda score, g: analyzer.analyze_confidence(score, g),
+            "score": score,
+            "analyze_confidence": analyzer.analyze_confidence,
             "progress_cb": progress_cb,
+            "executor": grade_executor,
+            "curve_cache": curve_cache,
+            "curve_key": ("meter",),
         }
         if grades is not None:
             kwargs["grades"] = grades
@@ -111,9 +106,8 @@ def run_meter(
     else:
         observed_grade, confidences = None, {}
 
-    if score is None:
-        score = score_factory()
-    meter_segments, overall_conf = analyzer.analyze_target(score, target_grade)
+    with span("target_pass", parts=len(score.parts)):
+        meter_segments, overall_conf = analyzer.analyze_target(score, target_grade)
 
     return {
         "observed_grade": observed_grade,
@@ -1,16 +1,16 @@
 from __future__ import annotations
 
-from copy import deepcopy
+import sys
 
-from music21 import meter, stream, converter
-
-from models import PartialNoteData
-from analyzers.rhythm.helpers import get_rhythm_token, annotate_tuplets, is_implicit_empty_measure
+from models import NoteTable, NoteTableBuilder, RhythmFeatures
+from analyzers.shared.score_ir import load_score_ir
+from analyzers.rhythm.helpers import get_rhythm_token, annotate_tuplet, is_implicit_empty_measure
 from analyzers.rhythm.note_rules import rule_dotted, rule_subdivision, rule_syncopation, rule_tuplet
-from analyzers.rhythm.rules import load_rhythm_rules
+from analyzers.rhythm.rules import build_rhythm_rule_matrix, load_rhythm_rule_matrix, load_rhythm_rules
+from analyzers.rhythm.curve import pack_rhythm_features, rhythm_confidence_curve
 from data_processing import derive_observed_grades
 from app_data import GRADES
-from utilities import get_closest_grade, iter_measure_lines
+from utilities import get_closest_grade, span
 
 
 def rhythm_note_confidence(note, rules_for_grade, target_grade):
@@ -22,91 +22,103 @@ def rhythm_note_confidence(note, rules_for_grade, target_grade):
     ]
 
 
+# ----------------------------
+# Note extraction (grade-invariant)
+# ----------------------------
+
+def build_rhythm_notes(part, part_name: str, grade: float | None) -> NoteTable:
+    notes = NoteTableBuilder(part_name, grade)
+    current_ts = None
+    tuplets = None
+
+    for m in part.measures:
+        ts = m.time_signature or m.local_time_signature
+        if ts is not None:
+            current_ts = ts
+        if current_ts is None:
+            continue
+
+        tuplets = add_measure_rhythm_notes(notes, m, current_ts, tuplets)
+
+    return notes.build()
+
+
+def build_measure_rhythm_notes(m, current_ts, part_name: str, grade: float | None, tuplets=None):
+    """
+    Rhythm notes of one measure in current_ts. tuplets is the annotate_tuplet
+    state from the part's earlier measures; returns (notes, state after them).
+    """
+    notes = NoteTableBuilder(part_name, grade)
+    tuplets = add_measure_rhythm_notes(notes, m, current_ts, tuplets)
+    return notes.build(), tuplets
+
+
+def add_measure_rhythm_notes(notes: NoteTableBuilder, m, current_ts, tuplets=None):
+    """Appends the rhythm rows of one measure to notes; returns the annotate_tuplet state after them."""
+    beat_length = current_ts.beat_length
+
+    # implicit empty measure -> add a None-token "placeholder" note
+    if is_implicit_empty_measure(m, current_ts):
+        notes.append(
+            measure=m.number,
+            offset=0.0,
+            duration=current_ts.bar_length,
+            beat_unit=beat_length,
+        )
+        return tuplets
+
+    for line_index, events in enumerate(m.lines):
+        for event_index, n in enumerate(events):
+            beat_index = int(n.offset // beat_length)
+            beat_offset = n.offset % beat_length
+
+            tuplet = None
+            if n.tuplet is not None:
+                tuplet, tuplets = annotate_tuplet(tuplets, (m.number, beat_index, line_index, *n.tuplet))
+            tuplet_id, tuplet_index, tuplet_actual, tuplet_normal, tuplet_class = tuplet or (None,) * 5
+
+            notes.append(
+                measure=m.number,
+                offset=n.offset,
+                duration=n.duration,
+                written_pitch=n.written_pitch,
+                written_midi_value=n.written_midi,
+                rhythm_token=sys.intern(get_rhythm_token(n) + ("r" if n.is_rest else "")),
+                beat_index=beat_index,
+                beat_offset=beat_offset,
+                beat_unit=beat_length,
+                chord_index=event_index,
+                voice_index=line_index,
+                is_chord=n.is_chord,
+                chord_size=n.chord_size,
+                tuplet_id=tuplet_id,
+                tuplet_index=tuplet_index,
+                tuplet_actual=tuplet_actual,
+                tuplet_normal=tuplet_normal,
+                tuplet_class=tuplet_class,
+            )
+
+    return tuplets
+
+
+def extract_rhythm_features(score) -> RhythmFeatures:
+    """
+    Runs once per score: the scorable notes of every part, packed into columns.
+    Empty-measure placeholders are dropped since they never count toward confidence.
+    """
+    return pack_rhythm_features([build_rhythm_notes(part, part.name or "", None) for part in score.parts])
+
+
 # ----------------------------
 # 1) Confidence-only pass (no UI note data)
 # ----------------------------
 
-def analyze_rhythm_confidence(score, rules, grade: float) -> float | None:
-    rule_grade = get_closest_grade(grade, rules.keys())
-    rules_for_grade = rules.get(rule_grade) if rule_grade is not None else None
-    if rules_for_grade is None:
-        return None
+def score_rhythm_features(features: RhythmFeatures, rules, grade: float) -> float | None:
+    return rhythm_confidence_curve(features, build_rhythm_rule_matrix(rules), [grade])[0]
 
-    part_confs: list[float] = []
 
-    for part in score.parts:
-        current_ts = None
-        total_conf = 0.0
-        total_dur = 0.0
-
-        for m in part.getElementsByClass(stream.Measure):
-            ts = m.getContextByClass(meter.TimeSignature)
-            if ts is None:
-                local_ts = list(m.getElementsByClass(meter.TimeSignature))
-                ts = local_ts[0] if local_ts else None
-            if ts is not None:
-                current_ts = ts
-            if current_ts is None:
-                continue
-
-            beat_length = current_ts.beatDuration.quarterLength
-
-            # implicit empty measure: ignore from confidence curve (your choice)
-            # If you want empty measures to count as "acceptable" but not boost:
-            if is_implicit_empty_measure(m, current_ts):
-                continue
-
-            # build aligned lists just for tuplet detection
-            partial_notes = []
-            music21_notes = []
-
-            for line_index, events in iter_measure_lines(m):
-                for event_index, n in enumerate(events):
-                    written_pitch = None
-                    written_midi = None
-                    if not n.isRest and getattr(n, "isChord", False) is False and hasattr(n, "pitch"):
-                        written_pitch = n.pitch.nameWithOctave
-                        written_midi = n.pitch.midi
-
-                    p = PartialNoteData(
-                        measure=m.number,
-                        offset=n.offset,
-                        grade=grade,
-                        instrument=(part.partName or ""),
-                        duration=n.duration.quarterLength,
-                        written_pitch=written_pitch,
-                        written_midi_value=written_midi,
-                        rhythm_token=get_rhythm_token(n) + ("r" if n.isRest else ""),
-                        beat_index=int(n.offset // beat_length),
-                        beat_offset=(n.offset % beat_length),
-                        beat_unit=beat_length,
-                        voice_index=line_index,
-                        chord_index=event_index,
-                        is_chord=bool(getattr(n, "isChord", False)),
-                        chord_size=len(n.pitches) if getattr(n, "isChord", False) else None,
-                    )
-                    partial_notes.append(p)
-                    music21_notes.append(n)
-
-            annotate_tuplets(partial_notes, music21_notes)
-
-            for note in partial_notes:
-                # ignore None tokens (won't occur here) and optionally ignore rests:
-                if note.rhythm_token is None:
-                    continue
-
-                res = rhythm_note_confidence(note, rules_for_grade, grade)
-                note_conf = min(r[0] for r in res)
-                total_conf += note_conf * (note.duration or 0.0)
-                total_dur += (note.duration or 0.0)
-
-        if total_dur > 0:
-            part_confs.append(total_conf / total_dur)
-
-    if not part_confs:
-        return None
-
-    return sum(part_confs) / len(part_confs)
+def analyze_rhythm_confidence(score, rules, grade: float) -> float | None:
+    return score_rhythm_features(extract_rhythm_features(score), rules, grade)
 
 
 # ----------------------------
@@ -121,105 +133,51 @@ def analyze_rhythm_target(score, rules, target_grade: float):
         return {}, None
 
     for part in score.parts:
-        part_name = part.partName or "Unknown"
-        current_ts = None
-
-        analysis_notes[part_name] = {"note_data": []}
-        partial_notes = []
-        music21_notes = []
-
-        for m in part.getElementsByClass(stream.Measure):
-            ts = m.getContextByClass(meter.TimeSignature)
-            if ts is None:
-                local_ts = list(m.getElementsByClass(meter.TimeSignature))
-                ts = local_ts[0] if local_ts else None
-            if ts is not None:
-                current_ts = ts
-            if current_ts is None:
-                continue
-
-            beat_length = current_ts.beatDuration.quarterLength
-
-            # implicit empty measure -> add a None-token "placeholder" note
-            if is_implicit_empty_measure(m, current_ts):
-                partial_notes.append(
-                    PartialNoteData(
-                        measure=m.number,
-                        offset=0.0,
-                        grade=target_grade,
-                        instrument=part_name,
-                        duration=current_ts.barDuration.quarterLength,
-                        rhythm_token=None,
-                        beat_index=None,
-                        beat_offset=None,
-                        beat_unit=beat_length,
-                    )
-                )
-                continue
-
-            for line_index, events in iter_measure_lines(m):
-                for event_index, n in enumerate(events):
-                    beat_index = int(n.offset // beat_length)
-                    beat_offset = n.offset % beat_length
-
-                    written_pitch = None
-                    written_midi = None
-                    if not n.isRest and getattr(n, "isChord", False) is False and hasattr(n, "pitch"):
-                        written_pitch = n.pitch.nameWithOctave
-                        written_midi = n.pitch.midi
-
-                    p = PartialNoteData(
-                        measure=m.number,
-                        offset=n.offset,
-                        grade=target_grade,
-                        instrument=part_name,
-                        duration=n.duration.quarterLength,
-                        written_pitch=written_pitch,
-                        written_midi_value=written_midi,
-                        rhythm_token=get_rhythm_token(n) + ("r" if n.isRest else ""),
-                        beat_index=beat_index,
-                        beat_offset=beat_offset,
-                        beat_unit=beat_length,
-                        chord_index=event_index,
-                        voice_index=line_index,
-                        is_chord=bool(getattr(n, "isChord", False)),
-                        chord_size=len(n.pitches) if getattr(n, "isChord", False) else None,
-                    )
-                    partial_notes.append(p)
-                    music21_notes.append(n)
-
-        annotate_tuplets(partial_notes, music21_notes)
-        analysis_notes[part_name]["note_data"] = partial_notes
+        part_name = part.name or "Unknown"
+        analysis_notes[part_name] = {"note_data": build_rhythm_notes(part, part_name, target_grade)}
 
     # compute per-part rhythm confidence + attach comments
     part_confs: list[float] = []
 
     for part_name, part in analysis_notes.items():
-        notes = part.get("note_data", [])
-        total_conf = 0.0
-        total_dur = 0.0
+        terms = score_rhythm_notes(part["note_data"], rules_for_grade, target_grade)
+        part["rhythm_confidence"] = rhythm_part_confidence(terms)
+        if part["rhythm_confidence"] is not None:
+            part_confs.append(part["rhythm_confidence"])
 
-        for note in notes:
-            if note.rhythm_token is None:
-                # Empty measure placeholders: excluded from confidence (your current preference)
-                continue
+    overall_conf = (sum(part_confs) / len(part_confs)) if part_confs else None
+    return analysis_notes, overall_conf
 
-            res = rhythm_note_confidence(note, rules_for_grade, target_grade)
-            note.rhythm_confidence = min(r[0] for r in res)
 
-            for conf, msg, label in res:
-                if label is not None and conf == 0 and msg:
-                    note.comments[label] = msg
+def score_rhythm_notes(notes: NoteTable, rules_for_grade, target_grade: float) -> list[tuple]:
+    """Sets confidence and comments on each note; returns (weighted confidence, duration) per scored note."""
+    terms = []
+    confidences = [None] * len(notes)
+    for note in notes:
+        if note.rhythm_token is None:
+            # Empty measure placeholders: excluded from confidence (your current preference)
+            continue
 
-            total_conf += (note.rhythm_confidence or 0.0) * (note.duration or 0.0)
-            total_dur += (note.duration or 0.0)
+        res = rhythm_note_confidence(note, rules_for_grade, target_grade)
+        rhythm_confidence = confidences[note.index] = min(r[0] for r in res)
 
-        part["rhythm_confidence"] = (total_conf / total_dur) if total_dur > 0 else None
-        if part["rhythm_confidence"] is not None:
-            part_confs.append(part["rhythm_confidence"])
+        for conf, msg, label in res:
+            if label is not None and conf == 0 and msg:
+                note.add_comment(label, msg)
 
-    overall_conf = (sum(part_confs) / len(part_confs)) if part_confs else None
-    return analysis_notes, overall_conf
+        duration = note.duration
+        terms.append(((rhythm_confidence or 0.0) * (duration or 0.0), duration or 0.0))
+    notes.set("rhythm_confidence", confidences)
+    return terms
+
+
+def rhythm_part_confidence(terms) -> float | None:
+    total_conf = 0.0
+    total_dur = 0.0
+    for conf, dur in terms:
+        total_conf += conf
+        total_dur += dur
+    return (total_conf / total_dur) if total_dur > 0 else None
 
 
 # ----------------------------
@@ -231,19 +189,15 @@ def run_rhythm(
     target_grade: float,
     *,
     score=None,
-    score_factory=None,
     progress_cb=None,
     run_observed=True,
     analysis_options=None,
+    grade_executor=None,
+    curve_cache=None,
 ):
-    if score_factory is None:
-        if score is not None:
-            score_factory = lambda: deepcopy(score)
-        elif score_path is not None:
-            score_factory = lambda: converter.parse(score_path)
-        else:
-            raise ValueError("score_path or score_factory is required")
+    score = load_score_ir(score_path, score)
     rules = load_rhythm_rules()
+    rule_matrix = load_rhythm_rule_matrix()
 
     # 1) observed grade + confidence curve (across all grades)
     grades = None
@@ -253,9 +207,13 @@ def run_rhythm(
 
     if run_observed:
         kwargs = {
-            "score_factory": score_factory,
-            "analyze_confidence": lambda score, g: analyze_rhythm_confidence(score, rules, g),
+            "score": score,
+            "extract_features": extract_rhythm_features,
+            "analyze_curve": lambda features, gs: rhythm_confidence_curve(features, rule_matrix, gs),
             "progress_cb": progress_cb,
+            "executor": grade_executor,
+            "curve_cache": curve_cache,
+            "curve_key": ("rhythm",),
         }
         if grades is not None:
             kwargs["grades"] = grades
@@ -264,9 +222,8 @@ def run_rhythm(
         observed_grade, confidences = None, {}
 
     # 2) target grade (UI note data)
-    if score is None:
-        score = score_factory()
-    analysis_notes, overall_conf = analyze_rhythm_target(score, rules, target_grade)
+    with span("target_pass", parts=len(score.parts)):
+        analysis_notes, overall_conf = analyze_rhythm_target(score, rules, target_grade)
 
     return {
         "observed_grade": observed_grade,
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import numpy as np
+
+from models import NoteTable, RhythmFeatures, RhythmRuleMatrix
+from analyzers.rhythm.helpers import check_syncopation, get_quarter_length
+from analyzers.rhythm.rules import TUPLET_CLASS_ORDER, normalize_tuplet_class
+from utilities import get_closest_grade
+
+
+def pack_rhythm_features(part_notes: list[NoteTable]) -> RhythmFeatures:
+    """
+    Packs the scorable notes (those with a rhythm token) of every part into the
+    columns the rules read. Flags are decided here, on the original (possibly
+    Fraction) values.
+    """
+    part_index, duration, offset, dotted, syncopated, subdivision, tuplet_class = ([] for _ in range(7))
+    for part_idx, notes in enumerate(part_notes):
+        for token, dur, off, tuplet_id, tuplet_cls in zip(
+            notes.values("rhythm_token"),
+            notes.values("duration"),
+            notes.values("offset"),
+            notes.values("tuplet_id"),
+            notes.values("tuplet_class"),
+        ):
+            if token is None:
+                continue
+            part_index.append(part_idx)
+            duration.append(float(dur or 0.0))
+            offset.append(float(off))
+            dotted.append("d" in token)
+            syncopated.append(check_syncopation(dur, off)[1])
+            subdivision.append(_or_nan(get_quarter_length(token)))
+            tuplet_class.append(_tuplet_class_code(tuplet_id, tuplet_cls))
+
+    return RhythmFeatures(
+        part_index=np.array(part_index, dtype=np.intp),
+        part_count=len(part_notes),
+        duration=np.array(duration, dtype=float),
+        offset=np.array(offset, dtype=float),
+        dotted=np.array(dotted, dtype=bool),
+        syncopated=np.array(syncopated, dtype=bool),
+        subdivision=np.array(subdivision, dtype=float),
+        tuplet_class=np.array(tuplet_class, dtype=np.intp),
+    )
+
+
+def stack_rhythm_features(parts: list[list[RhythmFeatures]]) -> RhythmFeatures:
+    """
+    Joins features packed piecewise: parts[i] holds part i's pieces (say one per
+    measure), each packed as pack_rhythm_features([notes]). Gives the same columns
+    as packing all the notes at once.
+    """
+    pieces = [piece for part in parts for piece in part]
+    if not pieces:
+        return pack_rhythm_features([NoteTable(None, None) for _ in parts])
+    counts = [sum(len(piece.duration) for piece in part) for part in parts]
+
+    def column(name):
+        return np.concatenate([getattr(piece, name) for piece in pieces])
+
+    return RhythmFeatures(
+        part_index=np.repeat(np.arange(len(parts), dtype=np.intp), counts),
+        part_count=len(parts),
+        duration=column("duration"),
+        offset=column("offset"),
+        dotted=column("dotted"),
+        syncopated=column("syncopated"),
+        subdivision=column("subdivision"),
+        tuplet_class=column("tuplet_class"),
+    )
+
+
+def _or_nan(value):
+    return np.nan if value is None else value
+
+
+def _tuplet_class_code(tuplet_id, tuplet_class) -> int:
+    if tuplet_id is None:
+        return -1
+    return TUPLET_CLASS_ORDER[normalize_tuplet_class(tuplet_class)]
+
+
+def rhythm_pass_matrix(features: RhythmFeatures, rules: np.ndarray, columns: tuple[str, ...]) -> np.ndarray:
+    """
+    Broadcasts note_rules over (notes x grades). rules holds one row of the rule
+    matrix per grade; a note passes a grade only if it passes all four rules.
+    """
+    def col(name):
+        return rules[:, columns.index(name)].astype(bool)[None, :]
+
+    max_subdivision = rules[:, columns.index("max_subdivision")][None, :]
+    tuplet_allowed = rules[:, [columns.index(f"tuplet_{name}") for name in TUPLET_CLASS_ORDER]].astype(bool)
+
+    in_tuplet = features.tuplet_class >= 0
+    class_allowed = tuplet_allowed[:, np.where(in_tuplet, features.tuplet_class, 0)].T
+
+    dotted_ok = ~features.dotted[:, None] | col("allow_dotted")
+    sync_ok = ~features.syncopated[:, None] | col("allow_syncopation")
+    # NaN (rests / unknown tokens) compares False, i.e. passes
+    subdivision_ok = ~(features.subdivision[:, None] > max_subdivision)
+    tuplet_ok = ~in_tuplet[:, None] | (col("allow_tuplet") & class_allowed)
+
+    return dotted_ok & sync_ok & subdivision_ok & tuplet_ok
+
+
+def rhythm_confidence_curve(features: RhythmFeatures, matrix: RhythmRuleMatrix, grades) -> list[float | None]:
+    """
+    Rhythm confidence for every grade in one evaluation: the duration-weighted
+    mean per part, averaged over parts that have any scorable duration.
+    """
+    rule_grades = [get_closest_grade(float(g), matrix.grades) for g in grades]
+    result: list[float | None] = [None] * len(rule_grades)
+
+    scored = [i for i, g in enumerate(rule_grades) if g is not None]
+    if not scored or features.part_count == 0:
+        return result
+
+    rows = [matrix.grades.index(rule_grades[i]) for i in scored]
+    passes = rhythm_pass_matrix(features, matrix.values[rows], matrix.columns)
+
+    n_grades = len(rows)
+    n_parts = features.part_count
+
+    weighted = passes * features.duration[:, None]
+    bins = features.part_index[:, None] * n_grades + np.arange(n_grades)[None, :]
+    conf_sums = np.bincount(bins.ravel(), weights=weighted.ravel(), minlength=n_parts * n_grades)
+    conf_sums = conf_sums.reshape(n_parts, n_grades)
+    dur_sums = np.bincount(features.part_index, weights=features.duration, minlength=n_parts)
+
+    has_duration = dur_sums > 0
+    if not has_duration.any():
+        return result
+
+    part_confs = conf_sums[has_duration] / dur_sums[has_duration, None]
+    for i, conf in zip(scored, part_confs.mean(axis=0)):
+        result[i] = float(conf)
+    return result
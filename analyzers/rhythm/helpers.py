@@ -1,10 +1,10 @@
 from app_data import RHYTHM_TOKEN_MAP
 import math
-from models import PartialNoteData
+from models import MeasureIR, NoteEvent, TimeSignatureIR
 
-def get_rhythm_token(n):
-    base = RHYTHM_TOKEN_MAP[n.duration.type]["token"]
-    return base + ("d" * n.duration.dots)
+def get_rhythm_token(event: NoteEvent):
+    base = RHYTHM_TOKEN_MAP[event.duration_type]["token"]
+    return base + ("d" * event.dots)
 
 def get_quarter_length(token):
     if not token or 'r' in token:
@@ -22,55 +22,33 @@ def get_quarter_length(token):
     return total
 
 
-def is_implicit_empty_measure(measure, ts):
-    events = list(measure.notesAndRests)
-    if len(events) != 1:
+def is_implicit_empty_measure(measure: MeasureIR, ts: TimeSignatureIR):
+    if measure.implicit_rest_length is None:
         return False
-
-    n = events[0]
-    return (
-        n.isRest
-        and n.offset == 0
-        and math.isclose(n.duration.quarterLength, ts.barDuration.quarterLength)
-    )
+    return math.isclose(measure.implicit_rest_length, ts.bar_length)
 
 
 # =========================
 # Tuplet annotation
 # =========================
 
-def annotate_tuplets(notes: list[PartialNoteData], music21_notes):
-    current_tuplet_id = 0
-    active_signature = None
-    tuplet_index = 0
-
-    for pd, n in zip(notes, music21_notes):
-
-        if not n.duration.tuplets:
-            continue
-
-        t = n.duration.tuplets[0]
-
-        signature = (
-            pd.measure,
-            pd.beat_index,
-            pd.voice_index,
-            t.numberNotesActual,
-            t.numberNotesNormal
-        )
-
-        if signature != active_signature:
-            current_tuplet_id += 1
-            active_signature = signature
-            tuplet_index = 0
-
-        pd.tuplet_id = current_tuplet_id
-        pd.tuplet_index = tuplet_index
-        pd.tuplet_actual = t.numberNotesActual
-        pd.tuplet_normal = t.numberNotesNormal
-        pd.tuplet_class = get_tuplet_class(t.numberNotesActual, t.numberNotesNormal)
-
-        tuplet_index += 1
+def annotate_tuplet(state: tuple | None, signature: tuple) -> tuple:
+    """
+    Tuplet fields of the next tuplet note of a part: signature is its (measure,
+    beat index, voice index, actual, normal), state the (tuplet id, active
+    signature, index) left by the part's earlier tuplet notes (None at the start).
+    Returns ((tuplet_id, tuplet_index, actual, normal, tuplet_class), new state).
+    """
+    current_tuplet_id, active_signature, tuplet_index = state or (0, None, 0)
+
+    if signature != active_signature:
+        current_tuplet_id += 1
+        active_signature = signature
+        tuplet_index = 0
+
+    actual, normal = signature[3], signature[4]
+    fields = (current_tuplet_id, tuplet_index, actual, normal, get_tuplet_class(actual, normal))
+    return fields, (current_tuplet_id, active_signature, tuplet_index + 1)
 
 def check_syncopation(dur, offset):
     # return remainder, if any, and if syncopation exists for given note length and offset
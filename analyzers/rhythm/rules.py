@@ -2,10 +2,11 @@ from __future__ import annotations
 
 from pathlib import Path
 from functools import lru_cache
+import numpy as np
 import pandas as pd
 
-from app_data import GRADES
-from models import RhythmGradeRules
+from app_data import GRADES, RHYTHM_TOKEN_MAP
+from models import RhythmGradeRules, RhythmRuleMatrix
 
 TUPLET_CLASS_ORDER = {
     "none": 0,
@@ -14,6 +15,15 @@ TUPLET_CLASS_ORDER = {
     "complex": 3,
 }
 
+# column layout of RhythmRuleMatrix.values
+RHYTHM_RULE_COLUMNS = (
+    "allow_dotted",
+    "allow_syncopation",
+    "max_subdivision",
+    "allow_tuplet",
+    *(f"tuplet_{name}" for name in sorted(TUPLET_CLASS_ORDER, key=TUPLET_CLASS_ORDER.get)),
+)
+
 # module cache (so we only read CSVs once per process)
 _CACHED_RULES: dict[float, RhythmGradeRules] | None = None
 
@@ -104,3 +114,30 @@ def load_rhythm_rules(data_dir: str = "data/rhythm") -> dict[float, RhythmGradeR
 
     _CACHED_RULES = reconcile_rhythm_rules(*rulesets)
     return _CACHED_RULES
+
+
+def build_rhythm_rule_matrix(rules: dict[float, RhythmGradeRules]) -> RhythmRuleMatrix:
+    """
+    Packs a grade->rules dict into a grade x rule matrix. max_subdivision holds the
+    quarter length that rule_subdivision compares against.
+    """
+    grades = tuple(sorted(rules))
+    values = np.zeros((len(grades), len(RHYTHM_RULE_COLUMNS)), dtype=float)
+
+    for row, grade in enumerate(grades):
+        r = rules[grade]
+        values[row, :4] = (
+            r.allow_dotted,
+            r.allow_syncopation,
+            RHYTHM_TOKEN_MAP.get(r.max_subdivision, {}).get("duration", 0),
+            r.allow_tuplet,
+        )
+        for name in r.allowed_tuplet_classes:
+            values[row, RHYTHM_RULE_COLUMNS.index(f"tuplet_{name}")] = 1.0
+
+    return RhythmRuleMatrix(grades=grades, columns=RHYTHM_RULE_COLUMNS, values=values)
+
+
+@lru_cache(maxsize=2)
+def load_rhythm_rule_matrix(data_dir: str = "data/rhythm") -> RhythmRuleMatrix:
+    return build_rhythm_rule_matrix(load_rhythm_rules(data_dir))
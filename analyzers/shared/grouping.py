@@ -1,7 +1,7 @@
-from models import PartialNoteData
+from models import NoteTable
 from collections import defaultdict
 
-def group_notes_by_beat(notes: list[PartialNoteData]):
+def group_notes_by_beat(notes: NoteTable):
     groups = defaultdict(list)
     for n in notes:
         if n.rhythm_token is None:
@@ -0,0 +1,449 @@
+# shared/incremental.py
+from __future__ import annotations
+
+from bisect import bisect_right
+
+from analyzers.articulation.articulation import (
+    ArticulationAnalyzer,
+    articulated_events,
+    build_measure_articulation_notes,
+    load_articulation_rules,
+)
+from analyzers.availability.availability import run_availability
+from analyzers.dynamics import run_dynamics
+from analyzers.key_range.analyzer import make_key_range_analyzer
+from analyzers.key_range.extract import extract_key_segments, extract_measure_notes, missing_range_comment
+from analyzers.meter import run_meter
+from analyzers.rhythm.analyzer import build_measure_rhythm_notes, rhythm_part_confidence, score_rhythm_notes
+from analyzers.rhythm.curve import pack_rhythm_features, rhythm_confidence_curve, stack_rhythm_features
+from analyzers.rhythm.rules import load_rhythm_rule_matrix, load_rhythm_rules
+from analyzers.tempo_duration import run_tempo_duration
+from data_processing import derive_observed_grades
+from models import MeasureAnalysis, NoteTable, PartAnalysis
+from utilities import get_closest_grade, get_rounded_grade, span
+from utilities.note_reconciler import NoteReconciler
+
+
+# ----------------------------
+# score-level analyzers
+# ----------------------------
+
+def _last_measure_number(score):
+    measures = score.parts[0].measures
+    return measures[-1].number if measures else None
+
+
+def _meter_signature(score):
+    # what extract_meter_segments reads: where part 0's meter changes, and its length
+    change_points = []
+    prev_ratio = None
+    for idx, m in enumerate(score.parts[0].measures):
+        ratio = m.time_signature.ratio if m.time_signature else "4/4"
+        if ratio != prev_ratio:
+            change_points.append((idx, m.number, ratio))
+            prev_ratio = ratio
+    return tuple(change_points), len(score.parts[0].measures)
+
+
+# analyzers that read only these parts of the IR; a new version whose signature
+# matches the previous one's keeps the previous result
+SEGMENT_ANALYZERS = {
+    "dynamics": (
+        run_dynamics,
+        lambda score: (len(score.parts[0].measures), tuple((p.name, p.dynamics, p.highest_time) for p in score.parts)),
+    ),
+    "availability": (run_availability, lambda score: tuple(p.name for p in score.parts)),
+    "tempo_duration": (run_tempo_duration, lambda score: (score.tempo_marks, _last_measure_number(score))),
+    "meter": (run_meter, _meter_signature),
+}
+
+
+def key_signature(score):
+    """What the key segments are built from."""
+    return score.key_signatures, _last_measure_number(score)
+
+
+def has_unique_part_names(score) -> bool:
+    """
+    Whether no two parts can share a reconciliation key. Rows of different
+    parts that did would be merged across parts, which per-part reuse cannot follow.
+    """
+    names = [{p.name or "Unknown", p.name or "Unknown Part"} for p in score.parts]
+    return len(set().union(*names)) == sum(len(n) for n in names) if names else True
+
+
+# ----------------------------
+# note analyzers, measure by measure
+# ----------------------------
+
+class MeasureAnalyzers:
+    """
+    The key/range, articulation and rhythm target passes (and their grade-invariant
+    features) run one measure at a time, so a new version of a score only redoes
+    the measures that changed. Results match run_key_range, run_articulation and
+    run_rhythm on the whole score.
+    """
+
+    def __init__(self, target_grade: float, analysis_options):
+        self.target_grade = target_grade
+        self.options = analysis_options
+        rules = load_rhythm_rules()
+        rule_grade = get_closest_grade(target_grade, rules.keys())
+        self.rhythm_rules = rules.get(rule_grade) if rule_grade is not None else None
+        self.articulation_rules = load_articulation_rules()
+        self.key_range = make_key_range_analyzer(analysis_options.string_only)
+        self.range_grade = float(get_rounded_grade(target_grade))
+        self.features = analysis_options.run_observed
+        self.stats = {"measures": 0, "rebuilt": 0, "parts_rebuilt": 0}
+
+    # --- one measure ---
+
+    def _build(self, part, m, ts, key_segment, key_quality, tuplets_in) -> MeasureAnalysis:
+        range_name = part.name or "Unknown Part"
+        target_grade = self.target_grade
+
+        range_notes = extract_measure_notes(m, range_name, target_grade, key_segment)
+        comment = missing_range_comment(range_name, self.key_range.rules, get_rounded_grade(target_grade))
+        if comment is not None:
+            for row in range(len(range_notes)):
+                range_notes.add_comment(row, "Range", comment)
+        range_features = None
+        canonical = self.key_range.range_instrument(range_name)
+        if self.features and canonical is not None:
+            range_features = self.key_range.pack_range_features([(canonical, range_notes)], key_quality)
+        bounds = self.key_range.range_bounds(range_name, self.range_grade)
+        range_terms = None
+        if bounds is not None:
+            range_terms = self.key_range.score_range_notes(range_notes, bounds, target_grade, key_quality)
+
+        articulation_notes, articulation_terms = build_measure_articulation_notes(
+            m, part.name or "Unknown Part", self.articulation_rules, target_grade
+        )
+
+        rhythm_notes, tuplets_out = NoteTable(part.name or "Unknown", target_grade), tuplets_in
+        if ts is not None:
+            rhythm_notes, tuplets_out = build_measure_rhythm_notes(m, ts, part.name or "Unknown", target_grade, tuplets_in)
+        rhythm_features = None
+        if self.features:
+            rhythm_features = pack_rhythm_features([rhythm_notes])
+        rhythm_terms = []
+        if self.rhythm_rules is not None:
+            rhythm_terms = score_rhythm_notes(rhythm_notes, self.rhythm_rules, target_grade)
+
+        self.stats["rebuilt"] += 1
+        return MeasureAnalysis(
+            measure=m,
+            time_signature=ts,
+            local_key=key_segment.pitch_index if key_segment is not None else None,
+            key_quality=key_quality,
+            tuplets_in=tuplets_in,
+            tuplets_out=tuplets_out,
+            range_notes=range_notes,
+            articulation_notes=articulation_notes,
+            rhythm_notes=rhythm_notes,
+            range_terms=range_terms,
+            articulation_terms=articulation_terms,
+            rhythm_terms=rhythm_terms,
+            articulation_features=[(n.articulations, float(n.duration)) for n in articulated_events(m)],
+            range_features=range_features,
+            rhythm_features=rhythm_features,
+        )
+
+    def _reconcile(self, unit: list[MeasureAnalysis]) -> None:
+        # the engine reconciles range, then articulation, then rhythm rows; rows only
+        # ever share a key within one measure number of one part
+        reconciler = NoteReconciler()
+        reconciler.extend(ma.range_notes for ma in unit)
+        reconciler.extend(ma.articulation_notes for ma in unit)
+        if self.rhythm_rules is not None:
+            reconciler.extend(ma.rhythm_notes for ma in unit)
+        # coalescing mutates the first row of each key group in place
+        reconciler.finalize()
+
+    # --- one part ---
+
+    def analyze_part(self, part, key_segments, key_quality, previous: PartAnalysis | None) -> PartAnalysis:
+        starts = [k.measure for k in key_segments]
+        reusable = {}
+        if previous is not None:
+            seen = {}
+            for ma in previous.measures:
+                occurrence = seen[ma.measure.number] = seen.get(ma.measure.number, -1) + 1
+                reusable[(ma.measure.number, occurrence)] = ma
+
+        entries = []  # [analysis, key segment, incoming tuplet state, rebuilt]
+        dirty = set()
+        seen = {}
+        ts = None
+        tuplets = None
+        for m in part.measures:
+            ts = m.time_signature or m.local_time_signature or ts
+            i = bisect_right(starts, m.number) - 1
+            key_segment = key_segments[i] if i >= 0 else None
+            local_key = key_segment.pitch_index if key_segment is not None else None
+            occurrence = seen[m.number] = seen.get(m.number, -1) + 1
+
+            ma = reusable.get((m.number, occurrence))
+            rebuilt = ma is None or not (
+                (ma.measure is m or ma.measure == m)
+                and ma.time_signature == ts
+                and ma.local_key == local_key
+                and ma.key_quality == key_quality
+                and (not ma.uses_tuplets or ma.tuplets_in == tuplets)
+            )
+            if rebuilt:
+                ma = self._build(part, m, ts, key_segment, key_quality, tuplets)
+                dirty.add(m.number)
+            entries.append([ma, key_segment, tuplets, rebuilt])
+            if ma.uses_tuplets:
+                tuplets = ma.tuplets_out
+        self.stats["measures"] += len(entries)
+
+        if (
+            previous is not None
+            and len(entries) == len(previous.measures)
+            and all(entry[0] is ma for entry, ma in zip(entries, previous.measures))
+        ):
+            return previous
+
+        # a measure reused next to a rebuilt one of the same number was reconciled with
+        # rows that are gone; rebuild it too, then reconcile each touched number
+        units = {}
+        for entry in entries:
+            ma, key_segment, tuplets_in, rebuilt = entry
+            if ma.measure.number not in dirty:
+                continue
+            if not rebuilt:
+                ma = entry[0] = self._build(part, ma.measure, ma.time_signature, key_segment, key_quality, tuplets_in)
+            units.setdefault(ma.measure.number, []).append(ma)
+        for unit in units.values():
+            self._reconcile(unit)
+
+        self.stats["parts_rebuilt"] += 1
+        return self._part(part, [entry[0] for entry in entries], key_quality)
+
+    def _part(self, part, measures: list[MeasureAnalysis], key_quality) -> PartAnalysis:
+        weighted = total = 0.0
+        for ma in measures:
+            for conf, dur in ma.articulation_terms:
+                weighted += conf * dur
+                total += dur
+
+        range_features = rhythm_features = None
+        if self.features:
+            rhythm_features = stack_rhythm_features([[ma.rhythm_features for ma in measures]])
+            if self.key_range.range_instrument(part.name or "Unknown Part") is not None:
+                range_features = self.key_range.stack_range_features([ma.range_features for ma in measures], key_quality)
+
+        return PartAnalysis(
+            name=part.name,
+            measures=measures,
+            articulation_totals=(weighted, total),
+            rhythm_confidence=rhythm_part_confidence(t for ma in measures for t in ma.rhythm_terms),
+            range_features=range_features,
+            rhythm_features=rhythm_features,
+        )
+
+    # --- whole score ---
+
+    def analyze(self, score, previous_parts: dict | None, previous_key=None, *, curve_cache=None, progress_bar=None):
+        """
+        Returns ({"key_range", "articulation", "rhythm"} results, {part name: PartAnalysis},
+        key state). previous_key is the key state of the previous version, reused
+        while its key signatures are unchanged.
+        """
+        target_grade = self.target_grade
+        signature = key_signature(score)
+        if previous_key is not None and previous_key["signature"] == signature:
+            key_state = previous_key
+        else:
+            key_segments = extract_key_segments(score, target_grade)
+            self.key_range.score_key_segments(key_segments, target_grade)
+            key_state = {"signature": signature, "key_segments": key_segments, "observed": None}
+        key_segments = key_state["key_segments"]
+        key_quality = key_segments[-1].quality if key_segments else "major"
+
+        parts = {}
+        with span("measures") as measures_span:
+            for part in score.parts:
+                previous = previous_parts.get(part.name) if previous_parts else None
+                parts[part.name] = self.analyze_part(part, key_segments, key_quality, previous)
+            measures_span.set(**self.stats)
+
+        return self._results(score, parts, key_state, key_quality, curve_cache, progress_bar), parts, key_state
+
+    def _observed(self, score, name, progress_cb, curve_cache, **kwargs):
+        if not self.options.run_observed:
+            return None, {}
+        grades = self.options.observed_grades
+        if grades is not None:
+            kwargs["grades"] = grades
+        return derive_observed_grades(
+            score=score,
+            progress_cb=progress_cb(name) if progress_cb is not None else None,
+            curve_cache=curve_cache,
+            **kwargs,
+        )
+
+    def _results(self, score, parts: dict[str, PartAnalysis], key_state, key_quality, curve_cache, progress_bar):
+        target_grade = self.target_grade
+        string_only = self.options.string_only
+        results = {}
+        range_notes, articulation_notes, rhythm_notes = (
+            {name: p.notes(attr, p.name or default, target_grade) for name, p in parts.items()}
+            for attr, default in (
+                ("range_notes", "Unknown Part"),
+                ("articulation_notes", "Unknown Part"),
+                ("rhythm_notes", "Unknown"),
+            )
+        )
+
+        # key / range
+        with span("key_range", analyzer="key_range"):
+            observed_range, curve_range = None, {}
+            if self.options.run_observed:
+                range_features = self.key_range.stack_range_features(
+                    [p.range_features for p in parts.values() if p.range_features is not None], key_quality
+                )
+                features = (extract_key_segments(score, None), range_features)
+
+                def progress(label):
+                    if progress_bar is None:
+                        return None
+                    bar = progress_bar("key_range")
+                    return lambda grade, idx, total: bar(grade, idx, total, label)
+
+                observed_range, curve_range = self._observed(
+                    score,
+                    "range",
+                    progress,
+                    curve_cache,
+                    extract_features=lambda _: features,
+                    analyze_curve=self.key_range.score_curve_range,
+                    curve_key=("key_range", "range", string_only),
+                )
+                if key_state["observed"] is None:
+                    key_state["observed"] = self._observed(
+                        score,
+                        "key",
+                        progress,
+                        curve_cache,
+                        extract_features=lambda _: features,
+                        analyze_confidence=self.key_range.score_grade_key,
+                        curve_key=("key_range", "key", string_only),
+                    )
+            observed_key, conf_curve_key = key_state["observed"] or (None, {})
+
+            global_total_conf = 0.0
+            global_total_exposure = 0.0
+            for p in parts.values():
+                for ma in p.measures:
+                    for weighted, exposure in ma.range_terms or ():
+                        global_total_conf += weighted
+                        global_total_exposure += exposure
+
+            key_segments = key_state["key_segments"]
+            results["key_range"] = {
+                "observed_grade_range": observed_range,
+                "confidence_range": curve_range,
+                "observed_grade_key": observed_key,
+                "confidence_key": conf_curve_key,
+                "analysis_notes": {
+                    "key_data": key_segments,
+                    "range_data": {
+                        (p.name or "Unknown Part"): {"Note Data": range_notes[name]} for name, p in parts.items()
+                    },
+                },
+                "summary": {
+                    "target_grade": target_grade,
+                    "overall_range_confidence": (
+                        (global_total_conf / global_total_exposure) if global_total_exposure else 0.0
+                    ),
+                    "overall_key_confidence": (
+                        sum((k.confidence or 0.0) * (k.exposure or 0.0) for k in key_segments)
+                        if key_segments else 0.0
+                    ),
+                },
+            }
+
+        # articulation
+        with span("articulation", analyzer="articulation"):
+            durations = {}
+            for p in parts.values():
+                for ma in p.measures:
+                    for articulations, d in ma.articulation_features:
+                        durations[articulations] = durations.get(articulations, 0.0) + d
+            observed, confidences = self._observed(
+                score,
+                "articulation",
+                progress_bar,
+                curve_cache,
+                extract_features=lambda _: durations,
+                analyze_confidence=ArticulationAnalyzer(self.articulation_rules).score_grade,
+                curve_key=("articulation",),
+            )
+
+            analysis_notes = {}
+            overall_weighted = overall_total = 0.0
+            for name, p in parts.items():
+                weighted, total = p.articulation_totals
+                analysis_notes[p.name or "Unknown Part"] = {
+                    "articulation_data": articulation_notes[name],
+                    "articulation_confidence": (weighted / total) if total > 0 else None,
+                }
+                if total > 0:
+                    overall_weighted += weighted
+                    overall_total += total
+            results["articulation"] = {
+                "observed_grade": observed,
+                "confidences": confidences,
+                "analysis_notes": analysis_notes,
+                "overall_confidence": (overall_weighted / overall_total) if overall_total > 0 else None,
+            }
+
+        # rhythm
+        with span("rhythm", analyzer="rhythm"):
+            rhythm_features = None
+            if self.options.run_observed:
+                rhythm_features = stack_rhythm_features([[p.rhythm_features] for p in parts.values()])
+            rule_matrix = load_rhythm_rule_matrix()
+            observed, confidences = self._observed(
+                score,
+                "rhythm",
+                progress_bar,
+                curve_cache,
+                extract_features=lambda _: rhythm_features,
+                analyze_curve=lambda features, gs: rhythm_confidence_curve(features, rule_matrix, gs),
+                curve_key=("rhythm",),
+            )
+
+            analysis_notes = {}
+            overall_conf = None
+            if self.rhythm_rules is not None:
+                part_confs = []
+                for name, p in parts.items():
+                    analysis_notes[p.name or "Unknown"] = {
+                        "note_data": rhythm_notes[name],
+                        "rhythm_confidence": p.rhythm_confidence,
+                    }
+                    if p.rhythm_confidence is not None:
+                        part_confs.append(p.rhythm_confidence)
+                overall_conf = (sum(part_confs) / len(part_confs)) if part_confs else None
+            results["rhythm"] = {
+                "observed_grade": observed,
+                "confidences": confidences,
+                "analysis_notes": analysis_notes,
+                "overall_confidence": overall_conf,
+            }
+
+        # the stored rows are already reconciled; joining them again collects the merged rows
+        if self.options.reconciled_notes:
+            with span("reconcile"):
+                reconciler = NoteReconciler()
+                reconciler.extend(range_notes.values())
+                reconciler.extend(articulation_notes.values())
+                if self.rhythm_rules is not None:
+                    reconciler.extend(rhythm_notes.values())
+                results["reconciled_notes"] = reconciler.notes
+
+        return results
@@ -0,0 +1,710 @@
+# shared/musicxml_reader.py
+from __future__ import annotations
+
+import hashlib
+import io
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+
+from music21 import common, duration as m21duration, dynamics, meter as m21meter, pitch, tempo
+from music21.common.numberTools import opFrac
+from music21.musicxml import xmlObjects
+from music21.musicxml.xmlToM21 import MeasureParser, PartParser
+
+from models import DynamicMarkIR, KeySignatureIR, MeasureIR, NoteEvent, PartIR, ScoreIR, TempoMarkIR, TimeSignatureIR
+from utilities import normalize_key_name
+
+from analyzers.shared.score_ir import DYNAMIC_TOKENS, _beat_unit, _quarter_bpm, _sounding_pitch, _time_signature_ir
+
+# articulation names by MusicXML tag, as music21 would name the objects it creates
+_TECHNICAL_NAMES = {tag: cls().name for tag, cls in xmlObjects.TECHNICAL_MARKS.items()}
+_ARTICULATION_NAMES = {tag: cls().name for tag, cls in xmlObjects.ARTICULATION_MARKS.items()}
+# chords keep one articulation of each kind, except these
+_REPEATABLE_TECHNICAL = {"fingering", "string", "fret"}
+
+_DIRECTION_MARKERS = {"coda", "segno", "rehearsal", "pedal"}
+
+
+class UnsupportedMusicXML(ValueError):
+    """Raised for MusicXML the streaming reader does not reproduce; callers fall back to music21."""
+
+
+def _text(el) -> str:
+    if el is None or el.text is None:
+        return ""
+    return el.text.strip()
+
+
+@dataclass
+class _Event:
+    offset: float
+    duration: object  # music21 Duration, mutable until the measure is finished
+    index: int
+    is_rest: bool = False
+    is_chord: bool = False
+    is_note: bool = False
+    chord_size: int | None = None
+    pitch: object = None
+    articulations: tuple[str, ...] = ()
+    full_measure: bool = False
+
+
+@dataclass
+class _PartState:
+    name: str | None
+    transposition: object
+    helper: MeasureParser
+    transposed: bool = False
+    first_measure_parsed: bool = False
+    last_ts: object = None            # TimeSignature at offset 0 of the latest measure that had one
+    context_ts: object = None         # latest TimeSignature anywhere in an earlier measure
+    measure_offset: float = 0.0
+    highest_time: float = 0.0
+    measures: list = field(default_factory=list)
+    dynamics: list = field(default_factory=list)
+    text_dynamics: list = field(default_factory=list)
+    tempo_marks: list = field(default_factory=list)
+    key_signatures: list = field(default_factory=list)  # (part offset, measure number, KeySignature)
+    instruments: list = field(default_factory=list)     # (part offset, transposition)
+
+
+def read_score_ir(score_path: str) -> ScoreIR:
+    """
+    Builds a ScoreIR straight from the MusicXML with iterparse, one <measure> at a
+    time, clearing each element once it is read. Produces the same IR as
+    build_score_ir(converter.parse(score_path)); raises UnsupportedMusicXML for
+    files that use features it does not reproduce.
+    """
+    return _read_score(score_path)
+
+
+def read_score_ir_incremental(score_path: str, memo: dict | None = None) -> tuple[ScoreIR, dict, int]:
+    """
+    read_score_ir for a new version of a score: measures whose bytes and incoming
+    part state (divisions, meter, transposition) match the previous version are
+    replayed from memo instead of parsed. Pass the memo returned for the previous
+    version. Returns the IR, the memo for this version and the replayed count.
+    """
+    with open(score_path, "rb") as fh:
+        data = fh.read()
+    spans = [match.span() for match in _MEASURE_RE.finditer(data)]
+    digests = [hashlib.blake2b(data[start:end], digest_size=16).digest() for start, end in spans]
+    known = {digest for digest, _ in memo} if memo else set()
+
+    # every measure is tagged with its index; known ones are left out of the parse
+    # and read from the original bytes only if their part state has changed
+    pieces = []
+    placeholders = set()
+    pos = 0
+    for k, (start, end) in enumerate(spans):
+        pieces.append(data[pos:start])
+        chunk = data[start:end]
+        tag = b' %s="%d"' % (_MEMO_ATTR.encode(), k)
+        if digests[k] in known and not any(marker in chunk for marker in (b"<!--", b"-->", b"<![CDATA[")):
+            placeholders.add(k)
+            pieces.append(b"<measure" + tag + b"/>")
+        else:
+            pieces.append(chunk[:8] + tag + chunk[8:])
+        pos = end
+    pieces.append(data[pos:])
+
+    new_memo = {}
+    replayed = 0
+
+    def read_measure(state, mx, finale):
+        nonlocal replayed
+        k = mx.get(_MEMO_ATTR)
+        if k is None:
+            _apply_measure(state, _parse_measure(state, mx, finale=finale))
+            return
+        k = int(k)
+        key = (digests[k], _state_key(state, finale))
+        record = memo.get(key) if memo else None
+        if record is None:
+            if k in placeholders:
+                start, end = spans[k]
+                mx = ET.fromstring(data[start:end])
+            record = _parse_measure(state, mx, finale=finale)
+        else:
+            replayed += 1
+        _apply_measure(state, record)
+        new_memo[key] = record
+
+    ir = _read_score(io.BytesIO(b"".join(pieces)), read_measure)
+    return ir, new_memo, replayed
+
+
+_MEMO_ATTR = "_measure_index"
+# a <measure> element with its content; "<" cannot appear in attribute values or text
+_MEASURE_RE = re.compile(rb"<measure(?=[\s/>])[^>]*?(?:/>|>.*?</measure\s*>)", re.S)
+
+
+def _read_score(source, read_measure=None) -> ScoreIR:
+    if read_measure is None:
+        read_measure = _read_measure
+    score_parts = {}
+    parts = []
+    key_signatures = ()
+    tempo_marks = ()
+    finale = None
+    state = None
+    depth = 0
+
+    for event, el in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if depth == 1 and el.tag != "score-partwise":
+                raise UnsupportedMusicXML(f"unsupported root element <{el.tag}>")
+            if depth == 2 and el.tag == "part":
+                score_part = score_parts.get(el.get("id"))
+                if score_part is None:
+                    raise UnsupportedMusicXML(f"part {el.get('id')!r} has no <score-part>")
+                state = _start_part(score_part)
+            continue
+
+        depth -= 1
+        if el.tag == "software" and finale is None and _text(el):
+            finale = "Finale" in _text(el)
+        elif el.tag == "score-part" and depth == 2:
+            score_parts[el.get("id")] = el
+        elif el.tag == "measure" and depth == 2 and state is not None:
+            read_measure(state, el, bool(finale))
+            el.clear()
+        elif el.tag == "part" and depth == 1 and state is not None:
+            if not parts:
+                key_signatures = _finish_key_signatures(state)
+                tempo_marks = tuple(state.tempo_marks)
+            parts.append(
+                PartIR(
+                    name=state.name,
+                    measures=tuple(state.measures),
+                    dynamics=tuple(state.dynamics + state.text_dynamics),
+                    highest_time=state.highest_time,
+                )
+            )
+            state = None
+            el.clear()
+
+    return ScoreIR(parts=tuple(parts), key_signatures=key_signatures, tempo_marks=tempo_marks)
+
+
+# ----------------------------
+# parts
+# ----------------------------
+
+def _start_part(score_part) -> _PartState:
+    # music21's own <score-part> handling picks the instrument, and with it the initial transposition
+    part_parser = PartParser(mxScorePart=score_part)
+    part_parser.parseXmlScorePart()
+    transposition = part_parser.activeInstrument.transposition
+    return _PartState(
+        name=part_parser.stream.partName,
+        transposition=transposition,
+        helper=MeasureParser(parent=part_parser),
+        instruments=[(0.0, transposition)],
+    )
+
+
+def _update_transposition(state: _PartState, transposition) -> None:
+    if state.transposition is None and not state.first_measure_parsed:
+        state.instruments[-1] = (state.instruments[-1][0], transposition)
+    elif state.transposition != transposition:
+        state.instruments.append((state.measure_offset, transposition))
+    state.transposition = transposition
+    state.transposed = True
+
+
+def _finish_key_signatures(state: _PartState) -> tuple[KeySignatureIR, ...]:
+    signatures = []
+    for offset, number, ks in state.key_signatures:
+        if state.transposed:
+            trans = _transposition_at(state, offset)
+            if trans is not None:
+                # a copy: memoized measures hand the same KeySignature to later reads
+                ks = ks.transpose(trans)
+        signatures.append(
+            KeySignatureIR(
+                measure=number,
+                tonic=normalize_key_name(ks.tonicPitchNameWithCase).capitalize(),
+                quality=ks.type,
+            )
+        )
+    return tuple(signatures)
+
+
+def _transposition_at(state: _PartState, offset):
+    # each instrument spans up to the next one; the last one up to the end of the part
+    for i, (start, trans) in enumerate(state.instruments):
+        end = state.instruments[i + 1][0] if i + 1 < len(state.instruments) else state.highest_time
+        if start <= offset < end:
+            return trans
+    return None
+
+
+# ----------------------------
+# measures
+# ----------------------------
+
+def _measure_number(mx) -> int:
+    raw = mx.get("number")
+    if raw is None:
+        return 0
+    number, suffix = common.getNumFromStr(raw)
+    if suffix == "X":
+        raise UnsupportedMusicXML("Finale-style unnumbered measures")
+    return int(number) if number not in (None, "") else 0
+
+
+@dataclass
+class _MeasureRecord:
+    """Everything one <measure> contributes to its part, given the part state it was read in."""
+    measure: MeasureIR
+    divisions: float
+    transposition: object                # the measure's own <transpose>, if any
+    last_ts: object                      # TimeSignature the part continues with; None: unchanged
+    context_ts: TimeSignatureIR | None   # None: unchanged
+    highest: float
+    shift: float
+    dynamics: tuple                      # (offset in the measure, value)
+    text_dynamics: tuple
+    tempo_marks: tuple
+    key_signatures: tuple                # (offset in the measure, KeySignature)
+
+
+def _state_key(state: _PartState, finale: bool) -> tuple:
+    """The part state a measure's record depends on."""
+    last_ts = state.last_ts
+    transposition = state.transposition
+    return (
+        state.helper.divisions,
+        last_ts.barDuration.quarterLength if last_ts is not None else None,
+        state.context_ts,
+        transposition.directedName if transposition is not None else None,
+        finale,
+    )
+
+
+def _read_measure(state: _PartState, mx, finale: bool) -> None:
+    _apply_measure(state, _parse_measure(state, mx, finale=finale))
+
+
+def _apply_measure(state: _PartState, record: _MeasureRecord) -> None:
+    # --- what PartParser does once the measure is parsed ---
+    state.helper.divisions = record.divisions
+    if record.transposition is not None:
+        _update_transposition(state, record.transposition)
+    state.first_measure_parsed = True
+    if record.last_ts is not None:
+        state.last_ts = record.last_ts
+
+    measure_offset = state.measure_offset
+    state.highest_time = max(state.highest_time, opFrac(measure_offset + record.highest))
+    state.measure_offset = opFrac(measure_offset + record.shift)
+    state.measures.append(record.measure)
+    if record.context_ts is not None:
+        state.context_ts = record.context_ts
+
+    number = record.measure.number
+    for off, value in record.dynamics:
+        state.dynamics.append(DynamicMarkIR(value=value, offset=opFrac(measure_offset + off), measure=number))
+    for off, value in record.text_dynamics:
+        state.text_dynamics.append(DynamicMarkIR(value=value, offset=opFrac(measure_offset + off), measure=number))
+    state.tempo_marks.extend(record.tempo_marks)
+    for off, ks in record.key_signatures:
+        state.key_signatures.append((opFrac(measure_offset + off), number, ks))
+
+
+def _parse_measure(state: _PartState, mx, *, finale: bool) -> _MeasureRecord:
+    """Reads one <measure> against the part state without changing the state (divisions aside)."""
+    helper = state.helper
+    number = _measure_number(mx)
+
+    voice_ids = set()
+    for tag in ("note", "forward"):
+        for child in mx.findall(tag):
+            if vid := _text(child.find("voice")):
+                voice_ids.add(vid)
+    use_voices = len(voice_ids) > 1
+    voices = {vid: [] for vid in sorted(voice_ids)} if use_voices else {}
+    direct: list[_Event] = []
+
+    offset = 0.0
+    markers = [0.0] if mx.find("print") is not None else []
+    time_signatures = []  # (offset, index, TimeSignature)
+    key_signatures = []
+    dynamic_marks = []
+    text_marks = []
+    tempo_marks = []
+    transposition = None
+    counts = {"rest": 0, "note": 0}
+    full_measure_rest = False
+    pending = []
+    last_voice = None
+    index = 0
+
+    def insert(mx_note, ev):
+        nonlocal last_voice
+        if not use_voices:
+            direct.append(ev)
+            return
+        vid = _text(mx_note.find("voice"))
+        if vid:
+            last_voice = _voice_key(vid)
+            use = vid
+        else:
+            use = last_voice if last_voice is not None else 1
+        target = voices.get(str(use))
+        (target if target is not None else direct).append(ev)
+
+    children = list(mx)
+    for i, child in enumerate(children):
+        tag = child.tag
+        if tag == "note":
+            following = children[i + 1] if i + 1 < len(children) else None
+            next_is_chord = following is not None and following.tag == "note" and following.find("chord") is not None
+            is_rest = child.find("rest") is not None
+            is_chord = child.find("chord") is not None or next_is_chord
+            if next_is_chord and (vid := child.find("voice")) is not None:
+                last_voice = _voice_key(vid.text)
+
+            increment = 0.0
+            if is_chord:
+                pending.append(child)
+            else:
+                if is_rest:
+                    counts["rest"] += 1
+                    ev = _rest_event(helper, child, offset, index)
+                    full_measure_rest = full_measure_rest or ev.full_measure
+                else:
+                    counts["note"] += 1
+                    ev = _note_event(helper, child, offset, index)
+                index += 1
+                insert(child, ev)
+                increment = ev.duration.quarterLength
+
+            if pending and not next_is_chord:
+                ev = _chord_event(helper, pending, offset, index)
+                index += 1
+                anchor = next((p for p in pending if p.find("voice") is not None), child)
+                insert(anchor, ev)
+                increment = ev.duration.quarterLength
+                pending = []
+
+            offset = opFrac(offset + increment)
+
+        elif tag == "backup":
+            if text := _text(child.find("duration")):
+                offset = max(opFrac(offset - float(text) / helper.divisions), 0.0)
+
+        elif tag == "forward":
+            if finale:
+                raise UnsupportedMusicXML("Finale <forward> spacer rests")
+            if text := _text(child.find("duration")):
+                offset = opFrac(offset + opFrac(float(text) / helper.divisions))
+
+        elif tag == "attributes":
+            for sub in child:
+                if sub.tag == "divisions":
+                    helper.divisions = opFrac(float(sub.text))
+                elif sub.tag == "staves":
+                    if int(sub.text) > 1:
+                        raise UnsupportedMusicXML("multi-staff parts")
+                elif sub.tag == "transpose":
+                    transposition = helper.xmlTransposeToInterval(sub)
+                elif sub.tag == "time":
+                    time_signatures.append((offset, len(time_signatures), helper.xmlToTimeSignature(sub)))
+                    markers.append(offset)
+                elif sub.tag == "key":
+                    key_signatures.append((offset, helper.xmlToKeySignature(sub)))
+                    markers.append(offset)
+                elif sub.tag in ("clef", "staff-details"):
+                    markers.append(offset)
+                elif sub.tag == "measure-style" and sub.find("multiple-rest") is not None:
+                    raise UnsupportedMusicXML("multi-measure rests")
+
+        elif tag == "direction":
+            total = opFrac(float(helper.xmlToOffset(child) + offset))
+            metronome = False
+            for direction_type in child.findall("direction-type"):
+                for item in direction_type:
+                    if item.tag == "dynamics":
+                        for dyn in item:
+                            name = dyn.tag
+                            if name == "other-dynamic" and dyn.text:
+                                name = dyn.text.strip()
+                            dynamic_marks.append((total, _dynamic_value(name)))
+                            markers.append(total)
+                    elif item.tag == "words":
+                        token = _text(item).lower()
+                        if token in DYNAMIC_TOKENS:
+                            text_marks.append((total, token))
+                        markers.append(total)
+                    elif item.tag == "metronome":
+                        metronome = True
+                        tempo_marks.append((total, helper.xmlToTempoIndication(item)))
+                        markers.append(total)
+                    elif item.tag in _DIRECTION_MARKERS:
+                        markers.append(total)
+            if not metronome and any("tempo" in s.attrib for s in child.findall("sound")):
+                markers.append(total)
+
+        elif tag == "sound":
+            if "tempo" in child.attrib:
+                markers.append(opFrac(helper.xmlToOffset(child) + offset))
+
+        elif tag == "harmony":
+            raise UnsupportedMusicXML("chord symbols")
+
+    if counts["rest"] == 1 and counts["note"] == 0:
+        full_measure_rest = True
+
+    if transposition is not None:
+        interval = transposition
+    else:
+        interval = state.transposition
+
+    time_signatures.sort(key=lambda item: (item[0], item[1]))
+    at_zero = [ts for off, _, ts in time_signatures if off == 0]
+    if at_zero:
+        last_ts = at_zero[0]
+    elif state.last_ts is None:
+        last_ts = m21meter.TimeSignature("4/4")
+    else:
+        last_ts = state.last_ts
+    bar_length = last_ts.barDuration.quarterLength
+
+    if full_measure_rest:
+        rest = _first_rest(direct, list(voices.values()))
+        d = rest.duration
+        if rest.full_measure or (
+            d.quarterLength != bar_length and d.type in ("whole", "breve") and d.dots == 0 and not d.tuplets
+        ):
+            d.quarterLength = bar_length
+            rest.full_measure = True
+
+    highest = max(
+        [ev.offset + ev.duration.quarterLength for ev in direct]
+        + [_voice_highest_time(events) for events in voices.values()]
+        + markers,
+        default=0.0,
+    )
+
+    # --- PartParser.adjustTimeAttributesFromMeasure ---
+    if highest == bar_length:
+        shift = highest
+    elif highest > bar_length:
+        diff = highest - bar_length
+        tol = 1e-6
+        if diff > 0.5 or common.nearestMultiple(diff, 0.0625)[1] < tol or common.nearestMultiple(diff, 1 / 12)[1] < tol:
+            shift = highest
+        else:
+            shift = bar_length
+    elif highest == 0.0 and not direct and not any(voices.values()):
+        filler = m21duration.Duration(1.0)
+        filler.quarterLength = bar_length
+        direct.append(_Event(offset=0.0, duration=filler, index=index, is_rest=True))
+        highest = opFrac(bar_length)
+        shift = bar_length
+    else:
+        shift = highest
+
+    local_ts = time_signatures[0][2] if time_signatures else None
+    if use_voices:
+        line_events = [_sorted(events) for events in voices.values() if events]
+    else:
+        line_events = [_sorted(direct)] if direct else []
+
+    implicit_rest_length = None
+    if len(direct) == 1 and direct[0].is_rest and direct[0].offset == 0:
+        implicit_rest_length = direct[0].duration.quarterLength
+
+    measure = MeasureIR(
+        number=number,
+        time_signature=state.context_ts,
+        local_time_signature=_time_signature_ir(local_ts) if local_ts is not None else None,
+        lines=tuple(tuple(_note_event_ir(ev, interval) for ev in events) for events in line_events),
+        implicit_rest_length=implicit_rest_length,
+    )
+
+    marks = []
+    for off, mark in sorted(tempo_marks, key=lambda item: item[0]):
+        if isinstance(mark, tempo.MetronomeMark) and mark.number:
+            qpm = _quarter_bpm(mark)
+            if qpm is not None:
+                marks.append(TempoMarkIR(measure=number, bpm=int(mark.number), beat_unit=_beat_unit(mark), quarter_bpm=qpm))
+
+    return _MeasureRecord(
+        measure=measure,
+        divisions=helper.divisions,
+        transposition=transposition,
+        last_ts=last_ts if last_ts is not state.last_ts else None,
+        context_ts=_time_signature_ir(time_signatures[-1][2]) if time_signatures else None,
+        highest=highest,
+        shift=shift,
+        dynamics=tuple(sorted(dynamic_marks, key=lambda item: item[0])),
+        text_dynamics=tuple(sorted(text_marks, key=lambda item: item[0])),
+        tempo_marks=tuple(marks),
+        key_signatures=tuple(sorted(key_signatures, key=lambda item: item[0])),
+    )
+
+
+def _voice_key(text):
+    try:
+        return int(text)
+    except (TypeError, ValueError):
+        return text
+
+
+def _voice_highest_time(events) -> float:
+    return max((ev.offset + ev.duration.quarterLength for ev in events), default=0.0)
+
+
+def _sorted(events):
+    # music21's sort: offset, grace notes first, then insertion order
+    return sorted(events, key=lambda ev: (ev.offset, not ev.duration.isGrace, ev.index))
+
+
+def _first_rest(direct, voices):
+    for ev in _sorted(direct):
+        if ev.is_rest:
+            return ev
+    for events in voices:
+        for ev in _sorted(events):
+            if ev.is_rest:
+                return ev
+    return None
+
+
+_DYNAMIC_VALUES: dict[str, str] = {}
+
+
+def _dynamic_value(name: str) -> str:
+    if name not in _DYNAMIC_VALUES:
+        _DYNAMIC_VALUES[name] = dynamics.Dynamic(name).value
+    return _DYNAMIC_VALUES[name]
+
+
+# ----------------------------
+# notes
+# ----------------------------
+
+def _duration(helper, mx):
+    d = helper.xmlToDuration(mx)
+    if mx.find("grace") is not None:
+        helper.xmlToDuration(mx, d)
+        d = d.getGraceDuration()
+    return d
+
+
+def _articulations(mx) -> list[tuple[str, str]]:
+    """(tag, name) for every articulation music21 attaches to this <note>, in its order."""
+    found = []
+    if mx.get("pizzicato") == "yes":
+        found.append(("pizzicato", "pizzicato"))
+    for notations in mx.findall("notations"):
+        for technical in notations.findall("technical"):
+            found.extend((item.tag, _TECHNICAL_NAMES[item.tag]) for item in technical if item.tag in _TECHNICAL_NAMES)
+        for articulations in notations.findall("articulations"):
+            found.extend(
+                (item.tag, _ARTICULATION_NAMES[item.tag]) for item in articulations if item.tag in _ARTICULATION_NAMES
+            )
+    return found
+
+
+def _pitch(helper, mx):
+    p = pitch.Pitch("C4")
+    helper.xmlToPitch(mx, p)
+    return p
+
+
+def _note_event(helper, mx, offset, index) -> _Event:
+    d = _duration(helper, mx)
+    arts = tuple(name for _, name in _articulations(mx))
+    if mx.find("unpitched") is not None:
+        return _Event(offset=offset, duration=d, index=index, articulations=arts)
+    p = _pitch(helper, mx)
+    return _Event(offset=offset, duration=d, index=index, is_note=True, pitch=p, articulations=arts)
+
+
+def _rest_event(helper, mx, offset, index) -> _Event:
+    d = _duration(helper, mx)
+    full = False
+    if mx.find("rest").get("measure") == "yes":
+        rest_type = _text(mx.find("type"))
+        full = not rest_type or rest_type in ("whole", "breve")
+    return _Event(offset=offset, duration=d, index=index, is_rest=True, full_measure=full)
+
+
+def _chord_event(helper, members, offset, index) -> _Event:
+    durations = []
+    sortable = []
+    pitched = 0
+    for position, mx in enumerate(members):
+        durations.append(_duration(helper, mx))
+        unpitched = mx.find("unpitched")
+        if unpitched is None:
+            pitched += 1
+            sort_key = _pitch(helper, mx).ps
+        else:
+            step = _text(unpitched.find("display-step")) or "B"
+            octave = _text(unpitched.find("display-octave")) or "4"
+            sort_key = pitch.Pitch(f"{step}{octave}").midi
+        sortable.append((sort_key, position, _articulations(mx)))
+
+    seen = set()
+    arts = []
+    for _, _, found in sorted(sortable, key=lambda item: (item[0], item[1])):
+        for tag, name in found:
+            if tag in seen:
+                continue
+            arts.append(name)
+            if tag not in _REPEATABLE_TECHNICAL:
+                seen.add(tag)
+
+    # a chord with any unpitched member is a PercussionChord, which music21 does not flag as a chord
+    is_chord = pitched == len(members)
+    return _Event(
+        offset=offset,
+        duration=durations[0],
+        index=index,
+        is_chord=is_chord,
+        chord_size=len(members) if is_chord else None,
+        articulations=tuple(arts),
+    )
+
+
+def _note_event_ir(ev: _Event, interval) -> NoteEvent:
+    d = ev.duration
+    written_pitch = written_midi = sounding_pitch = sounding_midi = None
+    if ev.is_note:
+        p = ev.pitch
+        written_pitch = p.nameWithOctave
+        written_midi = p.midi
+        if interval:
+            sounding_pitch, sounding_midi = _sounding_pitch(p, interval)
+        else:
+            sounding_pitch = written_pitch
+            sounding_midi = written_midi
+
+    tuplet = None
+    if d.tuplets:
+        t = d.tuplets[0]
+        tuplet = (t.numberNotesActual, t.numberNotesNormal)
+
+    return NoteEvent(
+        offset=ev.offset,
+        duration=d.quarterLength,
+        duration_type=d.type,
+        dots=d.dots,
+        is_rest=ev.is_rest,
+        is_chord=ev.is_chord,
+        is_note=ev.is_note,
+        chord_size=ev.chord_size,
+        written_pitch=written_pitch,
+        written_midi=written_midi,
+        sounding_pitch=sounding_pitch,
+        sounding_midi=sounding_midi,
+        tuplet=tuplet,
+        articulations=ev.articulations if not ev.is_rest else (),
+    )
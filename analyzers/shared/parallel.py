@@ -0,0 +1,141 @@
+# shared/parallel.py
+from __future__ import annotations
+
+import multiprocessing
+import os
+import queue
+from concurrent.futures import ProcessPoolExecutor
+
+from utilities import MemoryResultCache, ResultCache, SqliteResultCache, Tracer, current_tracer, span, tracing
+
+# per-worker state, set once by the pool initializer
+_WORKER_SCORE = None
+_WORKER_EVENTS = None
+_WORKER_CURVES = None
+
+
+class _RelayedCurveCache(ResultCache):
+    """Worker-side curve cache: reads a snapshot of the parent's, sends new curves back to it."""
+
+    def __init__(self, entries: dict):
+        self._entries = entries
+
+    def get(self, key: str):
+        return self._entries.get(key)
+
+    def put(self, key: str, value) -> None:
+        self._entries[key] = value
+        _WORKER_EVENTS.put(("curve", key, value))
+
+
+def _worker_curve_cache(curve_cache):
+    # a sqlite cache is shared through its file; any other is relayed
+    if curve_cache is None or isinstance(curve_cache, SqliteResultCache):
+        return curve_cache
+    return _RelayedCurveCache(curve_cache.snapshot() if isinstance(curve_cache, MemoryResultCache) else {})
+
+
+def _init_analyzer_worker(score, events, curve_cache):
+    global _WORKER_SCORE, _WORKER_EVENTS, _WORKER_CURVES
+    _WORKER_SCORE = score
+    _WORKER_EVENTS = events
+    _WORKER_CURVES = curve_cache
+
+
+def _run_analyzer_in_worker(name, fn, score_path, target_grade, analysis_options, report_progress, trace=False):
+    def progress_cb(grade, idx, total, label=None):
+        _WORKER_EVENTS.put(("observed", name, grade, idx, total, label))
+
+    # spans go back to the parent's tracer over the event queue
+    tracer = Tracer(on_span=lambda s: _WORKER_EVENTS.put(("span", name, s))) if trace else None
+    try:
+        with tracing(tracer), span(name, analyzer=name):
+            return fn(
+                score_path,
+                target_grade,
+                score=_WORKER_SCORE,
+                progress_cb=progress_cb if report_progress else None,
+                analysis_options=analysis_options,
+                curve_cache=_WORKER_CURVES,
+            )
+    finally:
+        # sent after every progress event from this run, so the parent can tell the stream is drained
+        _WORKER_EVENTS.put(("finished", name))
+
+
+def run_analyzers_in_processes(
+    analyzers,
+    score,
+    score_path,
+    target_grade,
+    analysis_options,
+    *,
+    max_workers=None,
+    progress_cb=None,
+    on_finished=None,
+    curve_cache=None,
+):
+    """
+    Runs (name, fn) analyzers concurrently in worker processes. The ScoreIR is
+    shipped to each worker once, through the pool initializer.
+
+    progress_cb(name) -> callback(grade, idx, total, label) relays observed-grade
+    progress from the workers; on_finished(name) fires as each analyzer completes.
+    Timing spans recorded in the workers are added to the caller's active tracer.
+    Workers look up observed-grade curves in curve_cache and the curves they
+    compute are stored there, whatever its backend.
+    Returns {name: result}; callers decide the order results are consumed in.
+    """
+    ctx = multiprocessing.get_context()
+    events = ctx.Queue()
+    workers = max_workers or min(len(analyzers), os.cpu_count() or 1)
+
+    callbacks = {name: progress_cb(name) for name, _ in analyzers} if progress_cb is not None else {}
+    tracer = current_tracer()
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=ctx,
+        initializer=_init_analyzer_worker,
+        initargs=(score, events, _worker_curve_cache(curve_cache)),
+    ) as pool:
+        futures = {
+            name: pool.submit(
+                _run_analyzer_in_worker,
+                name,
+                fn,
+                score_path,
+                target_grade,
+                analysis_options,
+                name in callbacks,
+                tracer is not None,
+            )
+            for name, fn in analyzers
+        }
+
+        finished = set()
+        while len(finished) < len(futures):
+            try:
+                event = events.get(timeout=0.1)
+            except queue.Empty:
+                # a worker that died without reporting back surfaces here
+                for name, fut in futures.items():
+                    if name not in finished and fut.done() and fut.exception() is not None:
+                        fut.result()
+                continue
+
+            if event[0] == "observed":
+                _, name, grade, idx, total, label = event
+                callbacks[name](grade, idx, total, label)
+            elif event[0] == "span":
+                tracer.add(event[2])
+            elif event[0] == "curve":
+                _, key, value = event
+                curve_cache.put(key, value)
+            else:
+                _, name = event
+                finished.add(name)
+                if on_finished is not None:
+                    on_finished(name)
+
+        return {name: fut.result() for name, fut in futures.items()}
@@ -1,15 +1,13 @@
 # shared/score_extract.py
 from __future__ import annotations
 
-from music21 import meter as m21meter, stream
 from models import MeterData, RhythmGradeRules
 from analyzers.meter.helpers import meter_segment_confidence
-from utilities import iter_measure_events
 
 
 def extract_meter_segments(score, *, grade: float, rules_for_grade: RhythmGradeRules) -> list[MeterData]:
     part0 = score.parts[0]
-    measures = list(part0.getElementsByClass(stream.Measure))
+    measures = part0.measures
 
     if not measures:
         return []
@@ -21,8 +19,8 @@ def extract_meter_segments(score, *, grade: float, rules_for_grade: RhythmGradeR
 
     prev_ratio = None
     for idx, meas in enumerate(measures):
-        ts = meas.getContextByClass(m21meter.TimeSignature)
-        ratio = ts.ratioString if ts else "4/4"
+        ts = meas.time_signature
+        ratio = ts.ratio if ts else "4/4"
 
         if ratio != prev_ratio:
             change_points.append((idx, meas.number, ratio))
@@ -68,10 +66,10 @@ def max_chord_size_in_part(part) -> int:
     #returns max chord size in given part
     return max(
         (
-            len(n.pitches)
-            for m in part.getElementsByClass(stream.Measure)
-            for n in iter_measure_events(m)
-            if n.isChord
+            n.chord_size
+            for m in part.measures
+            for n in m.iter_events()
+            if n.is_chord
         ),
         default=1,
     )
@@ -0,0 +1,314 @@
+# shared/score_ir.py
+from __future__ import annotations
+
+from bisect import bisect_right
+from dataclasses import replace
+
+from music21 import converter, dynamics, expressions, instrument, meter as m21meter, stream, tempo
+
+from models import (
+    DynamicMarkIR,
+    KeySignatureIR,
+    MeasureIR,
+    NoteEvent,
+    PartIR,
+    ScoreIR,
+    TempoMarkIR,
+    TimeSignatureIR,
+)
+from utilities import ScoreCache, extract_measure_lines, hash_file, normalize_key_name
+
+DYNAMIC_TOKENS = {
+    "ppp", "pp", "p", "mp", "mf", "f", "ff", "fff",
+    "sfz", "sfp", "fp", "rfz",
+}
+
+
+def load_score_ir(
+    score_path: str | None = None,
+    score=None,
+    *,
+    cache: ScoreCache | None = None,
+    reader: str = "music21",
+) -> ScoreIR:
+    """
+    Returns a ScoreIR for whatever the caller has: an existing IR, a parsed
+    music21 score, or a path to parse. With a cache, a path whose bytes were
+    seen before skips MusicXML parsing entirely.
+
+    reader="stream" reads the file with the iterparse reader instead of building
+    the music21 object graph; files it does not support fall back to music21.
+    """
+    if isinstance(score, ScoreIR):
+        return score
+    if score is not None:
+        return build_score_ir(score)
+    if score_path is None:
+        raise ValueError("score_path or score is required")
+
+    content_hash = hash_file(score_path)
+    key = cache.key_for(content_hash, reader) if cache is not None else None
+    if key is not None:
+        cached = cache.get(key)
+        if isinstance(cached, ScoreIR):
+            return cached
+
+    ir = replace(_read_score_path(score_path, reader), content_hash=content_hash)
+    if key is not None:
+        cache.put(key, ir)
+    return ir
+
+
+def _read_score_path(score_path: str, reader: str) -> ScoreIR:
+    if reader == "stream":
+        from analyzers.shared.musicxml_reader import UnsupportedMusicXML, read_score_ir
+
+        try:
+            return read_score_ir(score_path)
+        except UnsupportedMusicXML:
+            pass
+    elif reader != "music21":
+        raise ValueError(f"Unknown score reader: {reader!r}")
+    return build_score_ir(converter.parse(score_path))
+
+
+def build_score_ir(score) -> ScoreIR:
+    return ScoreIR(
+        parts=tuple(_build_part(part) for part in score.parts),
+        key_signatures=_build_key_signatures(score),
+        tempo_marks=_build_tempo_marks(score.parts[0]),
+    )
+
+
+# ----------------------------
+# parts / measures / events
+# ----------------------------
+
+def _build_part(part) -> PartIR:
+    # One pass over the part replaces music21's per-measure and per-note
+    # context searches, which dominated IR build time on large scores.
+    transpositions = _TranspositionIndex(part)
+    measures = []
+    context_ts = None
+    for m in part.getElementsByClass(stream.Measure):
+        local_ts = list(m.getElementsByClass(m21meter.TimeSignature))
+        measures.append(_build_measure(m, context_ts, local_ts, transpositions))
+        if local_ts:
+            # music21 resolves a measure's context to the latest signature in
+            # an earlier measure, never one stored in the measure itself
+            context_ts = _time_signature_ir(local_ts[-1])
+    return PartIR(
+        name=part.partName,
+        measures=tuple(measures),
+        dynamics=_build_dynamics(part),
+        highest_time=part.highestTime,
+    )
+
+
+class _TranspositionIndex:
+    """Instrument transpositions of a part, looked up by offset in the part."""
+
+    def __init__(self, part):
+        entries = sorted(
+            (
+                (inst.getOffsetInHierarchy(part), i, inst.transposition)
+                for i, inst in enumerate(part.recurse().getElementsByClass(instrument.Instrument))
+            ),
+            key=lambda e: (e[0], e[1]),
+        )
+        self._offsets = [offset for offset, _, _ in entries]
+        self._intervals = [interval for _, _, interval in entries]
+
+    def at(self, offset):
+        # the last instrument at or before offset, as getContextByClass finds it
+        i = bisect_right(self._offsets, offset) - 1
+        return self._intervals[i] if i >= 0 else None
+
+
+def _time_signature_ir(ts) -> TimeSignatureIR | None:
+    if ts is None:
+        return None
+    return TimeSignatureIR(
+        ratio=ts.ratioString,
+        beat_length=ts.beatDuration.quarterLength,
+        bar_length=ts.barDuration.quarterLength,
+    )
+
+
+def _build_measure(m, context_ts, local_ts, transpositions: _TranspositionIndex) -> MeasureIR:
+    _, lines = extract_measure_lines(m)
+
+    implicit_rest_length = None
+    direct = list(m.notesAndRests)
+    if len(direct) == 1 and direct[0].isRest and direct[0].offset == 0:
+        implicit_rest_length = direct[0].duration.quarterLength
+
+    return MeasureIR(
+        number=m.number,
+        time_signature=context_ts,
+        local_time_signature=_time_signature_ir(local_ts[0]) if local_ts else None,
+        lines=tuple(
+            tuple(_build_event(n, transpositions.at(m.offset + n.offset)) for n in events)
+            for events in lines
+        ),
+        implicit_rest_length=implicit_rest_length,
+    )
+
+
+# (written name with octave, alter, interval name) -> (sounding name with octave, MIDI).
+# Transposing parts repeat a few dozen pairs, so steady state does no Interval arithmetic.
+_SOUNDING_PITCHES: dict[tuple, tuple[str, int]] = {}
+
+
+def _sounding_pitch(p, interval) -> tuple[str, int]:
+    key = (p.nameWithOctave, p.alter, interval.directedName)
+    sounding = _SOUNDING_PITCHES.get(key)
+    if sounding is None:
+        transposed = p.transpose(interval)
+        sounding = _SOUNDING_PITCHES[key] = (transposed.nameWithOctave, transposed.midi)
+    return sounding
+
+
+def _build_event(n, interval) -> NoteEvent:
+    is_chord = bool(getattr(n, "isChord", False))
+
+    written_pitch = written_midi = None
+    if not n.isRest and not is_chord and hasattr(n, "pitch"):
+        written_pitch = n.pitch.nameWithOctave
+        written_midi = n.pitch.midi
+
+    sounding_pitch = sounding_midi = None
+    if n.isNote:
+        if interval:
+            sounding_pitch, sounding_midi = _sounding_pitch(n.pitch, interval)
+        else:
+            sounding_pitch = written_pitch
+            sounding_midi = written_midi
+
+    tuplet = None
+    if n.duration.tuplets:
+        t = n.duration.tuplets[0]
+        tuplet = (t.numberNotesActual, t.numberNotesNormal)
+
+    return NoteEvent(
+        offset=n.offset,
+        duration=n.duration.quarterLength,
+        duration_type=n.duration.type,
+        dots=n.duration.dots,
+        is_rest=n.isRest,
+        is_chord=is_chord,
+        is_note=n.isNote,
+        chord_size=len(n.pitches) if is_chord else None,
+        written_pitch=written_pitch,
+        written_midi=written_midi,
+        sounding_pitch=sounding_pitch,
+        sounding_midi=sounding_midi,
+        tuplet=tuplet,
+        articulations=tuple(a.name for a in n.articulations) if not n.isRest else (),
+    )
+
+
+def _build_dynamics(part) -> tuple[DynamicMarkIR, ...]:
+    marks = [
+        DynamicMarkIR(value=d.value, offset=d.getOffsetInHierarchy(part), measure=d.measureNumber)
+        for d in part.recurse().getElementsByClass(dynamics.Dynamic)
+    ]
+
+    # Fallback: detect dynamics in text expressions (some MusicXML encodes dynamics as text)
+    for text_expr in part.recurse().getElementsByClass(expressions.TextExpression):
+        token = str(text_expr.content).strip().lower()
+        if token in DYNAMIC_TOKENS:
+            marks.append(
+                DynamicMarkIR(
+                    value=token,
+                    offset=text_expr.getOffsetInHierarchy(part),
+                    measure=text_expr.measureNumber,
+                )
+            )
+    return tuple(marks)
+
+
+# ----------------------------
+# score-level context (read from the first part)
+# ----------------------------
+
+def _build_key_signatures(score) -> tuple[KeySignatureIR, ...]:
+    # Sounding keys without score.toSoundingPitch(), which deep-copies every part:
+    # each written signature is transposed by the instrument span it starts in.
+    part0 = score.parts[0]
+    spans = _instrument_spans(part0) if _written_pitch(score, part0) else ()
+    signatures = []
+    for m in part0.getElementsByClass(stream.Measure):
+        for ks in m.recurse().getElementsByClass("KeySignature"):
+            trans = _transposition_in_spans(spans, m.offset + ks.offset)
+            if trans is not None:
+                ks = ks.transpose(trans)
+            tonic = normalize_key_name(ks.tonicPitchNameWithCase).capitalize()
+            signatures.append(
+                KeySignatureIR(
+                    measure=m.number,
+                    tonic=tonic,
+                    quality=ks.type,
+                )
+            )
+    return tuple(signatures)
+
+
+def _written_pitch(score, part) -> bool:
+    # toSoundingPitch only transposes parts explicitly marked as written pitch
+    at_sounding = part.atSoundingPitch
+    if at_sounding == "unknown":
+        at_sounding = score.atSoundingPitch
+    return at_sounding is False
+
+
+def _instrument_spans(part) -> list[tuple]:
+    # (start, end, transposition): each instrument spans up to the next one, the
+    # last one up to the end of the part
+    instruments = part.getInstruments(recurse=True)
+    starts = [inst.offset for inst in instruments]
+    ends = starts[1:] + [part.highestTime]
+    return [(start, end, inst.transposition) for start, end, inst in zip(starts, ends, instruments)]
+
+
+def _transposition_in_spans(spans, offset):
+    for start, end, trans in spans:
+        if start <= offset < end:
+            return trans
+    return None
+
+
+def _quarter_bpm(mark: tempo.MetronomeMark) -> int | None:
+    if hasattr(mark, "getQuarterBPM") and mark.getQuarterBPM() is not None:
+        return int(round(mark.getQuarterBPM()))
+    if mark.number and mark.referent and mark.referent.quarterLength:
+        return int(round(mark.number * mark.referent.quarterLength))
+    if mark.number:
+        return int(round(mark.number))
+    return None
+
+
+def _beat_unit(mark: tempo.MetronomeMark) -> str:
+    if mark.referent and getattr(mark.referent, "fullName", None):
+        return str(mark.referent.fullName)
+    if mark.referent and getattr(mark.referent, "name", None):
+        return str(mark.referent.name)
+    return "quarter"
+
+
+def _build_tempo_marks(part0) -> tuple[TempoMarkIR, ...]:
+    marks = []
+    for m in part0.getElementsByClass(stream.Measure):
+        for t in m.getElementsByClass(tempo.MetronomeMark):
+            if t.number:
+                qpm = _quarter_bpm(t)
+                if qpm is not None:
+                    marks.append(
+                        TempoMarkIR(
+                            measure=m.number,
+                            bpm=int(t.number),
+                            beat_unit=_beat_unit(t),
+                            quarter_bpm=qpm,
+                        )
+                    )
+    return tuple(marks)
@@ -10,7 +10,7 @@ def analyze_duration_target(score, rules: dict[float, DurationGradeBucket], targ
     If tempo_data is provided, duration is computed using tempo segments.
     If not, we fall back to assuming 100 BPM across whole piece.
     """
-    measures = score.parts[0].getElementsByClass("Measure")
+    measures = score.parts[0].measures
     total_measures = measures[-1].number if measures else 0
     total_quarters = total_measures * 4
 
@@ -1,11 +1,10 @@
-from copy import deepcopy
-
-from music21 import converter
-from functools import lru_cache
+from functools import lru_cache, partial
 import pandas as pd
 
 from data_processing import derive_observed_grades
+from analyzers.shared.score_ir import load_score_ir
 from models import DurationGradeBucket
+from utilities import span
 from .tempo.analyzer import TempoAnalyzer
 from .duration.analyzer import DurationAnalyzer, analyze_duration_target, analyze_duration_confidence
 
@@ -63,28 +62,26 @@ def load_duration_rules(path: str = r"data/duration_guidelines.csv"):
     return rules
 
 
+def _duration_confidence(score, grade, *, rules, tempo_data):
+    return analyze_duration_confidence(score, rules, grade, tempo_data=tempo_data)
+
+
 def run_tempo_duration(
     score_path: str,
     target_grade: float,
     *,
     score=None,
-    score_factory=None,
     progress_cb=None,
     run_observed=True,
     analysis_options=None,
+    grade_executor=None,
+    curve_cache=None,
 ):
     tempo_rules = load_tempo_rules()
     duration_rules = load_duration_rules()
 
     analyzer = TempoAnalyzer(tempo_rules)
-
-    if score_factory is None:
-        if score is not None:
-            score_factory = lambda: deepcopy(score)
-        elif score_path is not None:
-            score_factory = lambda: converter.parse(score_path)
-        else:
-            raise ValueError("score_path or score_factory is required")
+    score = load_score_ir(score_path, score)
 
     # observed grade based on tempo only (or you can build a combined curve)
     grades = None
@@ -102,9 +99,12 @@ def run_tempo_duration(
 
     if run_observed:
         kwargs = {
-            "score_factory": score_factory,
+            "score": score,
             "analyze_confidence": analyzer.analyze_confidence,
             "progress_cb": _progress_tempo if progress_cb is not None else None,
+            "executor": grade_executor,
+            "curve_cache": curve_cache,
+            "curve_key": ("tempo_duration", "tempo"),
         }
         if grades is not None:
             kwargs["grades"] = grades
@@ -113,27 +113,27 @@ def run_tempo_duration(
         observed, confidences = None, {}
 
     # target-grade UI data
-    if score is None:
-        score = score_factory()
-    tempo_data, tempo_conf = analyzer.analyze_target(score, target_grade)
-    duration_data, duration_conf = analyze_duration_target(
-        score,
-        duration_rules,
-        target_grade,
-        tempo_data=tempo_data,
-    )
+    with span("target_pass", parts=len(score.parts)):
+        tempo_data, tempo_conf = analyzer.analyze_target(score, target_grade)
+        duration_data, duration_conf = analyze_duration_target(
+            score,
+            duration_rules,
+            target_grade,
+            tempo_data=tempo_data,
+        )
     tempo_conf = min(1.0, max(0.0, tempo_conf))
     duration_conf = min(1.0, max(0.0, duration_conf))
 
     # observed grade based on duration (uses tempo-derived duration)
     if run_observed:
-        def _duration_confidence(s, g):
-            return analyze_duration_confidence(s, duration_rules, g, tempo_data=tempo_data)
-
         kwargs = {
-            "score_factory": score_factory,
-            "analyze_confidence": _duration_confidence,
+            "score": score,
+            # partial rather than a closure so process-pool grade sweeps can pickle it
+            "analyze_confidence": partial(_duration_confidence, rules=duration_rules, tempo_data=tempo_data),
             "progress_cb": _progress_duration if progress_cb is not None else None,
+            "executor": grade_executor,
+            "curve_cache": curve_cache,
+            "curve_key": ("tempo_duration", "duration"),
         }
         if grades is not None:
             kwargs["grades"] = grades
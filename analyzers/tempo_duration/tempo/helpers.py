@@ -1,40 +1,12 @@
-from music21 import stream, tempo
 from models import TempoData
 from typing import List
 
-def _quarter_bpm(mark: tempo.MetronomeMark) -> int | None:
-    if hasattr(mark, "getQuarterBPM") and mark.getQuarterBPM() is not None:
-        return int(round(mark.getQuarterBPM()))
-    if mark.number and mark.referent and mark.referent.quarterLength:
-        return int(round(mark.number * mark.referent.quarterLength))
-    if mark.number:
-        return int(round(mark.number))
-    return None
-
-
-def _beat_unit(mark: tempo.MetronomeMark) -> str:
-    if mark.referent and getattr(mark.referent, "fullName", None):
-        return str(mark.referent.fullName)
-    if mark.referent and getattr(mark.referent, "name", None):
-        return str(mark.referent.name)
-    return "quarter"
-
-
 def build_tempo_marks(score) -> List[tuple[int, int, str, int]]:
-    marks = []
-    for m in score.parts[0].getElementsByClass(stream.Measure):
-        for t in m.getElementsByClass(tempo.MetronomeMark):
-            if t.number:
-                qpm = _quarter_bpm(t)
-                beat_unit = _beat_unit(t)
-                if qpm is not None:
-                    marks.append((m.number, int(t.number), beat_unit, qpm))
-    return marks
+    return [(t.measure, t.bpm, t.beat_unit, t.quarter_bpm) for t in score.tempo_marks]
 
 
 def build_tempo_segments(score, tempo_marks: List[tuple[int, int, str, int]]) -> List[TempoData]:
-    measures = score.parts[0].getElementsByClass(stream.Measure)
-    total_measures = measures[-1].number
+    total_measures = score.parts[0].measures[-1].number
 
     if not tempo_marks:
         # default "unknown" tempo segment; you can choose 100 or whatever default
@@ -3,8 +3,10 @@ from .grades import GRADES, FULL_GRADES, MAX_GRADE, ROUNDED_GRADES
 from .instruments import NON_PERCUSSION_INSTRUMENTS, PERCUSSION_INSTRUMENTS, FAMILY_MAP, INST_TO_GRADE_NON_STRING
 from .keys import GRADE_TO_KEY_TABLE, MAJOR_DIATONIC_MAP, MINOR_DIATONIC_MAP, PITCH_TO_INDEX
 from .rhythms import BOUNDARY_TOKENS, RHYTHM_TOKEN_MAP, SUB_QUARTER_TOKENS
+from .version import ANALYZER_VERSION
 
 __all__ = [
+    "ANALYZER_VERSION",
     "BOUNDARY_TOKENS",
     "NON_PERCUSSION_INSTRUMENTS",
     "FAMILY_MAP",
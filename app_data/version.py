@@ -0,0 +1,3 @@
+# Bump whenever the ScoreIR layout or any analyzer's output changes, so cached
+# scores and results from older code are not reused.
+ANALYZER_VERSION = "7"
@@ -0,0 +1,76 @@
+"""
+ASGI entry point. /api/progress/<job_id> is served natively, so an idle SSE
+stream costs a coroutine instead of a WSGI thread; every other request goes to
+the Flask app through asgiref's WSGI adapter. Run with any ASGI server, e.g.
+
+    pip install uvicorn asgiref
+    uvicorn asgi_app:app
+"""
+import asyncio
+import json
+
+from flask_app import JOBS, SSE_HEARTBEAT_SECONDS, app as flask_app, parse_last_event_id
+from utilities import SSE_HEARTBEAT, format_sse
+
+PROGRESS_PREFIX = "/api/progress/"
+
+_wsgi = None
+
+
+def _wsgi_app():
+    global _wsgi
+    if _wsgi is None:
+        try:
+            from asgiref.wsgi import WsgiToAsgi
+        except ImportError as exc:
+            raise RuntimeError("asgi_app needs asgiref to serve the Flask routes: pip install asgiref") from exc
+        _wsgi = WsgiToAsgi(flask_app)
+    return _wsgi
+
+
+async def app(scope, receive, send):
+    path = scope.get("path", "")
+    if scope["type"] == "http" and scope["method"] == "GET" and path.startswith(PROGRESS_PREFIX):
+        await progress(scope, receive, send, path[len(PROGRESS_PREFIX):])
+    else:
+        await _wsgi_app()(scope, receive, send)
+
+
+async def progress(scope, receive, send, job_id):
+    job = JOBS.get(job_id)
+    if not job:
+        body = json.dumps({"error": "Unknown job"}).encode()
+        await send({"type": "http.response.start", "status": 404, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": body})
+        return
+
+    headers = dict(scope.get("headers") or [])
+    last_event_id = parse_last_event_id(headers.get(b"last-event-id", b"").decode() or None)
+
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache")],
+        }
+    )
+
+    async def stream():
+        async for item in job["events"].subscribe_async(last_event_id, heartbeat=SSE_HEARTBEAT_SECONDS):
+            chunk = SSE_HEARTBEAT if item is None else format_sse(*item)
+            await send({"type": "http.response.body", "body": chunk.encode(), "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def disconnected():
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    # stop streaming as soon as the client goes away
+    streaming = asyncio.ensure_future(stream())
+    watching = asyncio.ensure_future(disconnected())
+    done, pending = await asyncio.wait({streaming, watching}, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+    for task in done:
+        if task is streaming:
+            task.result()
@@ -0,0 +1,282 @@
+"""
+Batch grading of many scores, for catalog runs. Each score is analyzed in a
+worker process that can be killed on timeout or lost to a crash without
+taking the batch down. Every finished score is appended to a JSONL manifest
+straight away, so an interrupted batch resumes where it stopped; the output
+(JSONL, or Parquet with pyarrow installed) is written from the manifest at
+the end, one row per score.
+"""
+from __future__ import annotations
+
+import glob
+import json
+import multiprocessing
+import os
+import sys
+from multiprocessing.connection import wait
+from time import perf_counter
+
+from models import AnalysisOptions
+
+SCORE_EXTENSIONS = (".musicxml", ".xml", ".mxl")
+
+
+def iter_score_paths(inputs):
+    """Files, directories (searched recursively) and glob patterns, expanded to score paths."""
+    seen = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = sorted(
+                os.path.join(root, name)
+                for root, _, names in os.walk(item)
+                for name in names
+                if name.lower().endswith(SCORE_EXTENSIONS)
+            )
+        elif os.path.isfile(item):
+            matches = [item]
+        else:
+            matches = sorted(p for p in glob.glob(item, recursive=True) if os.path.isfile(p))
+        for path in matches:
+            path = os.path.abspath(path)
+            if path not in seen:
+                seen.add(path)
+                yield path
+
+
+def _fingerprint(path: str) -> str:
+    st = os.stat(path)
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def load_manifest(path: str) -> dict:
+    """Latest manifest record per score path; a line cut short by a crash is skipped."""
+    records = {}
+    try:
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                records[record["path"]] = record
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def _analyze(path, target_grade, options) -> dict:
+    from run_analysis import run_analysis_engine
+
+    started = perf_counter()
+    result = run_analysis_engine(path, target_grade, analysis_options=options)
+    return {
+        "observed_grades": result["observed_grades"],
+        "confidences": result["confidences"],
+        "total_measures": result["total_measures"],
+        "duration": result["duration"],
+        "seconds": round(perf_counter() - started, 3),
+    }
+
+
+def _worker_main(conn, target_grade, options):
+    # load the analyzers before taking work, so a timeout only counts the analysis
+    import run_analysis  # noqa: F401
+
+    conn.send(("ready", None))
+    while True:
+        try:
+            path = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if path is None:
+            return
+        try:
+            conn.send(("ok", _analyze(path, target_grade, options)))
+        except Exception as exc:
+            conn.send(("error", f"{type(exc).__name__}: {exc}"))
+
+
+class _Worker:
+    def __init__(self, ctx, target_grade, options):
+        self.conn, child = ctx.Pipe()
+        # not a daemon, so analyses can still use process parallelism
+        self.process = ctx.Process(target=_worker_main, args=(child, target_grade, options))
+        self.process.start()
+        child.close()
+        self.ready = False
+        self.path = None
+        self.started = None
+        self.tasks = 0
+
+    def assign(self, path):
+        self.path = path
+        self.started = perf_counter()
+        self.tasks += 1
+        self.conn.send(path)
+
+    def stop(self, kill: bool = False):
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+def _write_output(path: str, rows: list[dict]):
+    tmp = f"{path}.tmp"
+    if path.lower().endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        pq.write_table(pa.Table.from_pylist(rows), tmp)
+    else:
+        with open(tmp, "w", encoding="utf-8") as fh:
+            for row in rows:
+                fh.write(json.dumps(row) + "\n")
+    os.replace(tmp, path)
+
+
+def run_batch(
+    inputs,
+    output: str,
+    *,
+    target_grade: float = 2,
+    analysis_options: AnalysisOptions | None = None,
+    workers: int | None = None,
+    timeout: float | None = 600,
+    manifest: str | None = None,
+    retry_failed: bool = False,
+    max_tasks_per_worker: int = 100,
+    log=None,
+) -> dict:
+    """
+    Grades every score under inputs and writes one row per score to output
+    (.jsonl, or .parquet with pyarrow). Scores already in the manifest
+    (default: output + ".manifest.jsonl") with an unchanged size and mtime are
+    skipped; failed ones are retried only with retry_failed. Workers are
+    replaced after a timeout, a crash, or max_tasks_per_worker scores.
+    Returns counts per status for this run.
+    """
+    if output.lower().endswith(".parquet"):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as exc:
+            raise RuntimeError("Parquet output needs pyarrow: pip install pyarrow") from exc
+    if analysis_options is None:
+        analysis_options = AnalysisOptions()
+    if manifest is None:
+        manifest = f"{output}.manifest.jsonl"
+    if log is None:
+        def log(message):
+            print(message, file=sys.stderr, flush=True)
+
+    paths = list(iter_score_paths(inputs))
+    records = load_manifest(manifest)
+    fingerprints = {}
+    todo = []
+    for path in paths:
+        try:
+            fingerprints[path] = _fingerprint(path)
+        except OSError:
+            continue
+        record = records.get(path)
+        if record is not None and record.get("fingerprint") == fingerprints[path]:
+            if record["status"] == "ok" or not retry_failed:
+                continue
+        todo.append(path)
+    log(f"{len(paths)} scores, {len(paths) - len(todo)} already graded, {len(todo)} to run")
+
+    counts = {}
+    ctx = multiprocessing.get_context()
+    pool_size = min(workers or os.cpu_count() or 1, len(todo))
+    pool = [_Worker(ctx, target_grade, analysis_options) for _ in range(pool_size)]
+    queue = list(reversed(todo))
+    done = 0
+
+    with open(manifest, "a", encoding="utf-8") as manifest_fh:
+
+        def record(worker, status, row=None, error=None):
+            nonlocal done
+            done += 1
+            entry = {
+                "path": worker.path,
+                "fingerprint": fingerprints[worker.path],
+                "status": status,
+                "error": error,
+                "seconds": round(perf_counter() - worker.started, 3),
+                "observed_grades": None,
+                "confidences": None,
+                "total_measures": None,
+                "duration": None,
+            }
+            entry.update(row or {})
+            manifest_fh.write(json.dumps(entry) + "\n")
+            manifest_fh.flush()
+            records[worker.path] = entry
+            counts[status] = counts.get(status, 0) + 1
+            log(f"[{done}/{len(todo)}] {status} {entry['seconds']:.1f}s {worker.path}" + (f" ({error})" if error else ""))
+            worker.path = None
+
+        def replace(worker, kill):
+            worker.stop(kill=kill)
+            pool.remove(worker)
+            if queue:
+                pool.append(_Worker(ctx, target_grade, analysis_options))
+
+        try:
+            while pool:
+                for worker in list(pool):
+                    if worker.ready and worker.path is None:
+                        if queue and worker.tasks < max_tasks_per_worker and worker.process.is_alive():
+                            worker.assign(queue.pop())
+                        else:
+                            replace(worker, kill=False)
+                if not pool:
+                    break
+
+                now = perf_counter()
+                wait_for = None
+                busy = [w for w in pool if w.path is not None]
+                if timeout and busy:
+                    wait_for = max(0.0, min(w.started + timeout - now for w in busy))
+                ready = wait([w.conn for w in pool] + [w.process.sentinel for w in pool], wait_for)
+
+                for worker in list(pool):
+                    if worker.conn in ready:
+                        try:
+                            status, payload = worker.conn.recv()
+                        except (EOFError, OSError):
+                            worker.process.join(1)
+                        else:
+                            if status == "ready":
+                                worker.ready = True
+                            elif status == "ok":
+                                record(worker, "ok", row=payload)
+                            else:
+                                record(worker, "error", error=payload)
+                            continue
+                    if worker.process.sentinel in ready or not worker.process.is_alive():
+                        worker.process.join(1)
+                        if not worker.ready:
+                            raise RuntimeError(f"batch worker failed to start (exit code {worker.process.exitcode})")
+                        if worker.path is None:
+                            replace(worker, kill=True)
+                            continue
+                        record(worker, "crashed", error=f"worker exited with code {worker.process.exitcode}")
+                        replace(worker, kill=True)
+                    elif timeout and worker.path is not None and perf_counter() - worker.started > timeout:
+                        record(worker, "timeout", error=f"no result after {timeout:g}s")
+                        replace(worker, kill=True)
+        finally:
+            for worker in pool:
+                worker.stop(kill=True)
+
+    _write_output(output, [records[path] for path in paths if path in records])
+    return counts
@@ -0,0 +1,461 @@
+"""
+Benchmarks run_analysis_engine and each analyzer's run_* entry point over the
+scores in input_files/, in target-only, default-grade and full-grade modes.
+Every case runs in its own process and records wall time, CPU time, parse
+and analyze time, and peak RSS; results are compared with a stored baseline.
+
+    python benchmark.py --save-baseline          # record benchmark_baseline.json
+    python benchmark.py                          # compare; exit 1 on a regression
+    python benchmark.py --files Mystery --entries engine,rhythm --modes target_only
+
+--scaling runs the engine on synthetic scores (data_processing.synthetic_score),
+growing one axis at a time from the --parts/--measures/... base, and flags
+axes whose cost grows faster than linearly; --generate writes one such score.
+
+    python benchmark.py --scaling --axes parts,measures --plot scaling.png
+    python benchmark.py --generate big.musicxml --parts 80 --measures 400
+"""
+import os
+
+# caches off, so every case parses and analyzes from scratch
+os.environ.update(SCORE_CACHE_DIR="", CURVE_CACHE="none", RESULT_CACHE="none")
+
+import argparse
+import glob
+import json
+import math
+import multiprocessing
+import platform
+import sys
+import tempfile
+from dataclasses import asdict, fields, replace
+from time import perf_counter, process_time
+
+try:
+    import resource
+except ImportError:  # not on Windows; peak RSS is then left out
+    resource = None
+
+from analyzers.articulation.articulation import run_articulation
+from analyzers.availability.availability import run_availability
+from analyzers.dynamics import run_dynamics
+from analyzers.key_range import run_key_range
+from analyzers.meter import run_meter
+from analyzers.rhythm import run_rhythm
+from analyzers.shared.score_ir import load_score_ir
+from analyzers.tempo_duration import run_tempo_duration
+from app_data import ANALYZER_VERSION, FULL_GRADES
+from data_processing import write_synthetic_score
+from models import AnalysisOptions, SyntheticScoreSpec
+from run_analysis import run_analysis_engine
+
+BASELINE_PATH = "benchmark_baseline.json"
+
+ENTRY_POINTS = {
+    "engine": run_analysis_engine,
+    "dynamics": run_dynamics,
+    "availability": run_availability,
+    "key_range": run_key_range,
+    "tempo_duration": run_tempo_duration,
+    "articulation": run_articulation,
+    "rhythm": run_rhythm,
+    "meter": run_meter,
+}
+
+MODES = {
+    "target_only": AnalysisOptions(run_observed=False),
+    "default": AnalysisOptions(),
+    "full": AnalysisOptions(observed_grades=tuple(FULL_GRADES)),
+}
+
+METRICS = ("wall", "cpu", "parse", "analyze", "peak_rss_mb")
+# differences below these are noise whatever the percentage
+NOISE_FLOOR = {"wall": 0.05, "cpu": 0.05, "parse": 0.05, "analyze": 0.05, "peak_rss_mb": 16.0}
+
+# values each SyntheticScoreSpec field is swept over in --scaling
+SCALING_AXES = {
+    "parts": (4, 8, 16, 32, 64),
+    "measures": (32, 64, 128, 256, 512),
+    "voices": (1, 2, 3, 4),
+    "tuplet_density": (0.0, 0.25, 0.5, 1.0),
+    "chord_density": (0.0, 0.25, 0.5, 1.0),
+    "meter_changes": (0, 4, 8, 16, 31),
+    "key_changes": (0, 4, 8, 16, 31),
+    "tempo_changes": (0, 4, 8, 16, 31),
+}
+SCALING_METRICS = ("wall", "parse", "analyze", "rss_growth_mb")
+# a local log-log slope above this marks a super-linear hot spot
+SUPERLINEAR = 1.2
+
+
+class _ParsedScore:
+    """A one-entry score cache, so the engine analyzes the IR parsed beforehand."""
+
+    def __init__(self):
+        self._ir = None
+
+    def key_for(self, content_hash, reader=None):
+        return content_hash
+
+    def get(self, key):
+        return self._ir
+
+    def put(self, key, value):
+        self._ir = value
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def measure(score_path: str, entry: str, mode: str, target_grade: float = 2, reader: str = "music21") -> dict:
+    """Parses and analyzes one score with one entry point; timings in seconds."""
+    options = MODES[mode]
+    cache = _ParsedScore()
+    start_rss = _peak_rss_mb()
+    cpu_started = process_time()
+    started = perf_counter()
+    score = load_score_ir(score_path, cache=cache, reader=reader)
+    parsed = perf_counter()
+    if entry == "engine":
+        run_analysis_engine(score_path, target_grade, analysis_options=options, score_cache=cache)
+    else:
+        ENTRY_POINTS[entry](score_path, target_grade, score=score, analysis_options=options)
+    finished = perf_counter()
+    return {
+        "wall": round(finished - started, 4),
+        "cpu": round(process_time() - cpu_started, 4),
+        "parse": round(parsed - started, 4),
+        "analyze": round(finished - parsed, 4),
+        "peak_rss_mb": _peak_rss_mb(),
+        "start_rss_mb": start_rss,
+    }
+
+
+def _measure_in_child(conn, *args):
+    try:
+        conn.send(("ok", measure(*args)))
+    except Exception as exc:
+        conn.send(("error", f"{type(exc).__name__}: {exc}"))
+    finally:
+        conn.close()
+
+
+def measure_isolated(*args) -> dict:
+    """measure() in a fresh process, so peak RSS belongs to this case alone."""
+    ctx = multiprocessing.get_context()
+    conn, child = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_measure_in_child, args=(child, *args))
+    process.start()
+    child.close()
+    try:
+        status, payload = conn.recv()
+    except EOFError:
+        status, payload = "error", "benchmark process died"
+    process.join()
+    if status != "ok":
+        raise RuntimeError(payload)
+    return payload
+
+
+def case_key(score_path: str, mode: str, entry: str) -> str:
+    return f"{os.path.basename(score_path)}|{mode}|{entry}"
+
+
+def _best_of(runs) -> dict:
+    return {metric: min((r[metric] for r in runs if r.get(metric) is not None), default=None) for metric in METRICS}
+
+
+def run_benchmarks(score_paths, modes, entries, *, repeat: int = 1, target_grade: float = 2, reader: str = "music21", log=None) -> dict:
+    """Every score x mode x entry point; with repeat > 1 each metric keeps its best run."""
+    cases = {}
+    for score_path in score_paths:
+        for mode in modes:
+            for entry in entries:
+                key = case_key(score_path, mode, entry)
+                runs = []
+                for _ in range(repeat):
+                    try:
+                        runs.append(measure_isolated(score_path, entry, mode, target_grade, reader))
+                    except RuntimeError as exc:
+                        runs = []
+                        cases[key] = {"error": str(exc)}
+                        break
+                if runs:
+                    cases[key] = _best_of(runs)
+                if log is not None:
+                    log(key, cases[key])
+    return {
+        "analyzer_version": ANALYZER_VERSION,
+        "machine": _machine(),
+        "reader": reader,
+        "target_grade": target_grade,
+        "repeat": repeat,
+        "cases": cases,
+    }
+
+
+def _machine() -> dict:
+    return {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def scaling_exponents(points, metric) -> list:
+    """Local log-log slopes of metric between neighbouring axis values (1.0 = linear)."""
+    usable = [(p["value"], p.get(metric)) for p in points if p["value"] and p.get(metric)]
+    return [
+        round(math.log(y2 / y1) / math.log(x2 / x1), 2)
+        for (x1, y1), (x2, y2) in zip(usable, usable[1:])
+        if y1 > 0 and y2 > 0 and x2 != x1
+    ]
+
+
+def run_scaling(base: SyntheticScoreSpec, axes, *, mode: str = "default", repeat: int = 1, target_grade: float = 2, reader: str = "music21", log=None) -> dict:
+    """
+    Engine cost on synthetic scores along each axis in turn, the rest held at
+    base. Each axis gets its points and the local scaling exponents per metric;
+    hot_spots lists every step steeper than SUPERLINEAR.
+    """
+    results, hot_spots = {}, []
+    with tempfile.TemporaryDirectory(prefix="scaling-") as tmp:
+        for axis in axes:
+            points = []
+            for value in SCALING_AXES[axis]:
+                spec = replace(base, **{axis: value})
+                path = write_synthetic_score(spec, os.path.join(tmp, f"{axis}-{value}.musicxml"))
+                point = {"value": value, "size_kb": round(os.path.getsize(path) / 1024, 1)}
+                try:
+                    runs = [measure_isolated(path, "engine", mode, target_grade, reader) for _ in range(repeat)]
+                except RuntimeError as exc:
+                    point["error"] = str(exc)
+                else:
+                    point.update(_best_of(runs))
+                    if point["peak_rss_mb"] is not None:
+                        point["rss_growth_mb"] = round(point["peak_rss_mb"] - min(r["start_rss_mb"] for r in runs), 1)
+                points.append(point)
+                if log is not None:
+                    log(axis, point)
+            exponents = {metric: scaling_exponents(points, metric) for metric in SCALING_METRICS}
+            results[axis] = {"points": points, "exponents": exponents}
+            usable = [p for p in points if p["value"]]
+            for metric, slopes in exponents.items():
+                steps = [p for p in usable if p.get(metric)]
+                for (lo, hi), slope in zip(zip(steps, steps[1:]), slopes):
+                    # rises below the noise floor are not hot spots, however steep
+                    floor = NOISE_FLOOR.get(metric, NOISE_FLOOR["peak_rss_mb"])
+                    if slope > SUPERLINEAR and hi[metric] - lo[metric] > floor:
+                        hot_spots.append({"axis": axis, "metric": metric, "from": lo["value"], "to": hi["value"], "exponent": slope})
+    return {
+        "analyzer_version": ANALYZER_VERSION,
+        "machine": _machine(),
+        "reader": reader,
+        "mode": mode,
+        "target_grade": target_grade,
+        "repeat": repeat,
+        "base": asdict(base),
+        "axes": results,
+        "hot_spots": hot_spots,
+    }
+
+
+def plot_scaling(scaling: dict, path: str):
+    """One panel per axis: wall time and peak-RSS growth against the axis value."""
+    try:
+        import matplotlib
+
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError as exc:
+        raise RuntimeError("Plotting needs matplotlib: pip install matplotlib") from exc
+
+    axes = scaling["axes"]
+    cols = min(4, len(axes))
+    rows = math.ceil(len(axes) / cols)
+    fig, grid = plt.subplots(rows, cols, figsize=(4.5 * cols, 3.5 * rows), squeeze=False)
+    for ax, (axis, data) in zip(grid.flat, axes.items()):
+        points = [p for p in data["points"] if "error" not in p]
+        values = [p["value"] for p in points]
+        ax.plot(values, [p["wall"] for p in points], "o-", color="tab:blue", label="wall s")
+        ax.plot(values, [p["analyze"] for p in points], "s--", color="tab:cyan", label="analyze s")
+        ax.set_xlabel(axis)
+        ax.set_ylabel("seconds")
+        rss = ax.twinx()
+        rss.plot(values, [p.get("rss_growth_mb") for p in points], "^:", color="tab:red", label="RSS growth MB")
+        rss.set_ylabel("MB")
+        slopes = data["exponents"]["wall"]
+        ax.set_title(f"{axis} (max slope {max(slopes):.2f})" if slopes else axis)
+        ax.legend(loc="upper left", fontsize="small")
+    for ax in list(grid.flat)[len(axes):]:
+        ax.set_visible(False)
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def _format_point(axis, point):
+    if "error" in point:
+        return f"{axis}={point['value']:<8} ERROR {point['error']}"
+    rss = point.get("rss_growth_mb")
+    return (
+        f"{axis}={point['value']:<8} {point['size_kb']:>8.0f}KB  wall {point['wall']:.3f}  "
+        f"parse {point['parse']:.3f}  analyze {point['analyze']:.3f}  rss +{rss if rss is not None else '-'}MB"
+    )
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.2) -> list[dict]:
+    """Metrics that grew by more than tolerance (and the noise floor) over the baseline."""
+    regressions = []
+    for key, metrics in current["cases"].items():
+        before = baseline.get("cases", {}).get(key)
+        if before is None:
+            continue
+        if "error" in metrics and "error" not in before:
+            regressions.append({"case": key, "metric": "error", "baseline": None, "current": metrics["error"]})
+            continue
+        for metric in METRICS:
+            old, new = before.get(metric), metrics.get(metric)
+            if old is None or new is None:
+                continue
+            if new > old * (1 + tolerance) and new - old > NOISE_FLOOR[metric]:
+                regressions.append({"case": key, "metric": metric, "baseline": old, "current": new})
+    return regressions
+
+
+def _format_case(key, metrics, baseline=None):
+    if "error" in metrics:
+        return f"{key:<60} ERROR {metrics['error']}"
+    before = (baseline or {}).get("cases", {}).get(key, {})
+    cells = []
+    for metric in METRICS:
+        value = metrics.get(metric)
+        if value is None:
+            cells.append(f"{metric} -")
+            continue
+        cell = f"{metric} {value:.3f}" if metric != "peak_rss_mb" else f"rss {value:.0f}MB"
+        if before.get(metric):
+            cell += f" ({(value / before[metric] - 1) * 100:+.0f}%)"
+        cells.append(cell)
+    return f"{key:<60} " + "  ".join(cells)
+
+
+def _split(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the analysis engine and analyzers.")
+    parser.add_argument("--input-dir", default="input_files", help="Directory of scores to benchmark.")
+    parser.add_argument("--files", default="", help="Comma-separated substrings; only matching scores run.")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"Comma-separated subset of: {', '.join(MODES)}.")
+    parser.add_argument("--entries", default=",".join(ENTRY_POINTS), help=f"Comma-separated subset of: {', '.join(ENTRY_POINTS)}.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; each metric keeps its best.")
+    parser.add_argument("--score-reader", choices=("music21", "stream"), default="music21")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON to compare with or save to.")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline instead of comparing.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed growth per metric before it counts as a regression.")
+    parser.add_argument("--output", default=None, help="Also write this run's results to a JSON file.")
+    synthetic = parser.add_argument_group("synthetic scores")
+    synthetic.add_argument("--scaling", action="store_true", help="Sweep synthetic scores along each axis instead of benchmarking input files.")
+    synthetic.add_argument("--axes", default=",".join(SCALING_AXES), help=f"Comma-separated subset of: {', '.join(SCALING_AXES)}.")
+    synthetic.add_argument("--plot", default=None, help="With --scaling, also plot the sweep to this image file (needs matplotlib).")
+    synthetic.add_argument("--generate", default=None, metavar="PATH", help="Write one synthetic score with the spec below and exit.")
+    for field in fields(SyntheticScoreSpec):
+        synthetic.add_argument(f"--{field.name.replace('_', '-')}", type=type(field.default), default=field.default)
+    args = parser.parse_args()
+
+    spec = SyntheticScoreSpec(**{field.name: getattr(args, field.name) for field in fields(SyntheticScoreSpec)})
+    if args.generate:
+        write_synthetic_score(spec, args.generate)
+        print(f"wrote {args.generate}")
+        sys.exit(0)
+
+    modes, entries = _split(args.modes), _split(args.entries)
+    unknown = [m for m in modes if m not in MODES] + [e for e in entries if e not in ENTRY_POINTS]
+    if unknown:
+        parser.error(f"unknown mode or entry point: {', '.join(unknown)}")
+
+    if args.scaling:
+        axes = _split(args.axes)
+        unknown = [a for a in axes if a not in SCALING_AXES]
+        if unknown:
+            parser.error(f"unknown axis: {', '.join(unknown)}")
+        # default-grade mode unless --modes leaves it out
+        mode = "default" if "default" in modes else modes[0]
+        scaling = run_scaling(
+            spec,
+            axes,
+            mode=mode,
+            repeat=max(1, args.repeat),
+            reader=args.score_reader,
+            log=lambda axis, point: print(_format_point(axis, point), flush=True),
+        )
+        for axis, data in scaling["axes"].items():
+            print(f"{axis}: wall slopes {data['exponents']['wall']}, rss slopes {data['exponents']['rss_growth_mb']}")
+        for h in scaling["hot_spots"]:
+            print(f"SUPER-LINEAR {h['axis']} {h['metric']}: {h['from']} -> {h['to']} (exponent {h['exponent']})")
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as fh:
+                json.dump(scaling, fh, indent=2)
+        if args.plot:
+            try:
+                plot_scaling(scaling, args.plot)
+            except RuntimeError as exc:
+                parser.error(str(exc))
+            print(f"plot written to {args.plot}")
+        sys.exit(0)
+
+    score_paths = sorted(glob.glob(os.path.join(args.input_dir, "*.musicxml")))
+    if args.files:
+        wanted = _split(args.files)
+        score_paths = [p for p in score_paths if any(w in os.path.basename(p) for w in wanted)]
+    if not score_paths:
+        parser.error("no scores to benchmark")
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+
+    current = run_benchmarks(
+        score_paths,
+        modes,
+        entries,
+        repeat=max(1, args.repeat),
+        reader=args.score_reader,
+        log=lambda key, metrics: print(_format_case(key, metrics, baseline), flush=True),
+    )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(current, fh, indent=2)
+
+    if args.save_baseline:
+        if os.path.exists(args.baseline):
+            # keep cases this run did not cover
+            with open(args.baseline, encoding="utf-8") as fh:
+                stored = json.load(fh)
+            current["cases"] = {**stored.get("cases", {}), **current["cases"]}
+        with open(args.baseline, "w", encoding="utf-8") as fh:
+            json.dump(current, fh, indent=2, sort_keys=True)
+        print(f"baseline saved to {args.baseline}")
+        sys.exit(0)
+
+    if baseline is None:
+        print(f"no baseline at {args.baseline}; run with --save-baseline to record one")
+        sys.exit(0)
+
+    if baseline.get("machine") != current["machine"]:
+        print("note: the baseline was recorded on a different machine")
+    regressions = compare(current, baseline, args.tolerance)
+    for r in regressions:
+        print(f"REGRESSION {r['case']} {r['metric']}: {r['baseline']} -> {r['current']}")
+    print(f"{len(current['cases'])} cases, {len(regressions)} regressions")
+    sys.exit(1 if regressions else 0)
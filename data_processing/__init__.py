@@ -1,9 +1,13 @@
 from .build_instrument_data import build_instrument_data
-from .derive_observed_grades import derive_observed_grades
+from .derive_observed_grades import derive_observed_grades, make_grade_executor
+from .synthetic_score import synthetic_score_xml, write_synthetic_score
 from .unpack_tables import unpack_source_grade_table
 
 __all__ = [
     "build_instrument_data",
     "derive_observed_grades",
+    "make_grade_executor",
+    "synthetic_score_xml",
     "unpack_source_grade_table",
+    "write_synthetic_score",
 ]
@@ -1,27 +1,44 @@
 from __future__ import annotations
-from typing import Callable, Dict, Optional, Tuple
-from app_data import GRADES
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Sequence, Tuple
+from app_data import ANALYZER_VERSION, GRADES
+from utilities.tracing import current_tracer, record_timing, span, timed_call
 
 
 def derive_observed_grades(
     *,
-    score_factory: Callable[[], object],
-    analyze_confidence: Callable[[object, float], Optional[float]],
+    score: object,
+    analyze_confidence: Optional[Callable[[object, float], Optional[float]]] = None,
     grades=GRADES,
     flat_threshold: float = 0.97,
     flat_epsilon: float = 0.02,
     progress_cb: Optional[Callable[..., None]] = None,
+    extract_features: Optional[Callable[[object], object]] = None,
+    analyze_curve: Optional[Callable[[object, Sequence[float]], Sequence[Optional[float]]]] = None,
+    executor: Optional[Executor] = None,
+    curve_cache=None,
+    curve_key: Optional[tuple] = None,
 ) -> Tuple[Optional[float], Dict[float, Optional[float]]]:
     """
     Runs confidence-only analysis for each grade and derives an observed grade.
 
     Parameters
     ----------
-    score_factory:
-        A callable that returns a *fresh* score each time (re-parse or clone).
-        (Important: avoids cross-grade mutation / caching issues.)
+    score:
+        The read-only ScoreIR shared by every grade. analyze_confidence must
+        not mutate it; per-grade state belongs in the objects it builds.
     analyze_confidence:
         Function(score, grade) -> confidence (0..1) or None
+    extract_features:
+        Optional grade-invariant pass (BaseAnalyzer.extract_features). When given it
+        runs once, and analyze_confidence receives its features instead of the score.
+    analyze_curve:
+        Optional alternative to analyze_confidence that scores every grade in one
+        call: Function(score, grades) -> confidences in the same order as grades.
+    executor:
+        Optional thread/process pool for the per-grade sweep. Results are merged in
+        grade order and progress_cb still fires in grade order. With a process pool,
+        analyze_confidence and the (extracted) score must be picklable.
     flat_threshold:
         Minimum confidence level to consider the piece "easy enough" across grades.
     flat_epsilon:
@@ -34,11 +51,66 @@ def derive_observed_grades(
     """
 
     confidences: Dict[float, Optional[float]] = {}
-
     total = len(grades)
+
+    cache_key = None
+    content_hash = getattr(score, "content_hash", None)
+    if curve_cache is not None and curve_key is not None and content_hash is not None:
+        cache_key = repr((
+            content_hash,
+            ANALYZER_VERSION,
+            curve_key,
+            tuple(float(g) for g in grades),
+            flat_threshold,
+            flat_epsilon,
+        ))
+        values = curve_cache.get(cache_key)
+        if values is not None:
+            for idx, grade in enumerate(grades, start=1):
+                confidences[grade] = values[idx - 1]
+                if progress_cb is not None:
+                    progress_cb(float(grade), idx, total)
+            observed = _derive_observed_grade(
+                confidences,
+                flat_threshold=flat_threshold,
+                flat_epsilon=flat_epsilon,
+            )
+            return observed, confidences
+
+    if extract_features is not None:
+        with span("extract_features"):
+            score = extract_features(score)
+
+    if analyze_curve is None and analyze_confidence is None:
+        raise ValueError("analyze_confidence or analyze_curve is required")
+
+    curve = None
+    if analyze_curve is not None:
+        with span("score_curve", grades=total):
+            curve = analyze_curve(score, [float(g) for g in grades])
+
+    futures = None
+    timed = False
+    if curve is None and executor is not None:
+        # pool workers are out of the tracer's reach; they report their own timings
+        timed = current_tracer() is not None
+        if timed:
+            futures = [executor.submit(timed_call, analyze_confidence, score, float(g)) for g in grades]
+        else:
+            futures = [executor.submit(analyze_confidence, score, float(g)) for g in grades]
+
     for idx, grade in enumerate(grades, start=1):
-        score = score_factory()
-        confidences[grade] = analyze_confidence(score, float(grade))
+        if curve is not None:
+            confidences[grade] = curve[idx - 1]
+        elif futures is not None:
+            if timed:
+                confidences[grade], timing = futures[idx - 1].result()
+                record_timing("score_grade", timing, grade=float(grade))
+            else:
+                confidences[grade] = futures[idx - 1].result()
+        else:
+            with span("score_grade", grade=float(grade)):
+                confidences[grade] = analyze_confidence(score, float(grade))
         if progress_cb is not None:
             progress_cb(float(grade), idx, total)
 
@@ -47,9 +119,25 @@ def derive_observed_grades(
         flat_threshold=flat_threshold,
         flat_epsilon=flat_epsilon,
     )
+    if cache_key is not None:
+        curve_cache.put(cache_key, [confidences[g] for g in grades])
     return observed, confidences
 
 
+def make_grade_executor(kind: str = "serial", max_workers: Optional[int] = None) -> Optional[Executor]:
+    """
+    Executor for derive_observed_grades' grade sweep: None for "serial",
+    otherwise a "thread" or "process" pool. The caller owns shutdown.
+    """
+    if kind == "serial":
+        return None
+    if kind == "thread":
+        return ThreadPoolExecutor(max_workers=max_workers)
+    if kind == "process":
+        return ProcessPoolExecutor(max_workers=max_workers)
+    raise ValueError(f"Unknown grade executor kind: {kind!r}")
+
+
 def _derive_observed_grade(
     confidences: Dict[float, Optional[float]],
     *,
@@ -0,0 +1,226 @@
+"""
+Synthetic MusicXML for scaling tests: valid partwise scores whose part count,
+length, voices, tuplets, chords and meter/key/tempo changes are set by a
+SyntheticScoreSpec. The same spec and seed always give the same file.
+"""
+from __future__ import annotations
+
+import random
+
+from models import SyntheticScoreSpec
+
+DIVISIONS = 12  # per quarter; covers sixteenths and eighth-note triplets
+
+# name, clef (sign, line), written range (MIDI), transposition (diatonic, chromatic, octave) or None,
+# and the fifths its written key sits above concert
+INSTRUMENTS = (
+    ("Flute", ("G", 2), (62, 91), None, 0),
+    ("Oboe", ("G", 2), (60, 86), None, 0),
+    ("Clarinet in Bb", ("G", 2), (55, 86), (-1, -2, 0), 2),
+    ("Bassoon", ("F", 4), (36, 67), None, 0),
+    ("Alto Saxophone", ("G", 2), (58, 86), (-5, -9, 0), 3),
+    ("Horn in F", ("G", 2), (55, 79), (-4, -7, 0), 1),
+    ("Trumpet in Bb", ("G", 2), (55, 82), (-1, -2, 0), 2),
+    ("Trombone", ("F", 4), (40, 70), None, 0),
+    ("Euphonium", ("F", 4), (40, 70), None, 0),
+    ("Tuba", ("F", 4), (29, 58), None, 0),
+    ("Violin", ("G", 2), (55, 93), None, 0),
+    ("Viola", ("C", 3), (48, 79), None, 0),
+    ("Cello", ("F", 4), (36, 69), None, 0),
+    ("Double Bass", ("F", 4), (40, 67), (0, 0, -1), 0),
+)
+
+METERS = ((3, 4), (2, 4), (6, 8), (5, 4), (7, 8), (4, 4))
+DYNAMICS = ("pp", "p", "mp", "mf", "f", "ff")
+ARTICULATIONS = ("staccato", "accent", "tenuto")
+SHARP_SPELLING = (("C", 0), ("C", 1), ("D", 0), ("D", 1), ("E", 0), ("F", 0), ("F", 1), ("G", 0), ("G", 1), ("A", 0), ("A", 1), ("B", 0))
+FLAT_SPELLING = (("C", 0), ("D", -1), ("D", 0), ("E", -1), ("E", 0), ("F", 0), ("G", -1), ("G", 0), ("A", -1), ("A", 0), ("B", -1), ("B", 0))
+MAJOR_STEPS = (0, 2, 4, 5, 7, 9, 11)
+
+# (divisions, type, dots) patterns filling one quarter-note beat
+QUARTER_BEATS = (
+    ((12, "quarter", 0),),
+    ((6, "eighth", 0), (6, "eighth", 0)),
+    ((3, "16th", 0),) * 4,
+    ((9, "eighth", 1), (3, "16th", 0)),
+    ((6, "eighth", 0), (3, "16th", 0), (3, "16th", 0)),
+)
+TRIPLET_BEAT = ((4, "eighth", 0),) * 3
+EIGHTH_BEATS = (((6, "eighth", 0),), ((3, "16th", 0), (3, "16th", 0)))
+
+
+def _change_points(count: int, measures: int) -> list[int]:
+    """count measure numbers spread evenly after the first."""
+    count = max(0, min(count, measures - 1))
+    return sorted({2 + (i * (measures - 1)) // count for i in range(count)}) if count else []
+
+
+def _wrap_fifths(fifths: int) -> int:
+    while fifths > 7:
+        fifths -= 12
+    while fifths < -7:
+        fifths += 12
+    return fifths
+
+
+def _scale(fifths: int) -> frozenset:
+    tonic = (fifths * 7) % 12
+    return frozenset((tonic + step) % 12 for step in MAJOR_STEPS)
+
+
+def _pitch_xml(midi: int, fifths: int) -> str:
+    step, alter = (FLAT_SPELLING if fifths < 0 else SHARP_SPELLING)[midi % 12]
+    octave = midi // 12 - 1
+    alter_xml = f"<alter>{alter}</alter>" if alter else ""
+    return f"<pitch><step>{step}</step>{alter_xml}<octave>{octave}</octave></pitch>"
+
+
+class _Voice:
+    """A random walk through the current key, inside the instrument's middle range."""
+
+    def __init__(self, rng, low, high):
+        self.rng = rng
+        self.low = low
+        self.high = high
+        self.midi = (low + high) // 2
+
+    def next_pitch(self, scale) -> int:
+        midi = self.midi + self.rng.choice((-4, -3, -2, -1, 1, 2, 3, 4))
+        if midi < self.low or midi > self.high:
+            midi = self.midi - (midi - self.midi)
+        midi = min(max(midi, self.low), self.high)
+        while midi % 12 not in scale:
+            midi += 1 if midi < self.high else -1
+        self.midi = midi
+        return midi
+
+
+def _beats(beats: int, beat_type: int):
+    """Per-beat division counts for one measure of beats/beat_type."""
+    if beat_type == 8:
+        return [6] * beats
+    return [48 // beat_type] * beats
+
+
+def _voice_xml(out, rng, spec, voice, voice_no, beats, beat_type, fifths, scale):
+    for beat in _beats(beats, beat_type):
+        if beat == 6:
+            pattern = rng.choice(EIGHTH_BEATS)
+        elif beat == 12 and rng.random() < spec.tuplet_density:
+            pattern = TRIPLET_BEAT
+        elif beat == 12:
+            pattern = rng.choice(QUARTER_BEATS if voice_no == 1 else QUARTER_BEATS[:2])
+        else:
+            pattern = ((beat, "half" if beat == 24 else "whole", 0),)
+        triplet = pattern is TRIPLET_BEAT
+        rest = rng.random() < 0.08
+        for idx, (duration, kind, dots) in enumerate(pattern):
+            dot_xml = "<dot/>" * dots
+            tuplet_mod = "<time-modification><actual-notes>3</actual-notes><normal-notes>2</normal-notes></time-modification>" if triplet else ""
+            if rest:
+                out.append(
+                    f"<note><rest/><duration>{duration}</duration><voice>{voice_no}</voice>"
+                    f"<type>{kind}</type>{dot_xml}{tuplet_mod}</note>"
+                )
+                continue
+            notations = []
+            if triplet and idx in (0, len(pattern) - 1):
+                notations.append(f'<tuplet type="{"start" if idx == 0 else "stop"}"/>')
+            if rng.random() < 0.1:
+                notations.append(f"<articulations><{rng.choice(ARTICULATIONS)}/></articulations>")
+            notation_xml = f"<notations>{''.join(notations)}</notations>" if notations else ""
+            midi = voice.next_pitch(scale)
+            out.append(
+                f"<note>{_pitch_xml(midi, fifths)}<duration>{duration}</duration><voice>{voice_no}</voice>"
+                f"<type>{kind}</type>{dot_xml}{tuplet_mod}{notation_xml}</note>"
+            )
+            if rng.random() < spec.chord_density:
+                for interval in rng.choice(((4,), (3,), (4, 7), (3, 7))):
+                    chord_midi = min(midi + interval, voice.high + 7)
+                    out.append(
+                        f"<note><chord/>{_pitch_xml(chord_midi, fifths)}<duration>{duration}</duration>"
+                        f"<voice>{voice_no}</voice><type>{kind}</type>{dot_xml}{tuplet_mod}</note>"
+                    )
+
+
+def synthetic_score_xml(spec: SyntheticScoreSpec) -> str:
+    rng = random.Random(spec.seed)
+    meter_points = set(_change_points(spec.meter_changes, spec.measures))
+    key_points = set(_change_points(spec.key_changes, spec.measures))
+    tempo_points = set(_change_points(spec.tempo_changes, spec.measures))
+
+    # the score-wide timeline, shared by every part
+    meters, keys, tempos = {}, {}, {}
+    meter, key, tempo = (4, 4), 0, 100
+    for number in range(1, spec.measures + 1):
+        if number in meter_points:
+            meter = rng.choice([m for m in METERS if m != meter])
+        if number in key_points:
+            key = rng.choice([k for k in range(-4, 5) if k != key])
+        if number in tempo_points:
+            tempo = rng.choice([t for t in range(60, 172, 8) if t != tempo])
+        meters[number], keys[number], tempos[number] = meter, key, tempo
+
+    parts = [INSTRUMENTS[i % len(INSTRUMENTS)] for i in range(spec.parts)]
+    out = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="no"?>',
+        '<!DOCTYPE score-partwise PUBLIC "-//Recordare//DTD MusicXML 4.0 Partwise//EN" "http://www.musicxml.org/dtds/partwise.dtd">',
+        '<score-partwise version="4.0">',
+        f"<work><work-title>Synthetic {spec.parts}x{spec.measures} (seed {spec.seed})</work-title></work>",
+        "<part-list>",
+    ]
+    for idx, (name, *_rest) in enumerate(parts, start=1):
+        out.append(f'<score-part id="P{idx}"><part-name>{name}</part-name></score-part>')
+    out.append("</part-list>")
+
+    for idx, (name, (clef_sign, clef_line), (low, high), transpose, key_offset) in enumerate(parts, start=1):
+        span = high - low
+        voices = [_Voice(rng, low + span // 4, high - span // 4) for _ in range(max(1, spec.voices))]
+        out.append(f'<part id="P{idx}">')
+        for number in range(1, spec.measures + 1):
+            beats, beat_type = meters[number]
+            fifths = _wrap_fifths(keys[number] + key_offset)
+            scale = _scale(fifths)
+            out.append(f'<measure number="{number}">')
+
+            attributes = []
+            if number == 1:
+                attributes.append(f"<divisions>{DIVISIONS}</divisions>")
+            if number == 1 or number in key_points:
+                attributes.append(f"<key><fifths>{fifths}</fifths><mode>major</mode></key>")
+            if number == 1 or number in meter_points:
+                attributes.append(f"<time><beats>{beats}</beats><beat-type>{beat_type}</beat-type></time>")
+            if number == 1:
+                attributes.append(f"<clef><sign>{clef_sign}</sign><line>{clef_line}</line></clef>")
+                if transpose is not None:
+                    diatonic, chromatic, octave = transpose
+                    octave_xml = f"<octave-change>{octave}</octave-change>" if octave else ""
+                    attributes.append(f"<transpose><diatonic>{diatonic}</diatonic><chromatic>{chromatic}</chromatic>{octave_xml}</transpose>")
+            if attributes:
+                out.append(f"<attributes>{''.join(attributes)}</attributes>")
+
+            if idx == 1 and (number == 1 or number in tempo_points):
+                out.append(
+                    '<direction placement="above"><direction-type><metronome><beat-unit>quarter</beat-unit>'
+                    f"<per-minute>{tempos[number]}</per-minute></metronome></direction-type>"
+                    f'<sound tempo="{tempos[number]}"/></direction>'
+                )
+            if number == 1 or rng.random() < 0.1:
+                out.append(f"<direction><direction-type><dynamics><{rng.choice(DYNAMICS)}/></dynamics></direction-type></direction>")
+
+            measure_length = sum(_beats(beats, beat_type))
+            for voice_no, voice in enumerate(voices, start=1):
+                if voice_no > 1:
+                    out.append(f"<backup><duration>{measure_length}</duration></backup>")
+                _voice_xml(out, rng, spec, voice, voice_no, beats, beat_type, fifths, scale)
+            out.append("</measure>")
+        out.append("</part>")
+    out.append("</score-partwise>")
+    return "\n".join(out)
+
+
+def write_synthetic_score(spec: SyntheticScoreSpec, path: str) -> str:
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(synthetic_score_xml(spec))
+    return path
+
@@ -1,9 +1,8 @@
-import json
+import hmac
 import os
-import queue
-import threading
 import tempfile
 import uuid
+from functools import lru_cache, partial
 
 from flask import Flask, Response, jsonify, request, stream_with_context, send_from_directory
 from werkzeug.utils import secure_filename
@@ -11,23 +10,46 @@ from werkzeug.utils import secure_filename
 from app_data import FULL_GRADES, GRADES
 from models import AnalysisOptions
 from run_analysis import run_analysis_engine
+from utilities import (
+    SSE_HEARTBEAT,
+    JobScheduler,
+    JobStore,
+    QueueFull,
+    Tracer,
+    chrome_trace,
+    compress_stream,
+    default_result_cache,
+    dumps,
+    encode_result,
+    format_sse,
+    hash_file,
+    iter_ndjson,
+    iter_result_json,
+    negotiate_encoding,
+    result_cache_key,
+    shared_curve_cache,
+)
 
 app = Flask(__name__, static_folder="html")
 
-JOBS = {}
 UPLOAD_DIR = tempfile.mkdtemp(prefix="score_uploads_")
-
-
-def make_json_safe(value):
-    if isinstance(value, dict):
-        return {str(key): make_json_safe(val) for key, val in value.items()}
-    if isinstance(value, (list, tuple, set)):
-        return [make_json_safe(item) for item in value]
-    if isinstance(value, (str, int, float, bool)) or value is None:
-        return value
-    if hasattr(value, "__dict__"):
-        return make_json_safe(vars(value))
-    return str(value)
+# ANALYSIS_TRACE=1 records timing spans for every job, not just those that ask
+TRACE_ALL_JOBS = os.environ.get("ANALYSIS_TRACE", "").strip().lower() in {"1", "true", "yes", "on"}
+SSE_HEARTBEAT_SECONDS = float(os.environ.get("SSE_HEARTBEAT", "15"))
+# finished jobs are kept for JOB_TTL seconds, at most JOB_MAX_ENTRIES of them;
+# their results are spilled to JOB_SPILL_DIR
+JOBS = JobStore(
+    os.environ.get("JOB_SPILL_DIR") or tempfile.mkdtemp(prefix="score_results_"),
+    max_entries=int(os.environ.get("JOB_MAX_ENTRIES", "128")),
+    ttl_seconds=float(os.environ.get("JOB_TTL", "3600")),
+)
+
+
+def parse_last_event_id(value) -> int:
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return 0
 
 
 def parse_bool(value) -> bool:
@@ -48,46 +70,115 @@ def static_files(filename):
     return send_from_directory("html", filename)
 
 
-def _run_job(job_id, payload):
-    job = JOBS[job_id]
-    q = job["queue"]
+def _analysis_args(payload) -> tuple:
+    target_only = parse_bool(payload.get("target_only"))
+    strings_only = parse_bool(payload.get("strings_only"))
+    full_grade = parse_bool(payload.get("full_grade_analysis"))
+    score_path = payload.get("score_path")
+    target_grade = float(payload.get("target_grade", 2))
+    trace = TRACE_ALL_JOBS or parse_bool(payload.get("trace"))
+    reconciled_notes = parse_bool(payload.get("reconciled_notes"))
+    observed_grades = None
+
+    if target_only is False:
+        observed_grades = FULL_GRADES if full_grade else GRADES
+    options = AnalysisOptions(
+        run_observed=not target_only,
+        string_only=strings_only,
+        observed_grades=observed_grades,
+        reconciled_notes=reconciled_notes,
+    )
+    return score_path, target_grade, options, trace
+
+
+def _job_priority(payload) -> int:
+    # target-only jobs finish quickly, so they jump ahead of observed-grade sweeps
+    if parse_bool(payload.get("target_only")):
+        return 0
+    return 2 if parse_bool(payload.get("full_grade_analysis")) else 1
+
+
+def _analyze_job(score_path, target_grade, options, trace=False, progress_cb=None, curve_cache=None):
+    # runs in a scheduler worker; the result crosses back already encoded
+    tracer = None
+    if trace and progress_cb is not None:
+        # spans travel with the progress events, so they reach SSE and /api/trace
+        tracer = Tracer(on_span=lambda s: progress_cb({"type": "span", **s}))
+    result = run_analysis_engine(
+        score_path,
+        target_grade,
+        analysis_options=options,
+        progress_cb=progress_cb,
+        curve_cache=curve_cache,
+        tracer=tracer,
+    )
+    return encode_result(result)
+
+
+def _result_key(args) -> str | None:
+    # the result cache lives in the web process, keyed like run_analysis_cached
+    # but holding encode_result chunks; worker processes would each have their own
+    if default_result_cache() is None:
+        return None
+    score_path, target_grade, options, _ = args
+    try:
+        return result_cache_key(hash_file(score_path), target_grade, options)
+    except OSError:
+        return None  # the job reports the missing score
 
-    def progress_cb(event):
-        q.put(event)
 
-    try:
-        target_only = parse_bool(payload.get("target_only"))
-        strings_only = parse_bool(payload.get("strings_only"))
-        full_grade = parse_bool(payload.get("full_grade_analysis"))
-        score_path = payload.get("score_path")
-        target_grade = float(payload.get("target_grade", 2))
-        observed_grades = None
-
-        if target_only is False:
-            observed_grades = FULL_GRADES if full_grade else GRADES
-        options = AnalysisOptions(
-            run_observed=not target_only,
-            string_only=strings_only,
-            observed_grades=observed_grades,
-        )
-
-        result = run_analysis_engine(
-            score_path,
-            target_grade,
-            analysis_options=options,
-            progress_cb=progress_cb,
-        )
-        job["result"] = result
-    except Exception as exc:
-        job["error"] = str(exc)
-    finally:
-        job["done"] = True
-        q.put({"type": "done"})
+def _job_event(job_id, event):
+    if event.get("type") == "parsed":
+        JOBS.release_upload(job_id)
+    job = JOBS.get(job_id)
+    # the engine's own "done" can overtake the result; _job_done sends the real one
+    if job is not None and event.get("type") != "done":
+        job["events"].publish(event)
+
+
+def _job_done(job_id, result, error, *, cache_hit=False):
+    if error is not None:
+        job = JOBS.finish(job_id, error=str(error))
+    else:
+        job = JOBS.get(job_id)
+        if job is not None and job["result_key"] is not None and not cache_hit:
+            default_result_cache().put(job["result_key"], result)
+        job = JOBS.finish(job_id, result, cache_hit=cache_hit)
+    if job is not None:
+        job["events"].publish({"type": "done"})
+        job["events"].close()
+
+
+@lru_cache(maxsize=1)
+def job_scheduler() -> JobScheduler:
+    """
+    Process-wide analysis scheduler configured by JOB_WORKERS (default: CPU count),
+    JOB_QUEUE_SIZE (jobs allowed to wait before /api/analyze answers 429, default 16)
+    and JOB_EXECUTOR ("process" or "thread"). Unless CURVE_CACHE is set, worker
+    processes are handed shared_curve_cache(), so they share observed-grade curves.
+    """
+    executor = os.environ.get("JOB_EXECUTOR", "process").strip().lower()
+    job = _analyze_job
+    if executor == "process" and "CURVE_CACHE" not in os.environ:
+        # default_curve_cache() would be in memory, i.e. private to each worker
+        curve_cache = shared_curve_cache()
+        if curve_cache is not None:
+            app.logger.info("Worker processes share observed-grade curves through %s", curve_cache.path)
+            job = partial(_analyze_job, curve_cache=curve_cache)
+    return JobScheduler(
+        job,
+        on_event=_job_event,
+        on_done=_job_done,
+        workers=int(os.environ.get("JOB_WORKERS") or os.cpu_count() or 1),
+        max_pending=int(os.environ.get("JOB_QUEUE_SIZE", "16")),
+        executor=executor,
+    )
 
 
 @app.post("/api/analyze")
 def analyze():
     payload = {}
+    save_path = None
     if request.content_type and request.content_type.startswith("multipart/form-data"):
         form = request.form
         uploaded = request.files.get("score_file")
@@ -101,21 +192,43 @@ def analyze():
         payload["target_only"] = form.get("target_only") == "true"
         payload["strings_only"] = form.get("strings_only") == "true"
         payload["full_grade_analysis"] = form.get("full_grade_analysis") == "true"
+        payload["trace"] = form.get("trace") == "true"
+        payload["reconciled_notes"] = form.get("reconciled_notes") == "true"
         if form.get("target_grade"):
             payload["target_grade"] = float(form.get("target_grade"))
     else:
         payload = request.get_json(force=True, silent=True) or {}
 
+    args, error = None, None
     if not payload.get("score_path") or "target_grade" not in payload:
-        return jsonify({"error": "Missing score or target grade."}), 400
+        error = "Missing score or target grade."
+    else:
+        try:
+            args = _analysis_args(payload)
+        except (TypeError, ValueError):
+            error = "Invalid target grade."
+    if error is not None:
+        if save_path:
+            os.remove(save_path)
+        return jsonify({"error": error}), 400
 
     job_id = str(uuid.uuid4())
-    JOBS[job_id] = {"queue": queue.Queue(), "result": None, "error": None, "done": False}
+    job = JOBS.create(job_id, upload_path=save_path, result_key=_result_key(args))
+    if job["result_key"] is not None:
+        cached = default_result_cache().get(job["result_key"])
+        if cached is not None:
+            _job_done(job_id, cached, None, cache_hit=True)
+            return jsonify({"job_id": job_id, "position": 0})
 
-    thread = threading.Thread(target=_run_job, args=(job_id, payload), daemon=True)
-    thread.start()
+    try:
+        position = job_scheduler().submit(job_id, args, priority=_job_priority(payload))
+    except QueueFull:
+        JOBS.discard(job_id)
+        response = jsonify({"error": "The server is busy; try again shortly."})
+        response.headers["Retry-After"] = "30"
+        return response, 429
 
-    return jsonify({"job_id": job_id})
+    return jsonify({"job_id": job_id, "position": position})
 
 
 @app.get("/api/progress/<job_id>")
@@ -124,34 +237,95 @@ def progress(job_id):
     if not job:
         return jsonify({"error": "Unknown job"}), 404
 
-    q = job["queue"]
+    last_event_id = parse_last_event_id(request.headers.get("Last-Event-ID"))
 
     def generate():
-        while True:
-            try:
-                event = q.get(timeout=0.5)
-            except queue.Empty:
-                if job.get("done"):
-                    break
-                continue
-            yield f"data: {json.dumps(event)}\n\n"
-            if event.get("type") == "done":
-                break
+        for item in job["events"].subscribe(last_event_id, heartbeat=SSE_HEARTBEAT_SECONDS):
+            yield SSE_HEARTBEAT if item is None else format_sse(*item)
 
-    return Response(stream_with_context(generate()), mimetype="text/event-stream")
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
 
 
 @app.get("/api/result/<job_id>")
 def result(job_id):
+    """
+    The job's result, streamed from its spill file. ?format=ndjson (or an
+    Accept of application/x-ndjson) sends a status line, the summary, then
+    the notes per analyzer per part; otherwise one JSON object.
+    """
+    job = JOBS.get(job_id)
+    if not job:
+        return jsonify({"error": "Unknown job"}), 404
+
+    status = {"done": job["done"], "error": job["error"], "cache_hit": job["cache_hit"]}
+    ndjson = request.args.get("format") == "ndjson" or "application/x-ndjson" in request.headers.get("Accept", "")
+    fh = JOBS.open_result(job)
+
+    def generate():
+        try:
+            if ndjson:
+                yield dumps({"type": "status", **status}) + b"\n"
+                if fh is not None:
+                    yield from iter_ndjson(fh)
+            else:
+                yield dumps(status)[:-1] + b',"result":'
+                body = iter_result_json(fh, job["result_index"]) if fh is not None else ()
+                empty = True
+                for block in body:
+                    empty = False
+                    yield block
+                yield b"null}" if empty else b"}"
+        finally:
+            if fh is not None:
+                fh.close()
+
+    encoding = negotiate_encoding(request.headers.get("Accept-Encoding"))
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(
+        stream_with_context(compress_stream(generate(), encoding)),
+        mimetype="application/x-ndjson" if ndjson else "application/json",
+        headers=headers,
+    )
+
+
+@app.get("/api/trace/<job_id>")
+def trace(job_id):
+    """The job's timing spans as a Chrome trace-event file (chrome://tracing, Perfetto)."""
     job = JOBS.get(job_id)
     if not job:
         return jsonify({"error": "Unknown job"}), 404
-    payload = {
-        "done": job["done"],
-        "error": job["error"],
-        "result": job["result"],
-    }
-    return jsonify(make_json_safe(payload))
+    spans = [event for event in job["events"].events if event.get("type") == "span"]
+    if not spans:
+        return jsonify({"error": "No trace recorded for this job"}), 404
+    response = jsonify(chrome_trace(spans))
+    response.headers["Content-Disposition"] = f'attachment; filename="{job_id}.trace.json"'
+    return response
+
+
+@app.get("/api/jobs")
+def jobs():
+    # admin view, off unless JOBS_ADMIN_TOKEN is set and sent in the X-Admin-Token
+    # header: job ids are the only access control on results, events and traces
+    token = os.environ.get("JOBS_ADMIN_TOKEN")
+    if not token or not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), token):
+        return jsonify({"error": "Forbidden"}), 403
+    scheduler = job_scheduler()
+    rows = JOBS.stats()
+    return jsonify(
+        {
+            "jobs": rows,
+            "memory_bytes": sum(row["memory_bytes"] for row in rows),
+            "result_bytes": sum(row["result_bytes"] for row in rows),
+            "running": scheduler.running,
+            "pending": scheduler.pending,
+        }
+    )
 
 
 if __name__ == "__main__":
@@ -422,6 +422,50 @@ function initGradeOptions() {
   sync();
 }
 
+// Reads /api/result as NDJSON: a status line, the summary, then the notes per
+// analyzer (and part). onSummary gets the result as soon as the summary is in;
+// the promise resolves to the same object once every note has arrived.
+async function fetchResultStream(url, onSummary) {
+  const response = await fetch(url, { headers: { Accept: "application/x-ndjson" } });
+  if (!response.ok) throw new Error(`HTTP ${response.status}`);
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  const result = { done: false, error: null, cache_hit: false, result: null };
+  let buffered = "";
+
+  const handle = (line) => {
+    if (!line.trim()) return;
+    const item = JSON.parse(line);
+    if (item.type === "status") {
+      result.done = item.done;
+      result.error = item.error;
+      result.cache_hit = item.cache_hit;
+    } else if (item.type === "summary") {
+      result.result = { ...item.data, analysis_notes: {} };
+      if (onSummary) onSummary(result);
+    } else if (item.type === "notes" && result.result) {
+      const notes = result.result.analysis_notes;
+      if ("part" in item) {
+        notes[item.analyzer] = notes[item.analyzer] || {};
+        notes[item.analyzer][item.part] = item.data;
+      } else {
+        notes[item.analyzer] = item.data;
+      }
+    }
+  };
+
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffered += decoder.decode(value, { stream: true });
+    const lines = buffered.split("\n");
+    buffered = lines.pop();
+    lines.forEach(handle);
+  }
+  handle(buffered + decoder.decode());
+  return result;
+}
+
 function initAnalysisRequest() {
   const API_BASE = "http://127.0.0.1:5000";
   window.analysisResult = null;
@@ -574,7 +618,11 @@ function initAnalysisRequest() {
     const es = new EventSource(`${API_BASE}/api/progress/${jobId}`);
     es.onmessage = (evt) => {
       const data = JSON.parse(evt.data);
-      if (data.type === "observed") {
+      if (data.type === "queued") {
+        if (progressText) progressText.textContent = `Queued (position ${data.position})...`;
+      } else if (data.type === "started") {
+        if (progressText) progressText.textContent = "Starting analysis...";
+      } else if (data.type === "observed") {
         const pct = data.total ? Math.round((data.idx / data.total) * 100) : 0;
         const analyzerKey =
           data.analyzer === "key_range" && data.label
@@ -647,15 +695,15 @@ function initAnalysisRequest() {
         if (progressOkBtn) progressOkBtn.disabled = false;
         if (timerId) clearInterval(timerId);
         es.close();
-        fetch(`${API_BASE}/api/result/${jobId}`)
-          .then((r) => r.json())
+        fetchResultStream(`${API_BASE}/api/result/${jobId}?format=ndjson`, (result) => {
+          // summary and confidences arrive before the notes
+          window.analysisResult = result;
+          setTimelineLabels(result?.result?.total_measures ?? 0, result?.result?.duration ?? 0);
+        })
           .then((result) => {
             window.analysisResult = result;
 
             const totalMeasures = result?.result?.total_measures ?? 0;
-            const durationString = result?.result?.duration ?? 0;
-
-            setTimelineLabels(totalMeasures, durationString);
 
             const ticks = prepareTimelineTicks();
             console.log("ticks:", ticks);
@@ -668,7 +716,9 @@ function initAnalysisRequest() {
     };
 
     es.onerror = () => {
-      es.close();
+      // the browser reconnects with Last-Event-ID and the server replays what
+      // was missed; only a stream the browser gave up on is lost
+      if (es.readyState !== EventSource.CLOSED) return;
       if (progressText) progressText.textContent = "Connection lost.";
       if (timerId) clearInterval(timerId);
       console.warn("Progress stream error; analysisResult not set yet.");
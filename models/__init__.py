@@ -2,11 +2,27 @@ from .base_analyzer import BaseAnalyzer
 from .articulation_grade_rules import ArticulationGradeRules
 from .duration_data import DurationData, DurationGradeBucket
 from .analysis_options import AnalysisOptions
+from .analysis_snapshot import AnalysisSnapshot, MeasureAnalysis, PartAnalysis
 from .instrument_data import InstrumentData
 from .key_data import KeyData
 from .meter_data import MeterData
-from .partial_note_data import PartialNoteData
+from .note_table import NoteRow, NoteTable, NoteTableBuilder
+from .range_features import RangeFeatures
+from .range_table import RangeTable
+from .rhythm_features import RhythmFeatures
 from .rhythm_grade_rules import RhythmGradeRules
+from .rhythm_rule_matrix import RhythmRuleMatrix
+from .score_ir import (
+    DynamicMarkIR,
+    KeySignatureIR,
+    MeasureIR,
+    NoteEvent,
+    PartIR,
+    ScoreIR,
+    TempoMarkIR,
+    TimeSignatureIR,
+)
+from .synthetic_score_spec import SyntheticScoreSpec
 from .tempo_data import TempoData
 
 __all__ = [
@@ -14,11 +30,29 @@ __all__ = [
     "BaseAnalyzer",
     "DurationData",
     "DurationGradeBucket",
+    "DynamicMarkIR",
     "AnalysisOptions",
+    "AnalysisSnapshot",
     "InstrumentData",
     "KeyData",
+    "KeySignatureIR",
+    "MeasureAnalysis",
+    "MeasureIR",
     "MeterData",
-    "PartialNoteData",
+    "NoteEvent",
+    "NoteRow",
+    "NoteTable",
+    "NoteTableBuilder",
+    "PartAnalysis",
+    "PartIR",
+    "RangeFeatures",
+    "RangeTable",
+    "RhythmFeatures",
     "RhythmGradeRules",
+    "RhythmRuleMatrix",
+    "ScoreIR",
+    "SyntheticScoreSpec",
     "TempoData",
+    "TempoMarkIR",
+    "TimeSignatureIR",
 ]
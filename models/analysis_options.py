@@ -7,3 +7,9 @@ class AnalysisOptions:
     run_observed: bool = True
     string_only: bool = False
     observed_grades: Optional[Tuple[float, ...]] = (0.5, 1, 2, 3, 4, 5)
+    parallelism: str = "serial"  # "serial" or "process"
+    max_workers: Optional[int] = None
+    grade_parallelism: str = "serial"  # "serial", "thread" or "process"; serial analyzer mode only
+    grade_workers: Optional[int] = None
+    score_reader: str = "music21"  # "music21" or "stream" (iterparse, falls back to music21)
+    reconciled_notes: bool = False  # also return the merged note rows as analysis_notes["reconciled"]
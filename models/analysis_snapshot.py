@@ -0,0 +1,111 @@
+from dataclasses import dataclass, field, fields, replace
+
+import numpy as np
+
+from .note_table import NoteTable
+from .score_ir import MeasureIR, ScoreIR
+
+
+@dataclass(slots=True)
+class MeasureAnalysis:
+    """
+    The note analyzers' output for one measure of one part, and the context it
+    was computed in. Rows are stored reconciled; the terms and feature pieces
+    are taken before reconciliation, as the aggregates and curves read them.
+    """
+
+    measure: MeasureIR
+    time_signature: object            # TimeSignatureIR in effect, None before the first one
+    local_key: int | None             # pitch index of the key segment in effect
+    key_quality: str                  # quality of the last key segment, which range scoring reads
+    tuplets_in: tuple | None          # annotate_tuplet state from the part's earlier measures
+    tuplets_out: tuple | None
+    range_notes: NoteTable
+    articulation_notes: NoteTable
+    rhythm_notes: NoteTable
+    range_terms: list | None          # (weighted confidence, exposure); None when the part is not range-scored
+    articulation_terms: list          # (confidence, duration)
+    rhythm_terms: list                # (weighted confidence, duration)
+    articulation_features: list       # (articulations, duration)
+    range_features: object = None     # RangeFeatures piece, None when not computed
+    rhythm_features: object = None    # RhythmFeatures piece, None when not computed
+
+    @property
+    def uses_tuplets(self) -> bool:
+        return self.tuplets_out != self.tuplets_in
+
+    def __getstate__(self):
+        # feature pieces are pickled once, stacked, by the part; keep their row counts
+        state = {f.name: getattr(self, f.name) for f in fields(self)}
+        state["range_features"] = _row_count(self.range_features)
+        state["rhythm_features"] = _row_count(self.rhythm_features)
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+
+@dataclass(slots=True)
+class PartAnalysis:
+    """One part's MeasureAnalysis list with the per-part aggregates built from it."""
+
+    name: str | None
+    measures: list[MeasureAnalysis]
+    articulation_totals: tuple[float, float]  # (weighted confidence, duration)
+    rhythm_confidence: float | None
+    range_features: object = None
+    rhythm_features: object = None
+
+    def notes(self, attr: str, instrument: str, grade: float) -> NoteTable:
+        """The measures' range_notes, articulation_notes or rhythm_notes as one table."""
+        return NoteTable.concat((getattr(ma, attr) for ma in self.measures), instrument, grade)
+
+    def __getstate__(self):
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+        # cut the measures' feature pieces back out of the stacked features
+        for attr in ("range_features", "rhythm_features"):
+            start = 0
+            for ma in self.measures:
+                rows = getattr(ma, attr)
+                if rows is not None:
+                    setattr(ma, attr, _slice_rows(getattr(self, attr), start, start + rows))
+                    start += rows
+
+
+def _row_count(features) -> int | None:
+    if features is None:
+        return None
+    return len(next(getattr(features, f.name) for f in fields(features) if isinstance(getattr(features, f.name), np.ndarray)))
+
+
+def _slice_rows(features, start: int, stop: int):
+    return replace(features, **{
+        f.name: getattr(features, f.name)[start:stop]
+        for f in fields(features)
+        if isinstance(getattr(features, f.name), np.ndarray)
+    })
+
+
+@dataclass
+class AnalysisSnapshot:
+    """
+    What an incremental run keeps of one version of a score so the next version
+    can reuse it: the reader memo, the IR, per-part measure analyses, the key
+    segments and the score-level analyzer results with the signatures they were
+    computed for.
+    """
+
+    content_hash: str
+    options_key: str
+    score: ScoreIR
+    memo: dict
+    parts: dict[str, PartAnalysis] = field(default_factory=dict)
+    key: dict | None = None  # {"signature", "key_segments", "observed"}
+    results: dict = field(default_factory=dict)
+    signatures: dict = field(default_factory=dict)
+    stats: dict = field(default_factory=dict)
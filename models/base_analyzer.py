@@ -1,9 +1,22 @@
 class BaseAnalyzer:
+    """
+    Two-phase contract for the observed-grade sweep:
+      extract_features(score) runs once per score and does the grade-invariant work,
+      score_grade(features, grade) applies one grade's rules to those features.
+    Analyzers that don't split their work can keep overriding analyze_confidence.
+    """
+
     def __init__(self, rules):
         self.rules = rules
 
-    def analyze_confidence(self, score, grade):
+    def extract_features(self, score):
+        return score
+
+    def score_grade(self, features, grade):
         raise NotImplementedError
 
+    def analyze_confidence(self, score, grade):
+        return self.score_grade(self.extract_features(score), grade)
+
     def analyze_target(self, score, target_grade):
         raise NotImplementedError
@@ -0,0 +1,330 @@
+from __future__ import annotations
+
+import sys
+from functools import lru_cache
+
+import numpy as np
+
+# storage dtype per column. Object columns keep values as given (offsets and
+# durations may be Fractions); numeric columns mark an unset cell with NaN,
+# -1 for flags, or the dtype's minimum for integers
+NOTE_COLUMNS = {
+    "measure": np.int32,
+    "offset": object,
+    "duration": object,
+    "written_midi_value": np.int16,
+    "written_pitch": object,
+    "sounding_midi_value": np.int16,
+    "sounding_pitch": object,
+    # rhythm context
+    "beat_index": np.int32,
+    "beat_offset": np.float64,
+    "time_signature": object,
+    "beat_unit": np.float64,
+    "chord_index": np.int16,
+    "voice_index": np.int16,
+    "is_chord": np.int8,
+    "chord_size": np.int16,
+    # tuplets
+    "tuplet_id": np.int32,
+    "tuplet_actual": np.int16,
+    "tuplet_normal": np.int16,
+    "tuplet_index": np.int16,
+    "tuplet_class": object,
+    # derived
+    "rhythm_token": object,
+    "rhythm_level": np.float64,
+    # analyzer outputs
+    "relative_key_index": np.int8,
+    "range_confidence": np.float64,
+    "range_exposure": np.float64,
+    "rhythm_confidence": np.float64,
+    "articulation_confidence": np.float64,
+    # interned ((key, text), ...) per row
+    "comments": object,
+}
+FLAG_COLUMNS = frozenset({"is_chord"})
+TABLE_FIELDS = ("grade", "instrument")
+
+# the order of a serialized row
+ROW_FIELDS = (
+    "measure", "offset", "grade", "instrument", "comments",
+    *(name for name in NOTE_COLUMNS if name not in ("measure", "offset", "comments")),
+)
+
+
+def _missing(name: str):
+    dtype = NOTE_COLUMNS[name]
+    if dtype is object:
+        return None
+    if name in FLAG_COLUMNS:
+        return -1
+    if np.issubdtype(dtype, np.integer):
+        return np.iinfo(dtype).min
+    return np.nan
+
+
+def _empty_column(name: str, length: int) -> np.ndarray:
+    return np.full(length, _missing(name), dtype=NOTE_COLUMNS[name])
+
+
+def _object_array(values) -> np.ndarray:
+    # element by element: numpy would unpack the comment tuples
+    out = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        out[i] = value
+    return out
+
+
+def is_set(name: str, cells: np.ndarray) -> np.ndarray:
+    """Mask of the cells, in storage form, that hold a value."""
+    dtype = NOTE_COLUMNS[name]
+    if dtype is object:
+        return np.not_equal(cells, None)
+    if np.issubdtype(dtype, np.floating):
+        return ~np.isnan(cells)
+    return cells != _missing(name)
+
+
+def _python_values(name: str, column: np.ndarray) -> list:
+    values = column.tolist()
+    dtype = NOTE_COLUMNS[name]
+    if dtype is object:
+        return values
+    if name in FLAG_COLUMNS:
+        return [None if v < 0 else bool(v) for v in values]
+    if np.issubdtype(dtype, np.integer):
+        missing = np.iinfo(dtype).min
+        return [None if v == missing else v for v in values]
+    return [None if v != v else v for v in values]
+
+
+def _python_value(name: str, value):
+    dtype = NOTE_COLUMNS[name]
+    if dtype is object:
+        return value
+    value = value.item()
+    if name in FLAG_COLUMNS:
+        return None if value < 0 else bool(value)
+    if np.issubdtype(dtype, np.integer):
+        return None if value == np.iinfo(dtype).min else value
+    return None if value != value else value
+
+
+@lru_cache(maxsize=4096)
+def _comment_set(pairs: tuple) -> tuple:
+    # one shared tuple per distinct set of comments
+    return pairs
+
+
+def _with_comment(pairs: tuple | None, key: str, text: str) -> tuple:
+    text = sys.intern(text)
+    pairs = pairs or ()
+    for i, (k, _) in enumerate(pairs):
+        if k == key:
+            # like a dict update: the key keeps its place
+            return _comment_set(pairs[:i] + ((key, text),) + pairs[i + 1:])
+    return _comment_set(pairs + ((key, text),))
+
+
+class NoteTable:
+    """
+    One part's notes from one analyzer, stored by column and addressed by row
+    index. grade and instrument are the same for every row. A column is only
+    allocated once some row sets it; unset cells read as None.
+    """
+
+    __slots__ = ("instrument", "grade", "length", "_columns")
+
+    def __init__(self, instrument: str, grade: float | None, length: int = 0, columns: dict | None = None):
+        self.instrument = instrument
+        self.grade = grade
+        self.length = length
+        self._columns: dict[str, np.ndarray] = columns or {}
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, row: int) -> NoteRow:
+        return NoteRow(self, row)
+
+    def __iter__(self):
+        return (NoteRow(self, row) for row in range(self.length))
+
+    def column(self, name: str) -> np.ndarray | None:
+        """The stored column (unset cells hold the missing marker), or None if no row has set it."""
+        return self._columns.get(name)
+
+    def cells(self, name: str) -> np.ndarray:
+        """The column in storage form; all unset if no row has set it."""
+        column = self._columns.get(name)
+        return column if column is not None else _empty_column(name, self.length)
+
+    def values(self, name: str) -> list:
+        """The column as Python values, None where unset."""
+        if name in TABLE_FIELDS:
+            return [getattr(self, name)] * self.length
+        column = self._columns.get(name)
+        if column is None:
+            if name not in NOTE_COLUMNS:
+                raise KeyError(name)
+            return [None] * self.length
+        return _python_values(name, column)
+
+    def get(self, row: int, name: str):
+        if name in TABLE_FIELDS:
+            return getattr(self, name)
+        column = self._columns.get(name)
+        if column is None:
+            if name not in NOTE_COLUMNS:
+                raise KeyError(name)
+            return None
+        return _python_value(name, column[row])
+
+    def set(self, name: str, values, rows=None) -> None:
+        """Writes values to rows (default: every row); None leaves a cell unset."""
+        values = list(values)
+        if rows is None:
+            rows = np.arange(self.length)
+        rows = np.asarray(rows, dtype=np.intp)
+        keep = [i for i, value in enumerate(values) if value is not None]
+        if not keep:
+            column = self._columns.get(name)
+            if column is not None:
+                column[rows] = _missing(name)
+            return
+        column = self._columns.get(name)
+        if column is None:
+            column = self._columns[name] = _empty_column(name, self.length)
+        if len(keep) < len(values):
+            column[rows] = _missing(name)
+            rows = rows[keep]
+            values = [values[i] for i in keep]
+        column[rows] = _object_array(values) if column.dtype == object else values
+
+    def put(self, name: str, rows: np.ndarray, cells: np.ndarray) -> None:
+        """Writes cells in storage form, as cells() returns them, to rows."""
+        column = self._columns.get(name)
+        if column is None:
+            column = self._columns[name] = _empty_column(name, self.length)
+        column[rows] = cells
+
+    def add_comment(self, row: int, key: str, text: str) -> None:
+        column = self._columns.get("comments")
+        if column is None:
+            column = self._columns["comments"] = _empty_column("comments", self.length)
+        column[row] = _with_comment(column[row], key, text)
+
+    def comment_dict(self, row: int) -> dict:
+        column = self._columns.get("comments")
+        return dict(column[row]) if column is not None and column[row] else {}
+
+    def take(self, rows) -> NoteTable:
+        """The given rows, in order, as a new table."""
+        rows = np.asarray(rows, dtype=np.intp)
+        columns = {name: column[rows] for name, column in self._columns.items()}
+        return NoteTable(self.instrument, self.grade, len(rows), columns)
+
+    @classmethod
+    def concat(cls, tables, instrument: str | None = None, grade: float | None = None) -> NoteTable:
+        """Stacks tables of the same part; instrument and grade are only read when tables is empty."""
+        tables = list(tables)
+        if not tables:
+            return cls(instrument, grade)
+        names = [name for name in NOTE_COLUMNS if any(name in t._columns for t in tables)]
+        columns = {
+            name: np.concatenate([t._columns.get(name, _empty_column(name, t.length)) for t in tables])
+            for name in names
+        }
+        return cls(tables[0].instrument, tables[0].grade, sum(t.length for t in tables), columns)
+
+    def row_dict(self, row: int) -> dict:
+        data = {name: self.get(row, name) for name in ROW_FIELDS}
+        data["comments"] = self.comment_dict(row)
+        return data
+
+    def _row_columns(self) -> list[list]:
+        columns = []
+        for name in ROW_FIELDS:
+            if name == "comments":
+                column = self._columns.get("comments")
+                if column is None:
+                    columns.append([{}] * self.length)
+                else:
+                    columns.append([dict(pairs) if pairs else {} for pairs in column.tolist()])
+            else:
+                columns.append(self.values(name))
+        return columns
+
+    def to_dicts(self) -> list[dict]:
+        """One dict per row with every field, comments as a dict ({} when unset)."""
+        return [dict(zip(ROW_FIELDS, row)) for row in zip(*self._row_columns())]
+
+    def to_table(self) -> dict:
+        """The rows as {"columns": [...], "rows": [[...], ...]}, the field names given once."""
+        return {"columns": list(ROW_FIELDS), "rows": [list(row) for row in zip(*self._row_columns())]}
+
+
+class NoteRow:
+    """One row of a NoteTable, read by attribute: note.measure, note.rhythm_token, ..."""
+
+    __slots__ = ("table", "index")
+
+    def __init__(self, table: NoteTable, index: int):
+        self.table = table
+        self.index = index
+
+    def __getattr__(self, name):
+        try:
+            return self.table.get(self.index, name)
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def add_comment(self, key: str, text: str) -> None:
+        self.table.add_comment(self.index, key, text)
+
+    def to_dict(self) -> dict:
+        return self.table.row_dict(self.index)
+
+
+class NoteTableBuilder:
+    """Collects a NoteTable's rows one at a time; build() packs them into columns."""
+
+    __slots__ = ("instrument", "grade", "length", "_cells", "_comments")
+
+    def __init__(self, instrument: str, grade: float | None):
+        self.instrument = instrument
+        self.grade = grade
+        self.length = 0
+        self._cells: dict[str, tuple[list, list]] = {}  # column -> (rows, values) of its set cells
+        self._comments: dict[int, tuple] = {}
+
+    def append(self, **values) -> int:
+        """Adds a row; returns its index."""
+        row = self.length
+        for name, value in values.items():
+            if value is None:
+                continue
+            cells = self._cells.get(name)
+            if cells is None:
+                if name not in NOTE_COLUMNS or name == "comments":
+                    raise KeyError(name)
+                cells = self._cells[name] = ([], [])
+            cells[0].append(row)
+            cells[1].append(value)
+        self.length += 1
+        return row
+
+    def add_comment(self, row: int, key: str, text: str) -> None:
+        self._comments[row] = _with_comment(self._comments.get(row), key, text)
+
+    def build(self) -> NoteTable:
+        columns = {}
+        for name, (rows, values) in self._cells.items():
+            column = columns[name] = _empty_column(name, self.length)
+            column[rows] = _object_array(values) if column.dtype == object else values
+        if self._comments:
+            column = columns["comments"] = _empty_column("comments", self.length)
+            for row, pairs in self._comments.items():
+                column[row] = pairs
+        return NoteTable(self.instrument, self.grade, self.length, columns)
@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class RangeFeatures:
+    """
+    Column-packed notes of every range-scored part, one row per note.
+    """
+    sounding_midi: np.ndarray
+    relative_key_index: np.ndarray  # -1 when no key segment applies
+    bucket: np.ndarray              # row in RangeTable.instruments
+    duration: np.ndarray
+    is_clarinet: np.ndarray         # bool, part name mentions "Clarinet"
+    is_first_clarinet: np.ndarray   # bool, part name mentions "Clarinet 1"
+    crosses_break: np.ndarray       # bool
+    key_quality: str
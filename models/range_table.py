@@ -0,0 +1,20 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class RangeTable:
+    """
+    Combined instrument ranges packed as (instrument x range grade) arrays.
+    Missing cores are stored as an empty interval (low > high).
+    """
+    instruments: tuple[str, ...]
+    grades: tuple[float, ...]
+    has_grade: np.ndarray   # bool (instrument x grade)
+    core_low: np.ndarray
+    core_high: np.ndarray
+    ext_low: np.ndarray
+    ext_high: np.ndarray
+    total_low: np.ndarray   # per instrument
+    total_high: np.ndarray
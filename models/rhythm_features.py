@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class RhythmFeatures:
+    """
+    Column-packed rhythm features: one row per scorable note, all parts stacked.
+    """
+    part_index: np.ndarray    # int, row -> part (for per-part averaging)
+    part_count: int
+    duration: np.ndarray      # quarter lengths
+    offset: np.ndarray        # offset within the measure
+    dotted: np.ndarray        # bool
+    syncopated: np.ndarray    # bool, offset is not a multiple of duration
+    subdivision: np.ndarray   # quarter length of the rhythm token, NaN when unknown
+    tuplet_class: np.ndarray  # TUPLET_CLASS_ORDER code, -1 outside tuplets
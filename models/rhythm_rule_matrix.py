@@ -0,0 +1,16 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class RhythmRuleMatrix:
+    """
+    Reconciled rhythm rules as a grade x rule matrix (one row per rules grade).
+    """
+    grades: tuple[float, ...]
+    columns: tuple[str, ...]
+    values: np.ndarray
+
+    def column(self, name: str) -> np.ndarray:
+        return self.values[:, self.columns.index(name)]
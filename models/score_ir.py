@@ -0,0 +1,87 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class TimeSignatureIR:
+    ratio: str
+    beat_length: float
+    bar_length: float
+
+
+@dataclass(frozen=True)
+class KeySignatureIR:
+    measure: int
+    tonic: str
+    quality: str
+
+
+@dataclass(frozen=True)
+class TempoMarkIR:
+    measure: int
+    bpm: int
+    beat_unit: str
+    quarter_bpm: int
+
+
+@dataclass(frozen=True)
+class DynamicMarkIR:
+    value: str
+    offset: float
+    measure: int | None
+
+
+@dataclass(frozen=True)
+class NoteEvent:
+    # offsets/durations keep music21's values (float or Fraction)
+    offset: float
+    duration: float
+    duration_type: str
+    dots: int
+
+    is_rest: bool
+    is_chord: bool
+    is_note: bool
+    chord_size: int | None = None
+
+    # single pitched notes only
+    written_pitch: str | None = None
+    written_midi: int | None = None
+    sounding_pitch: str | None = None
+    sounding_midi: int | None = None
+
+    tuplet: tuple[int, int] | None = None  # (actual, normal) of the first tuplet
+    articulations: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class MeasureIR:
+    number: int
+    time_signature: TimeSignatureIR | None        # as resolved by music21's context search
+    local_time_signature: TimeSignatureIR | None  # first time signature stored in the measure itself
+    lines: tuple[tuple[NoteEvent, ...], ...]
+    # quarter length of a lone full-measure rest at offset 0, if that is all the measure holds
+    implicit_rest_length: float | None = None
+
+    def iter_events(self):
+        for events in self.lines:
+            yield from events
+
+
+@dataclass(frozen=True)
+class PartIR:
+    name: str | None
+    measures: tuple[MeasureIR, ...]
+    dynamics: tuple[DynamicMarkIR, ...]
+    highest_time: float
+
+
+@dataclass(frozen=True)
+class ScoreIR:
+    """
+    Read-only snapshot of everything the analyzers need from a parsed score.
+    Built once per upload and shared across analyzers and grades.
+    """
+    parts: tuple[PartIR, ...]
+    key_signatures: tuple[KeySignatureIR, ...]
+    tempo_marks: tuple[TempoMarkIR, ...]
+    content_hash: str | None = None  # SHA-256 of the source file, when built from a path
@@ -0,0 +1,16 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class SyntheticScoreSpec:
+    """Shape of a generated score; densities are chances per beat (tuplets) or per note (chords)."""
+
+    parts: int = 4
+    measures: int = 32
+    voices: int = 1  # per part
+    tuplet_density: float = 0.1
+    chord_density: float = 0.1
+    meter_changes: int = 0
+    key_changes: int = 0
+    tempo_changes: int = 0
+    seed: int = 0
@@ -1,10 +1,11 @@
-from copy import deepcopy
+from dataclasses import replace
 from time import perf_counter
 import argparse
+import os
 import sys
 
-from music21 import converter, stream
-
+from analyzers.shared.parallel import run_analyzers_in_processes
+from analyzers.shared.score_ir import load_score_ir
 from analyzers.articulation.articulation import run_articulation
 from analyzers.rhythm import run_rhythm
 from analyzers.meter import run_meter
@@ -12,7 +13,18 @@ from analyzers.key_range import run_key_range
 from analyzers.availability.availability import run_availability
 from analyzers.tempo_duration import run_tempo_duration
 from analyzers.dynamics import run_dynamics
-from models import AnalysisOptions
+from data_processing import make_grade_executor
+from models import AnalysisOptions, AnalysisSnapshot
+from utilities import (
+    Tracer,
+    default_curve_cache,
+    default_score_cache,
+    default_snapshot_cache,
+    hash_file,
+    result_cache_key,
+    span,
+    tracing,
+)
 from utilities.note_reconciler import NoteReconciler
 from app_data import FULL_GRADES
 
@@ -23,11 +35,69 @@ def run_analysis_engine(
     *,
     analysis_options: AnalysisOptions,
     progress_cb=None,
+    score_cache=None,
+    curve_cache=None,
+    tracer=None,
 ):
+    """
+    score_cache: ScoreCache for parsed scores; defaults to default_score_cache().
+    curve_cache: ResultCache for observed-grade curves; defaults to default_curve_cache().
+    tracer: optional utilities.Tracer; every phase of the run is recorded on it as a timing span.
+    """
+    with tracing(tracer), span("analysis", target_grade=target_grade):
+        return _run_analysis_engine(
+            score_path,
+            target_grade,
+            analysis_options=analysis_options,
+            progress_cb=progress_cb,
+            score_cache=score_cache,
+            curve_cache=curve_cache,
+        )
+
+
+def _score_counts(score) -> dict:
+    return {
+        "parts": len(score.parts),
+        "measures": len(score.parts[0].measures) if score.parts else 0,
+        "notes": sum(len(line) for part in score.parts for m in part.measures for line in m.lines),
+    }
+
+
+def _observed_progress(emit):
+    """progress_bar(name) factory: observed-grade sweep callbacks that emit "observed" events."""
+
+    def progress_bar(name):
+        def _cb(grade, idx, total, label=None):
+            emit(
+                {
+                    "type": "observed",
+                    "analyzer": name,
+                    "label": label,
+                    "grade": grade,
+                    "idx": idx,
+                    "total": total,
+                }
+            )
+
+        return _cb
+
+    return progress_bar
+
+
+def _run_analysis_engine(score_path, target_grade, *, analysis_options, progress_cb, score_cache, curve_cache, score=None):
     target_only = not analysis_options.run_observed
-    base_score = converter.parse(score_path)
-    total_measures = len(list(base_score.parts[0].getElementsByClass(stream.Measure)))
-    score_factory = lambda: deepcopy(base_score)
+    if score_cache is None:
+        score_cache = default_score_cache()
+    if curve_cache is None:
+        curve_cache = default_curve_cache()
+    with span("parse") as parse_span:
+        score = load_score_ir(score_path, score, cache=score_cache, reader=analysis_options.score_reader)
+        if parse_span.active:
+            parse_span.set(**_score_counts(score))
+    total_measures = len(score.parts[0].measures)
+    if progress_cb is not None:
+        # nothing reads score_path from here on
+        progress_cb({"type": "parsed", "measures": total_measures})
 
     analyzers = [
         ("dynamics", run_dynamics, False),
@@ -45,20 +115,7 @@ def run_analysis_engine(
         if progress_cb is not None:
             progress_cb(event)
 
-    def progress_bar(name):
-        def _cb(grade, idx, total, label=None):
-            emit(
-                {
-                    "type": "observed",
-                    "analyzer": name,
-                    "label": label,
-                    "grade": grade,
-                    "idx": idx,
-                    "total": total,
-                }
-            )
-
-        return _cb
+    progress_bar = _observed_progress(emit)
 
     def analyzer_progress(step, name):
         emit(
@@ -75,55 +132,287 @@ def run_analysis_engine(
         if not analysis:
             return
         if name == "articulation":
-            for pdata in analysis.values():
-                for note in pdata.get("articulation_data", []):
-                    reconciler.add(note)
+            parts, column = analysis.values(), "articulation_data"
         elif name == "rhythm":
-            for pdata in analysis.values():
-                for note in pdata.get("note_data", []):
-                    reconciler.add(note)
+            parts, column = analysis.values(), "note_data"
         elif name == "key_range":
-            range_data = analysis.get("range_data", {})
-            for pdata in range_data.values():
-                for note in pdata.get("Note Data", []):
-                    reconciler.add(note)
+            parts, column = analysis.get("range_data", {}).values(), "Note Data"
+        else:
+            return
+        for pdata in parts:
+            if pdata.get(column) is not None:
+                reconciler.add(pdata[column])
 
     results = {}
     reconciler = NoteReconciler()
     step = 0
 
-    for name, fn, _ in note_analyzers:
-        step += 1
-        results[name] = fn(
+    if analysis_options.parallelism == "process":
+        def on_finished(name):
+            nonlocal step
+            step += 1
+            analyzer_progress(step, name)
+
+        results.update(
+            run_analyzers_in_processes(
+                [(name, fn) for name, fn, _ in analyzers],
+                score,
+                score_path,
+                target_grade,
+                analysis_options,
+                max_workers=analysis_options.max_workers,
+                progress_cb=None if target_only else progress_bar,
+                on_finished=on_finished,
+                curve_cache=curve_cache,
+            )
+        )
+        # reconcile in the fixed analyzer order, whatever order the workers finished in
+        with span("reconcile") as reconcile_span:
+            for name, _, _ in note_analyzers:
+                collect_partial_notes(results[name], name, reconciler)
+            results["reconciled_notes"] = reconciler.notes
+            reconcile_span.set(rows=reconciler.row_count, notes=sum(map(len, results["reconciled_notes"].values())))
+
+    elif analysis_options.parallelism == "serial":
+        grade_executor = make_grade_executor(analysis_options.grade_parallelism, analysis_options.grade_workers)
+        try:
+            for name, fn, _ in note_analyzers:
+                step += 1
+                with span(name, analyzer=name) as analyzer_span:
+                    results[name] = fn(
+                        score_path,
+                        target_grade,
+                        score=score,
+                        progress_cb=None if target_only else progress_bar(name),
+                        analysis_options=analysis_options,
+                        grade_executor=grade_executor,
+                        curve_cache=curve_cache,
+                    )
+                    rows = reconciler.row_count
+                    collect_partial_notes(results[name], name, reconciler)
+                    analyzer_span.set(notes=reconciler.row_count - rows)
+                analyzer_progress(step, name)
+
+            with span("reconcile") as reconcile_span:
+                results["reconciled_notes"] = reconciler.notes
+                reconcile_span.set(rows=reconciler.row_count, notes=sum(map(len, results["reconciled_notes"].values())))
+
+            for name, fn, _ in other_analyzers:
+                step += 1
+                with span(name, analyzer=name):
+                    results[name] = fn(
+                        score_path,
+                        target_grade,
+                        score=score,
+                        progress_cb=None if target_only else progress_bar(name),
+                        analysis_options=analysis_options,
+                        grade_executor=grade_executor,
+                        curve_cache=curve_cache,
+                    )
+                analyzer_progress(step, name)
+        finally:
+            if grade_executor is not None:
+                grade_executor.shutdown()
+
+    else:
+        raise ValueError(f"Unknown parallelism mode: {analysis_options.parallelism!r}")
+
+    emit({"type": "done"})
+    with span("build_final_result", analyzers=len(analyzers)):
+        return build_final_result(results, target_only, total_measures, analysis_options.reconciled_notes)
+
+
+def run_analysis_cached(
+    score_path: str,
+    target_grade: float,
+    *,
+    analysis_options: AnalysisOptions,
+    progress_cb=None,
+    result_cache=None,
+    score_cache=None,
+    tracer=None,
+):
+    """
+    run_analysis_engine behind a ResultCache. Returns (result, cache_hit).
+    A hit skips the analysis entirely and only emits the "done" event.
+    """
+    if result_cache is None:
+        result = run_analysis_engine(
             score_path,
             target_grade,
-            score=score_factory(),
-            score_factory=score_factory,
-            progress_cb=None if target_only else progress_bar(name),
             analysis_options=analysis_options,
+            progress_cb=progress_cb,
+            score_cache=score_cache,
+            tracer=tracer,
         )
-        collect_partial_notes(results[name], name, reconciler)
-        analyzer_progress(step, name)
+        return result, False
 
-    results["reconciled_notes"] = reconciler._notes
+    key = result_cache_key(hash_file(score_path), target_grade, analysis_options)
+    cached = result_cache.get(key)
+    if cached is not None:
+        if progress_cb is not None:
+            progress_cb({"type": "done"})
+        return cached, True
 
-    for name, fn, _ in other_analyzers:
-        step += 1
-        results[name] = fn(
+    result = run_analysis_engine(
+        score_path,
+        target_grade,
+        analysis_options=analysis_options,
+        progress_cb=progress_cb,
+        score_cache=score_cache,
+        tracer=tracer,
+    )
+    result_cache.put(key, result)
+    return result, False
+
+
+def run_analysis_incremental(
+    score_path: str,
+    target_grade: float,
+    *,
+    analysis_options: AnalysisOptions,
+    previous=None,
+    progress_cb=None,
+    snapshot_cache=None,
+    curve_cache=None,
+    tracer=None,
+):
+    """
+    run_analysis_engine for a score that was graded before in an earlier version:
+    only measures whose content or context changed are parsed and analyzed again,
+    and score-level analyzers rerun only when what they read has changed.
+    Always reads with the stream reader and runs serially.
+
+    previous: AnalysisSnapshot of the earlier version, or the path it was graded
+    at; defaults to the snapshot last stored for score_path.
+    snapshot_cache: SnapshotCache; defaults to default_snapshot_cache().
+    Returns (result, snapshot); snapshot is None when the run fell back to a full one.
+    """
+    with tracing(tracer), span("analysis", target_grade=target_grade, incremental=True):
+        return _run_analysis_incremental(
             score_path,
             target_grade,
-            score=score_factory(),
-            score_factory=score_factory,
-            progress_cb=None if target_only else progress_bar(name),
             analysis_options=analysis_options,
+            previous=previous,
+            progress_cb=progress_cb,
+            snapshot_cache=snapshot_cache,
+            curve_cache=curve_cache,
+        )
+
+
+def _run_analysis_incremental(
+    score_path, target_grade, *, analysis_options, previous, progress_cb, snapshot_cache, curve_cache
+):
+    from analyzers.shared.incremental import SEGMENT_ANALYZERS, MeasureAnalyzers, has_unique_part_names
+    from analyzers.shared.musicxml_reader import UnsupportedMusicXML, read_score_ir_incremental
+
+    target_only = not analysis_options.run_observed
+    if snapshot_cache is None:
+        snapshot_cache = default_snapshot_cache()
+    if curve_cache is None:
+        curve_cache = default_curve_cache()
+    options_key = result_cache_key("", target_grade, analysis_options)
+
+    snapshot_key = snapshot_cache.key_for_path(score_path) if snapshot_cache is not None else None
+    loaded_from = None
+    if previous is None or isinstance(previous, (str, os.PathLike)):
+        if snapshot_cache is not None:
+            loaded_from = snapshot_cache.key_for_path(previous if previous is not None else score_path)
+        with span("snapshot_load"):
+            previous = snapshot_cache.get(loaded_from) if loaded_from is not None else None
+    if not isinstance(previous, AnalysisSnapshot):
+        previous = None
+
+    with span("parse") as parse_span:
+        content_hash = hash_file(score_path)
+        try:
+            score, memo, replayed = read_score_ir_incremental(score_path, previous.memo if previous else None)
+        except UnsupportedMusicXML:
+            score = None
+        if score is not None:
+            score = replace(score, content_hash=content_hash)
+            if parse_span.active:
+                parse_span.set(replayed=replayed, **_score_counts(score))
+
+    if score is None or not has_unique_part_names(score):
+        # parts that share a name are reconciled together, which per-part reuse
+        # cannot follow; unsupported files need music21
+        result = _run_analysis_engine(
+            score_path,
+            target_grade,
+            analysis_options=replace(analysis_options, score_reader="stream", parallelism="serial"),
+            progress_cb=progress_cb,
+            score_cache=None,
+            curve_cache=curve_cache,
+            score=score,
         )
-        analyzer_progress(step, name)
+        return result, None
+
+    reuse = previous if previous is not None and previous.options_key == options_key else None
+
+    def emit(event):
+        if progress_cb is not None:
+            progress_cb(event)
+
+    progress_bar = _observed_progress(emit)
+    total = 3 + len(SEGMENT_ANALYZERS)
+    step = 0
+
+    measure_analyzers = MeasureAnalyzers(target_grade, analysis_options)
+    results, parts, key_state = measure_analyzers.analyze(
+        score,
+        reuse.parts if reuse else None,
+        reuse.key if reuse else None,
+        curve_cache=curve_cache,
+        progress_bar=None if target_only else progress_bar,
+    )
+    for name in ("key_range", "articulation", "rhythm"):
+        step += 1
+        emit({"type": "analyzer", "analyzer": name, "idx": step, "total": total})
+
+    signatures = {}
+    reused = []
+    for name, (fn, signature_fn) in SEGMENT_ANALYZERS.items():
+        step += 1
+        signatures[name] = signature_fn(score)
+        if reuse is not None and name in reuse.results and reuse.signatures.get(name) == signatures[name]:
+            results[name] = reuse.results[name]
+            reused.append(name)
+        else:
+            with span(name, analyzer=name):
+                results[name] = fn(
+                    score_path,
+                    target_grade,
+                    score=score,
+                    progress_cb=None if target_only else progress_bar(name),
+                    analysis_options=analysis_options,
+                    curve_cache=curve_cache,
+                )
+        emit({"type": "analyzer", "analyzer": name, "idx": step, "total": total})
+
+    snapshot = AnalysisSnapshot(
+        content_hash=content_hash,
+        options_key=options_key,
+        score=score,
+        memo=memo,
+        parts=parts,
+        key=key_state,
+        results={name: results[name] for name in SEGMENT_ANALYZERS},
+        signatures=signatures,
+        stats={"reparsed": sum(len(p.measures) for p in score.parts) - replayed, "reused": reused, **measure_analyzers.stats},
+    )
+    stored = reuse is not None and reuse.content_hash == content_hash and loaded_from == snapshot_key
+    if snapshot_key is not None and not stored:
+        with span("snapshot_store"):
+            snapshot_cache.put(snapshot_key, snapshot)
 
     emit({"type": "done"})
-    return build_final_result(results, target_only, total_measures)
+    with span("build_final_result", analyzers=total):
+        final = build_final_result(results, target_only, len(score.parts[0].measures), analysis_options.reconciled_notes)
+        return final, snapshot
 
 
-def build_final_result(results, target_only: bool, total_measures: int | None = None):
+def build_final_result(results, target_only: bool, total_measures: int | None = None, reconciled_notes: bool = False):
     def clamp_conf(value):
         if value is None:
             return None
@@ -169,6 +458,9 @@ def build_final_result(results, target_only: bool, total_measures: int | None =
         "rhythm": results.get("rhythm", {}).get("analysis_notes", {}),
         "meter": results.get("meter", {}).get("analysis_notes", {}),
     }
+    if reconciled_notes:
+        # the range, articulation and rhythm rows joined per note, one compact table per part
+        notes["reconciled"] = {part: table.to_table() for part, table in results.get("reconciled_notes", {}).items()}
 
     duration_data = notes.get("duration")
     if isinstance(duration_data, dict):
@@ -186,6 +478,17 @@ def build_final_result(results, target_only: bool, total_measures: int | None =
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        help="Score files, directories or glob patterns; grades them all in batch mode.",
+    )
+    parser.add_argument(
+        "--target-grade",
+        type=float,
+        default=2,
+        help="Target grade to analyze against.",
+    )
     parser.add_argument(
         "--target-only",
         "--target_only",
@@ -208,9 +511,81 @@ if __name__ == "__main__":
         action="store_true",
         help="Include fractional grades (0.5 steps) in observed-grade analysis.",
     )
+    parser.add_argument(
+        "--parallelism",
+        choices=("serial", "process"),
+        default="serial",
+        help="Run analyzers one after another or concurrently in worker processes.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker process count for --parallelism process (default: one per analyzer, capped at CPU count).",
+    )
+    parser.add_argument(
+        "--grade-parallelism",
+        choices=("serial", "thread", "process"),
+        default="serial",
+        help="Fan the observed-grade sweep of each analyzer out over a thread or process pool.",
+    )
+    parser.add_argument(
+        "--score-reader",
+        choices=("music21", "stream"),
+        default="music21",
+        help="Parse with music21, or stream the MusicXML straight into the analysis IR.",
+    )
+    parser.add_argument(
+        "--reconciled-notes",
+        action="store_true",
+        help="Also return the range, articulation and rhythm rows merged per note, as one compact table per part.",
+    )
+    parser.add_argument(
+        "--trace",
+        default=None,
+        help="Write timing spans of every analysis phase to this file in Chrome trace-event format.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Reuse the snapshot of the version last graded at this path; only changed measures are analyzed again.",
+    )
+    parser.add_argument(
+        "--previous",
+        default=None,
+        help="Path an earlier version of the score was graded at with --incremental (implies --incremental).",
+    )
+    batch = parser.add_argument_group("batch mode")
+    batch.add_argument(
+        "--output",
+        default="analysis_results.jsonl",
+        help="Batch output, one row per score: .jsonl, or .parquet (needs pyarrow).",
+    )
+    batch.add_argument(
+        "--manifest",
+        default=None,
+        help="Resumable progress log (default: OUTPUT.manifest.jsonl).",
+    )
+    batch.add_argument(
+        "--batch-workers",
+        type=int,
+        default=None,
+        help="Scores graded at once, each in its own worker process (default: CPU count).",
+    )
+    batch.add_argument(
+        "--timeout",
+        type=float,
+        default=600,
+        help="Seconds before a score's worker is killed and the score marked as timed out (0: no limit).",
+    )
+    batch.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="Run scores again that errored, crashed or timed out in an earlier batch.",
+    )
     args = parser.parse_args()
 
-    target_grade = 2
+    target_grade = args.target_grade
 
     test_files = [r"input_files\test.musicxml",
                   r"input_files\multiple_meter_madness.musicxml",
@@ -271,17 +646,65 @@ if __name__ == "__main__":
         run_observed=not args.target_only,
         string_only=args.strings_only,
         observed_grades=observed_grades,
+        parallelism=args.parallelism,
+        max_workers=args.workers,
+        grade_parallelism=args.grade_parallelism,
+        score_reader=args.score_reader,
+        reconciled_notes=args.reconciled_notes,
     )
+
+    if args.inputs:
+        from batch_analysis import run_batch
+
+        try:
+            counts = run_batch(
+                args.inputs,
+                args.output,
+                target_grade=target_grade,
+                analysis_options=options,
+                workers=args.batch_workers,
+                timeout=args.timeout or None,
+                manifest=args.manifest,
+                retry_failed=args.retry_failed,
+            )
+        except RuntimeError as exc:
+            parser.error(str(exc))
+        summary = ", ".join(f"{n} {status}" for status, n in sorted(counts.items())) or "nothing to do"
+        print(f"{summary}; results in {args.output}")
+        sys.exit(0)
+
     def cli_progress(event):
         if event.get("type") == "observed":
             progress_bar(event["analyzer"])(event["grade"], event["idx"], event["total"], event.get("label"))
         elif event.get("type") == "analyzer":
-            target_progress_bar(7)(event["idx"], event["analyzer"])
+            target_progress_bar(event["total"])(event["idx"], event["analyzer"])
 
-    final_result = run_analysis_engine(
-        score_path,
-        target_grade,
-        analysis_options=options,
-        progress_cb=cli_progress,
-    )
+    tracer = Tracer() if args.trace else None
+    if args.incremental or args.previous:
+        final_result, snapshot = run_analysis_incremental(
+            score_path,
+            target_grade,
+            analysis_options=options,
+            previous=args.previous,
+            progress_cb=cli_progress,
+            tracer=tracer,
+        )
+        if snapshot is not None:
+            stats = snapshot.stats
+            print(
+                f"incremental: {stats['reparsed']} measures parsed, "
+                f"{stats['rebuilt']}/{stats['measures']} analyzed, "
+                f"reused {', '.join(stats['reused']) or 'no score-level analyzers'}"
+            )
+    else:
+        final_result = run_analysis_engine(
+            score_path,
+            target_grade,
+            analysis_options=options,
+            progress_cb=cli_progress,
+            tracer=tracer,
+        )
     _ = final_result
+    if tracer is not None:
+        tracer.write_chrome_trace(args.trace)
+        print(f"trace written to {args.trace} ({len(tracer.spans)} spans)")
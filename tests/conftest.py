@@ -0,0 +1,10 @@
+import os
+import sys
+
+# no on-disk or process-wide caches unless a test sets one up itself
+os.environ.update(SCORE_CACHE_DIR="", CURVE_CACHE="none", RESULT_CACHE="none")
+
+# tests import the app's top-level packages the way the scripts do, from the repo root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
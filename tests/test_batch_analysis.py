@@ -0,0 +1,57 @@
+import json
+import os
+import shutil
+
+from batch_analysis import iter_score_paths, load_manifest, run_batch
+from models import AnalysisOptions
+
+SCORES = ["input_files/chord_test.musicxml", "input_files/dynamics_test.musicxml"]
+OPTIONS = AnalysisOptions(run_observed=False)
+
+
+def _scores(tmp_path):
+    folder = tmp_path / "scores"
+    folder.mkdir()
+    for path in SCORES:
+        shutil.copy(path, folder)
+    (folder / "notes.txt").write_text("not a score")
+    return folder
+
+
+def _rows(path):
+    with open(path, encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh]
+
+
+def test_directories_expand_to_score_files_once(tmp_path):
+    folder = _scores(tmp_path)
+    paths = list(iter_score_paths([str(folder), str(folder / "*.musicxml")]))
+    assert [os.path.basename(p) for p in paths] == ["chord_test.musicxml", "dynamics_test.musicxml"]
+
+
+def test_batch_grades_every_score_and_resumes_from_the_manifest(tmp_path):
+    folder = _scores(tmp_path)
+    output = str(tmp_path / "grades.jsonl")
+
+    counts = run_batch([str(folder)], output, analysis_options=OPTIONS, workers=2, log=lambda _: None)
+    assert counts == {"ok": 2}
+    rows = _rows(output)
+    assert [row["status"] for row in rows] == ["ok", "ok"]
+    assert all(row["confidences"] is not None and row["total_measures"] for row in rows)
+
+    # a second run finds everything in the manifest and grades nothing
+    assert run_batch([str(folder)], output, analysis_options=OPTIONS, workers=2, log=lambda _: None) == {}
+    assert _rows(output) == rows
+
+
+def test_a_timed_out_score_is_recorded_and_retried_only_on_request(tmp_path):
+    folder = _scores(tmp_path)
+    output = str(tmp_path / "grades.jsonl")
+
+    counts = run_batch([str(folder)], output, analysis_options=OPTIONS, workers=1, timeout=1e-6, log=lambda _: None)
+    assert counts == {"timeout": 2}
+    assert {record["status"] for record in load_manifest(f"{output}.manifest.jsonl").values()} == {"timeout"}
+
+    assert run_batch([str(folder)], output, analysis_options=OPTIONS, workers=1, log=lambda _: None) == {}
+    counts = run_batch([str(folder)], output, analysis_options=OPTIONS, workers=1, retry_failed=True, log=lambda _: None)
+    assert counts == {"ok": 2}
@@ -0,0 +1,67 @@
+import asyncio
+import threading
+
+from utilities.event_broadcaster import EventBroadcaster, format_sse
+
+
+def _broadcaster(*events, closed=False):
+    broadcaster = EventBroadcaster()
+    for event in events:
+        broadcaster.publish(event)
+    if closed:
+        broadcaster.close()
+    return broadcaster
+
+
+def test_subscribers_resume_after_their_last_event_id():
+    broadcaster = _broadcaster({"n": 1}, {"n": 2}, {"n": 3}, closed=True)
+    assert list(broadcaster.subscribe()) == [(1, {"n": 1}), (2, {"n": 2}), (3, {"n": 3})]
+    assert list(broadcaster.subscribe(last_event_id=2)) == [(3, {"n": 3})]
+    assert list(broadcaster.subscribe(last_event_id=3)) == []
+    assert list(broadcaster.subscribe(last_event_id=-5)) == list(broadcaster.subscribe())
+
+
+def test_idle_stream_yields_a_heartbeat_then_the_next_event():
+    broadcaster = _broadcaster({"n": 1})
+    stream = broadcaster.subscribe(last_event_id=1, heartbeat=0.01)
+    assert next(stream) is None
+    assert next(stream) is None
+    broadcaster.publish({"n": 2})
+    assert next(stream) == (2, {"n": 2})
+
+
+def test_close_drains_pending_events_and_ends_the_stream():
+    broadcaster = _broadcaster({"n": 1})
+    stream = broadcaster.subscribe(heartbeat=5.0)
+    assert next(stream) == (1, {"n": 1})
+
+    def finish():
+        broadcaster.publish({"n": 2})
+        broadcaster.close()
+
+    threading.Timer(0.05, finish).start()
+    # woken by the publish, not the heartbeat
+    assert list(stream) == [(2, {"n": 2})]
+
+    broadcaster.publish({"n": 3})
+    assert len(broadcaster) == 2
+
+
+def test_async_subscribers_replay_heartbeat_and_end_on_close():
+    broadcaster = _broadcaster({"n": 1}, {"n": 2})
+
+    async def consume():
+        received = []
+        async for item in broadcaster.subscribe_async(last_event_id=1, heartbeat=0.01):
+            received.append(item)
+            if item is None and len(received) == 2:
+                broadcaster.publish({"n": 3})
+                broadcaster.close()
+        return received
+
+    assert asyncio.run(consume()) == [(2, {"n": 2}), None, (3, {"n": 3})]
+    assert not broadcaster._async_waiters
+
+
+def test_format_sse_carries_the_event_id():
+    assert format_sse(4, {"type": "done"}) == 'id: 4\ndata: {"type": "done"}\n\n'
@@ -0,0 +1,94 @@
+import os
+import time
+
+import pytest
+
+import flask_app
+from utilities import SqliteResultCache, default_curve_cache, default_result_cache, shared_curve_cache
+
+SCORE = os.path.abspath("input_files/chord_test.musicxml")
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setenv("JOB_EXECUTOR", "process")
+    monkeypatch.setenv("JOB_WORKERS", "2")
+    monkeypatch.setenv("RESULT_CACHE", "memory")
+    monkeypatch.setenv("CURVE_CACHE_PATH", str(tmp_path / "curves.sqlite3"))
+    monkeypatch.delenv("CURVE_CACHE", raising=False)
+    for cached in (default_result_cache, default_curve_cache, shared_curve_cache, flask_app.job_scheduler):
+        cached.cache_clear()
+    yield flask_app.app.test_client()
+    flask_app.job_scheduler().shutdown()
+    for cached in (default_result_cache, default_curve_cache, shared_curve_cache, flask_app.job_scheduler):
+        cached.cache_clear()
+
+
+def _analyze(client) -> dict:
+    response = client.post("/api/analyze", json={"score_path": SCORE, "target_grade": 2, "target_only": True})
+    job_id = response.get_json()["job_id"]
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        body = client.get(f"/api/result/{job_id}").get_json()
+        if body["done"]:
+            return body
+        time.sleep(0.05)
+    raise AssertionError("analysis did not finish")
+
+
+def test_repeat_request_hits_the_result_cache_in_process_mode(client):
+    first = _analyze(client)
+    assert first["error"] is None
+    assert first["cache_hit"] is False
+
+    second = _analyze(client)
+    assert second["cache_hit"] is True
+    assert second["result"] == first["result"]
+
+
+def test_process_workers_default_to_the_shared_curve_cache(client, tmp_path):
+    job = flask_app.job_scheduler()._fn
+    assert isinstance(job.keywords["curve_cache"], SqliteResultCache)
+    assert job.keywords["curve_cache"].path == str(tmp_path / "curves.sqlite3")
+    assert "CURVE_CACHE" not in os.environ
+
+
+def test_explicit_curve_cache_setting_is_left_to_the_workers(client, monkeypatch):
+    monkeypatch.setenv("CURVE_CACHE", "memory")
+    assert flask_app.job_scheduler()._fn is flask_app._analyze_job
+
+
+def test_parsed_event_releases_the_upload(tmp_path):
+    upload = tmp_path / "score.musicxml"
+    upload.write_text("<score-partwise/>")
+    flask_app.JOBS.create("parsed-job", upload_path=str(upload))
+    try:
+        flask_app._job_event("parsed-job", {"type": "parsed", "measures": 1})
+        assert not upload.exists()
+    finally:
+        flask_app.JOBS.discard("parsed-job")
+
+
+def test_job_listing_is_closed_without_an_admin_token(monkeypatch):
+    monkeypatch.delenv("JOBS_ADMIN_TOKEN", raising=False)
+    client = flask_app.app.test_client()
+    assert client.get("/api/jobs").status_code == 403
+    assert client.get("/api/jobs", headers={"X-Admin-Token": ""}).status_code == 403
+
+
+def test_job_listing_needs_the_configured_token_and_hides_job_ids(monkeypatch):
+    monkeypatch.setenv("JOBS_ADMIN_TOKEN", "secret")
+    monkeypatch.setenv("JOB_EXECUTOR", "thread")
+    flask_app.job_scheduler.cache_clear()
+    flask_app.JOBS.create("listed-job")
+    client = flask_app.app.test_client()
+    try:
+        assert client.get("/api/jobs", headers={"X-Admin-Token": "wrong"}).status_code == 403
+        response = client.get("/api/jobs", headers={"X-Admin-Token": "secret"})
+        assert response.status_code == 200
+        assert b"listed-job" not in response.data
+        assert all("job_id" not in row for row in response.get_json()["jobs"])
+    finally:
+        flask_app.JOBS.discard("listed-job")
+        flask_app.job_scheduler().shutdown()
+        flask_app.job_scheduler.cache_clear()
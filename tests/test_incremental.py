@@ -0,0 +1,115 @@
+import re
+
+import pytest
+
+from data_processing import write_synthetic_score
+from models import AnalysisOptions, SyntheticScoreSpec
+from run_analysis import run_analysis_engine, run_analysis_incremental
+from utilities import SnapshotCache, to_json_safe
+
+OPTIONS = AnalysisOptions(score_reader="stream", parallelism="serial")
+SCORES = [
+    "input_files/articulation_test.musicxml",
+    "input_files/chord_test.musicxml",
+    "input_files/multiple_meter_madness.musicxml",
+]
+
+
+def _pitch(data):
+    octaves = list(re.finditer(r"<octave>(\d)</octave>", data))
+    m = octaves[len(octaves) // 2]
+    octave = int(m.group(1))
+    return data[: m.start(1)] + str(octave + 1 if octave < 6 else octave - 1) + data[m.end(1) :]
+
+
+def _measure_tag(data):
+    tags = re.findall(r'<measure number="\d+"[^>]*>', data)
+    return tags[len(tags) // 3]
+
+
+def _meter(data):
+    tag = _measure_tag(data)
+    return data.replace(tag, tag + "<attributes><time><beats>3</beats><beat-type>4</beat-type></time></attributes>", 1)
+
+
+def _key(data):
+    tag = _measure_tag(data)
+    return data.replace(tag, tag + "<attributes><key><fifths>3</fifths><mode>major</mode></key></attributes>")
+
+
+def _tuplet(data):
+    # one bracketed group in the middle becomes a single note as long as the
+    # group; the tuplet numbering carried into later measures shifts with it
+    starts = list(re.finditer(r'<note\b[^>]*>(?:(?!</note>).)*?<tuplet type="start"', data, re.S))
+    start = starts[len(starts) // 2].start()
+    stop = data.index('<tuplet type="stop"', start)
+    end = data.index("</note>", stop) + len("</note>")
+    notes = re.findall(r"<note\b.*?</note>", data[start:end], re.S)
+    length = sum(int(re.search(r"<duration>(\d+)</duration>", n).group(1)) for n in notes if not re.search(r"<chord\s*/>", n))
+    voice = re.search(r"<voice>\d+</voice>", notes[0])
+    note = f"<note><pitch><step>C</step><octave>5</octave></pitch><duration>{length}</duration>{voice.group(0) if voice else ''}</note>"
+    return data[:start] + note + data[end:]
+
+
+EDITS = {"pitch": _pitch, "meter": _meter, "key": _key}
+
+
+def _check(path, edits, tmp_path):
+    cache = SnapshotCache(str(tmp_path / "snapshots"))
+    work = tmp_path / "work.musicxml"
+    original = open(path, encoding="utf-8").read()
+    work.write_text(original, encoding="utf-8")
+    run_analysis_incremental(str(work), 2, analysis_options=OPTIONS, snapshot_cache=cache, curve_cache=None)
+
+    for name, edit in edits.items():
+        work.write_text(edit(original), encoding="utf-8")
+        full = run_analysis_engine(str(work), 2, analysis_options=OPTIONS, score_cache=None, curve_cache=None)
+        result, snapshot = run_analysis_incremental(str(work), 2, analysis_options=OPTIONS, snapshot_cache=cache, curve_cache=None)
+        assert snapshot is not None, name
+        assert to_json_safe(result) == to_json_safe(full), name
+        # back to the original, so every edit is made against the same snapshot
+        work.write_text(original, encoding="utf-8")
+        run_analysis_incremental(str(work), 2, analysis_options=OPTIONS, snapshot_cache=cache, curve_cache=None)
+
+
+@pytest.mark.parametrize("path", SCORES)
+def test_incremental_matches_a_full_run_after_edits(path, tmp_path):
+    _check(path, EDITS, tmp_path)
+
+
+@pytest.mark.parametrize("path", ["input_files/articulation_test.musicxml", "input_files/multiple_meter_madness.musicxml"])
+def test_incremental_matches_a_full_run_after_a_tuplet_edit(path, tmp_path):
+    _check(path, {"tuplet": _tuplet}, tmp_path)
+
+
+def test_incremental_matches_a_full_run_on_a_tuplet_heavy_score(tmp_path):
+    path = write_synthetic_score(SyntheticScoreSpec(parts=2, measures=8, tuplet_density=0.5), str(tmp_path / "tuplets.musicxml"))
+    _check(path, {**EDITS, "tuplet": _tuplet}, tmp_path)
+
+
+def test_a_pitch_edit_only_reanalyzes_its_measure(tmp_path):
+    cache = SnapshotCache(str(tmp_path / "snapshots"))
+    work = tmp_path / "work.musicxml"
+    original = open(SCORES[0], encoding="utf-8").read()
+    work.write_text(original, encoding="utf-8")
+    run_analysis_incremental(str(work), 2, analysis_options=OPTIONS, snapshot_cache=cache, curve_cache=None)
+
+    work.write_text(_pitch(original), encoding="utf-8")
+    _, snapshot = run_analysis_incremental(str(work), 2, analysis_options=OPTIONS, snapshot_cache=cache, curve_cache=None)
+    assert snapshot.stats["reparsed"] == 1
+    assert snapshot.stats["rebuilt"] <= 1
+
+
+def test_analyzer_progress_counts_up_to_its_own_total(tmp_path):
+    events = []
+    run_analysis_incremental(
+        SCORES[1],
+        2,
+        analysis_options=OPTIONS,
+        progress_cb=events.append,
+        snapshot_cache=SnapshotCache(str(tmp_path / "snapshots")),
+        curve_cache=None,
+    )
+    steps = [(e["idx"], e["total"]) for e in events if e.get("type") == "analyzer"]
+    assert [idx for idx, _ in steps] == list(range(1, len(steps) + 1))
+    assert {total for _, total in steps} == {len(steps)}
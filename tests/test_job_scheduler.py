@@ -0,0 +1,49 @@
+import threading
+
+import pytest
+
+from utilities.job_scheduler import JobScheduler
+
+
+def _fail_instantly(path, progress_cb=None):
+    raise FileNotFoundError(path)
+
+
+def _run_jobs(executor, count=20, timeout=30):
+    done = {}
+    all_done = threading.Event()
+
+    def on_done(job_id, result, error):
+        done[job_id] = error
+        if len(done) == count:
+            all_done.set()
+
+    scheduler = JobScheduler(
+        _fail_instantly,
+        on_event=lambda job_id, event: None,
+        on_done=on_done,
+        workers=1,
+        max_pending=count,
+        executor=executor,
+    )
+
+    # submit from a helper thread so a deadlock fails the test instead of hanging it
+    def submit_all():
+        for i in range(count):
+            scheduler.submit(f"job-{i}", (f"missing-{i}.musicxml",))
+
+    submitter = threading.Thread(target=submit_all, daemon=True)
+    submitter.start()
+    submitter.join(timeout)
+    finished = all_done.wait(timeout)
+    if finished:
+        scheduler.shutdown()
+    return submitter.is_alive(), finished, done
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_jobs_that_fail_instantly_complete(executor):
+    blocked, finished, done = _run_jobs(executor)
+    assert not blocked, "submit deadlocked"
+    assert finished, f"only {len(done)} jobs completed"
+    assert all(isinstance(error, FileNotFoundError) for error in done.values())
@@ -0,0 +1,26 @@
+from utilities import JobStore
+
+
+def test_upload_is_released_before_the_job_finishes(tmp_path):
+    upload = tmp_path / "score.musicxml"
+    upload.write_text("<score-partwise/>")
+    store = JobStore(str(tmp_path / "spill"))
+    store.create("job", upload_path=str(upload))
+
+    store.release_upload("job")
+    assert not upload.exists()
+    assert store.get("job")["upload_path"] is None
+    assert store.get("job")["done"] is False
+
+    job = store.finish("job", [])
+    assert job["done"] is True
+
+
+def test_finish_still_deletes_an_unreleased_upload(tmp_path):
+    upload = tmp_path / "score.musicxml"
+    upload.write_text("<score-partwise/>")
+    store = JobStore(str(tmp_path / "spill"))
+    store.create("job", upload_path=str(upload))
+
+    store.finish("job", error="failed")
+    assert not upload.exists()
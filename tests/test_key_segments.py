@@ -0,0 +1,35 @@
+from analyzers.key_range.extract import extract_key_segments
+from analyzers.shared.musicxml_reader import read_score_ir
+
+SCORE = """<?xml version="1.0" encoding="UTF-8"?>
+<score-partwise version="3.1">
+  <part-list><score-part id="P1"><part-name>Flute</part-name></score-part></part-list>
+  <part id="P1">
+    <measure number="1">
+      <attributes><divisions>1</divisions>{key}<time><beats>4</beats><beat-type>4</beat-type></time></attributes>
+      <note><pitch><step>C</step><octave>5</octave></pitch><duration>4</duration><type>whole</type></note>
+    </measure>
+    <measure number="2">
+      <note><pitch><step>D</step><octave>5</octave></pitch><duration>4</duration><type>whole</type></note>
+    </measure>
+  </part>
+</score-partwise>
+"""
+
+
+def _score(tmp_path, key=""):
+    path = tmp_path / "score.musicxml"
+    path.write_text(SCORE.format(key=key))
+    return read_score_ir(str(path))
+
+
+def test_score_without_key_signature_reads_as_c_major(tmp_path):
+    segments = extract_key_segments(_score(tmp_path), 2)
+    assert [(k.measure, k.key, k.quality, k.pitch_index) for k in segments] == [(1, "C", "major", 0)]
+    assert segments[0].duration == 2
+    assert segments[0].exposure == 1.0
+
+
+def test_key_signature_is_used_when_present(tmp_path):
+    segments = extract_key_segments(_score(tmp_path, "<key><fifths>2</fifths><mode>major</mode></key>"), 2)
+    assert [(k.key, k.quality) for k in segments] == [("D", "major")]
@@ -0,0 +1,39 @@
+import glob
+
+import pytest
+from music21 import converter
+
+from analyzers.shared.musicxml_reader import UnsupportedMusicXML, read_score_ir, read_score_ir_incremental
+from analyzers.shared.score_ir import build_score_ir
+from data_processing import write_synthetic_score
+from models import SyntheticScoreSpec
+
+SCORES = sorted(glob.glob("input_files/*.musicxml"))
+
+
+def _stream_ir(path):
+    try:
+        return read_score_ir(path)
+    except UnsupportedMusicXML as exc:
+        pytest.skip(f"stream reader falls back to music21: {exc}")
+
+
+@pytest.mark.parametrize("path", SCORES)
+def test_stream_reader_matches_music21(path):
+    assert _stream_ir(path) == build_score_ir(converter.parse(path))
+
+
+def test_stream_reader_matches_music21_on_tuplets(tmp_path):
+    path = write_synthetic_score(SyntheticScoreSpec(parts=2, measures=8, tuplet_density=0.5), str(tmp_path / "tuplets.musicxml"))
+    assert _stream_ir(path) == build_score_ir(converter.parse(path))
+
+
+@pytest.mark.parametrize("path", SCORES)
+def test_incremental_reader_replays_an_unchanged_score(path):
+    full = _stream_ir(path)
+    first, memo, replayed = read_score_ir_incremental(path)
+    assert first == full and replayed == 0
+
+    again, _, replayed = read_score_ir_incremental(path, memo)
+    assert again == full
+    assert replayed == sum(len(part.measures) for part in full.parts)
@@ -0,0 +1,64 @@
+import json
+from fractions import Fraction
+
+from models import NoteTableBuilder
+from utilities.note_reconciler import NoteReconciler
+
+
+def _table(instrument, *rows):
+    notes = NoteTableBuilder(instrument, 2)
+    for row in rows:
+        comments = row.pop("comments", {})
+        index = notes.append(measure=1, **row)
+        for key, text in comments.items():
+            notes.add_comment(index, key, text)
+    return notes.build()
+
+
+def test_rows_sharing_a_key_are_coalesced_onto_the_first():
+    third = Fraction(1, 3)
+    rng = _table(
+        "Flute",
+        {"offset": third, "written_midi_value": 72, "range_confidence": 0.6, "comments": {"range": "extended"}},
+        {"offset": 1.0, "written_midi_value": 74, "range_confidence": 1.0},
+    )
+    art = _table("Flute", {"offset": float(third), "written_midi_value": 72, "articulation_confidence": 0.0})
+    rhythm = _table(
+        "Flute",
+        {"offset": third, "written_midi_value": 72, "rhythm_token": "8t", "comments": {"tuplet": "triplet"}},
+        {"offset": 2.0, "rhythm_token": "4r"},
+    )
+
+    reconciler = NoteReconciler()
+    reconciler.extend([rng, art, rhythm])
+    merged = reconciler.finalize()
+
+    assert reconciler.row_count == 5
+    assert list(merged) == ["Flute"]
+    notes = merged["Flute"].to_dicts()
+    assert [(n["offset"], n["written_midi_value"]) for n in notes] == [(third, 72), (1.0, 74), (2.0, None)]
+    first = rng[0].to_dict()
+    assert first["range_confidence"] == 0.6
+    assert first["articulation_confidence"] == 0.0
+    assert first["rhythm_token"] == "8t"
+    # the last row's comments replace the base's
+    assert first["comments"] == {"tuplet": "triplet"}
+    assert notes[0] == first
+
+
+def test_chord_tones_and_instruments_stay_apart():
+    chord = [{"offset": 0.0, "written_midi_value": 60, "is_chord": True, "chord_size": 2, "chord_index": i} for i in (0, 1)]
+    reconciler = NoteReconciler()
+    reconciler.extend([_table("Flute", *chord), _table("Oboe", {"offset": 0.0, "written_midi_value": 60})])
+    merged = reconciler.finalize()
+    assert {name: len(table) for name, table in merged.items()} == {"Flute": 2, "Oboe": 1}
+
+
+def test_compact_table_lists_the_columns_once():
+    reconciler = NoteReconciler()
+    reconciler.add(_table("Flute", {"offset": Fraction(1, 2), "written_midi_value": 72}))
+    table = json.loads(reconciler.to_json())["Flute"]
+    row = dict(zip(table["columns"], table["rows"][0]))
+    assert row["offset"] == 0.5
+    assert row["instrument"] == "Flute"
+    assert row["comments"] == {}
@@ -0,0 +1,44 @@
+from models import AnalysisOptions
+from run_analysis import run_analysis_engine
+from utilities import MemoryResultCache, SqliteResultCache
+
+SCORE = "input_files/chord_test.musicxml"
+OPTIONS = AnalysisOptions(parallelism="process", max_workers=2)
+
+
+class _CountingCache(MemoryResultCache):
+    def __init__(self):
+        super().__init__()
+        self.puts = 0
+
+    def put(self, key, value):
+        self.puts += 1
+        super().put(key, value)
+
+
+def _observed(result):
+    return result["observed_grades"]
+
+
+def test_process_workers_reuse_curves_across_target_grades():
+    curves = _CountingCache()
+    first = run_analysis_engine(SCORE, 2, analysis_options=OPTIONS, score_cache=None, curve_cache=curves)
+    stored = curves.puts
+    assert stored > 0
+
+    second = run_analysis_engine(SCORE, 3, analysis_options=OPTIONS, score_cache=None, curve_cache=curves)
+    assert curves.puts == stored  # every curve came from the cache
+    assert _observed(second) == _observed(first)
+
+
+def test_process_workers_share_a_sqlite_curve_cache(tmp_path):
+    curves = SqliteResultCache(str(tmp_path / "curves.sqlite3"))
+    first = run_analysis_engine(SCORE, 2, analysis_options=OPTIONS, score_cache=None, curve_cache=curves)
+    with curves._connect() as conn:
+        stored = conn.execute("SELECT COUNT(*), MAX(stored_at) FROM results").fetchone()
+    assert stored[0] > 0
+
+    second = run_analysis_engine(SCORE, 3, analysis_options=OPTIONS, score_cache=None, curve_cache=curves)
+    with curves._connect() as conn:
+        assert conn.execute("SELECT COUNT(*), MAX(stored_at) FROM results").fetchone() == stored
+    assert _observed(second) == _observed(first)
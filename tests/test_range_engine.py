@@ -0,0 +1,89 @@
+import glob
+
+import numpy as np
+import pytest
+
+from analyzers.key_range.analyzer import make_key_range_analyzer
+from analyzers.key_range.extract import extract_part_notes
+from analyzers.key_range.range_engine import range_confidence_matrix
+from analyzers.key_range.rules import compute_range_confidence
+from analyzers.shared.musicxml_reader import read_score_ir
+from analyzers.shared.score_ir import load_score_ir
+from app_data import GRADES
+from utilities import get_rounded_grade
+
+SCORES = sorted(glob.glob("input_files/*.musicxml"))
+
+# no key signature anywhere, so every part reads under the default C major segment
+PARTS = {
+    "Flute": ["C4", "G5", "C#6", "C7", "F7"],
+    "Clarinet 1 in Bb": ["E3", "G4", "A#4", "B4", "C5", "F#6"],
+    "Clarinet 2 in Bb": ["A#4", "B4", "D5", "E6"],
+    "Trumpet in Bb": ["F#3", "C4", "Eb5", "C6"],
+    "Tuba": ["D1", "F2", "Bb2", "G4"],
+}
+
+
+def _note(pitch):
+    step, octave = pitch[0], pitch[-1]
+    alter = {"#": 1, "b": -1}.get(pitch[1:-1], 0)
+    return (
+        f"<note><pitch><step>{step}</step><alter>{alter}</alter><octave>{octave}</octave></pitch>"
+        "<duration>1</duration><type>quarter</type></note>"
+    )
+
+
+def _keyless_score(tmp_path):
+    ids = {name: f"P{i}" for i, name in enumerate(PARTS, 1)}
+    part_list = "".join(f'<score-part id="{ids[n]}"><part-name>{n}</part-name></score-part>' for n in PARTS)
+    parts = "".join(
+        f'<part id="{ids[name]}"><measure number="1">'
+        f"<attributes><divisions>1</divisions><time><beats>{len(pitches)}</beats><beat-type>4</beat-type></time></attributes>"
+        + "".join(_note(p) for p in pitches)
+        + "</measure></part>"
+        for name, pitches in PARTS.items()
+    )
+    path = tmp_path / "keyless.musicxml"
+    path.write_text(
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<score-partwise version="3.1"><part-list>{part_list}</part-list>{parts}</score-partwise>'
+    )
+    return read_score_ir(str(path))
+
+
+def _assert_matrix_matches_the_scalar_rule(score):
+    analyzer = make_key_range_analyzer()
+    key_segments, features = analyzer.extract_features(score)
+    key_quality = key_segments[-1].quality if key_segments else "major"
+    conf, scored = range_confidence_matrix(analyzer._range_table, features, GRADES)
+
+    # the rows of the matrix follow the scored parts in score order
+    row = 0
+    for part in score.parts:
+        name = part.name or "Unknown Part"
+        if analyzer.range_instrument(name) is None:
+            continue
+        notes = extract_part_notes(part, name, None, key_segments)
+        for j, grade in enumerate(GRADES):
+            bounds = analyzer.range_bounds(name, float(get_rounded_grade(grade)))
+            assert scored[row : row + len(notes), j].tolist() == [bounds is not None] * len(notes)
+            if bounds is None:
+                continue
+            core, ext, total = bounds
+            expected = [compute_range_confidence(note, core, ext, total, grade, key_quality) for note in notes]
+            np.testing.assert_allclose(conf[row : row + len(notes), j], expected, atol=1e-12)
+        row += len(notes)
+    assert row == len(features.duration)
+    return row
+
+
+@pytest.mark.parametrize("path", SCORES)
+def test_matrix_matches_the_scalar_rule_for_every_grade_and_instrument(path):
+    _assert_matrix_matches_the_scalar_rule(load_score_ir(path))
+
+
+def test_parts_without_a_key_signature_match_under_the_default_segment(tmp_path):
+    score = _keyless_score(tmp_path)
+    key_segments, _ = make_key_range_analyzer().extract_features(score)
+    assert [(k.key, k.quality) for k in key_segments] == [("C", "major")]
+    assert _assert_matrix_matches_the_scalar_rule(score) == sum(len(p) for p in PARTS.values())
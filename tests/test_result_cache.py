@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from utilities.result_cache import SqliteResultCache, default_result_cache
+
+
+def test_sqlite_cache_round_trips_through_a_private_file(tmp_path):
+    cache = SqliteResultCache(tmp_path / "results" / "cache.sqlite3")
+    cache.put("key", {"notes": [1, 2]})
+    assert cache.get("key") == {"notes": [1, 2]}
+    assert os.stat(tmp_path / "results").st_mode & 0o777 == 0o700
+    assert os.stat(cache.path).st_mode & 0o777 == 0o600
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX permissions")
+def test_sqlite_cache_refuses_a_file_writable_by_others(tmp_path):
+    cache = SqliteResultCache(tmp_path / "cache.sqlite3")
+    cache.put("key", "value")
+    os.chmod(cache.path, 0o666)
+    with pytest.raises(PermissionError):
+        cache.get("key")
+    with pytest.raises(PermissionError):
+        SqliteResultCache(cache.path)
+
+
+def test_default_sqlite_cache_lives_in_the_user_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    monkeypatch.setenv("RESULT_CACHE", "sqlite")
+    monkeypatch.delenv("RESULT_CACHE_PATH", raising=False)
+    default_result_cache.cache_clear()
+    try:
+        cache = default_result_cache()
+        assert os.path.dirname(cache.path) == str(tmp_path / "musicxml_score_analyzer" / "results")
+    finally:
+        default_result_cache.cache_clear()
+
+
+def test_default_sqlite_cache_is_disabled_for_unsafe_directory(tmp_path, monkeypatch):
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    shared.chmod(0o777)
+    monkeypatch.setenv("RESULT_CACHE", "sqlite")
+    monkeypatch.setenv("RESULT_CACHE_PATH", str(shared / "cache.sqlite3"))
+    default_result_cache.cache_clear()
+    try:
+        with pytest.warns(UserWarning):
+            assert default_result_cache() is None
+    finally:
+        default_result_cache.cache_clear()
@@ -0,0 +1,143 @@
+import gzip
+import io
+import json
+
+import pytest
+
+from data_processing import write_synthetic_score
+from models import AnalysisOptions, NoteTableBuilder, SyntheticScoreSpec
+from run_analysis import run_analysis_engine
+from utilities import (
+    compress_stream,
+    encode_result,
+    iter_ndjson,
+    iter_result_json,
+    to_json_safe,
+    write_chunks,
+)
+from utilities import result_serializer
+
+
+@pytest.fixture(scope="module")
+def chord_result():
+    return run_analysis_engine("input_files/chord_test.musicxml", 2, analysis_options=AnalysisOptions(run_observed=False))
+
+
+def _spill(result):
+    fh = io.BytesIO()
+    index = write_chunks(fh, encode_result(result))
+    return fh, index
+
+
+def _decoded(result):
+    return json.loads(result_serializer.dumps(to_json_safe(result)))
+
+
+def test_spilled_result_reads_back_as_one_object(chord_result):
+    fh, index = _spill(chord_result)
+    assert json.loads(b"".join(iter_result_json(fh, index))) == _decoded(chord_result)
+
+
+def test_ndjson_sends_the_summary_then_the_notes_per_part(chord_result):
+    fh, _ = _spill(chord_result)
+    records = [json.loads(line) for line in b"".join(iter_ndjson(fh)).splitlines()]
+    assert records[0]["type"] == "summary"
+    assert "analysis_notes" not in records[0]["data"]
+    parts = {r["part"] for r in records if r.get("analyzer") == "rhythm"}
+    assert parts == set(chord_result["analysis_notes"]["rhythm"])
+
+
+def test_gzip_stream_decompresses_to_the_result(chord_result):
+    fh, index = _spill(chord_result)
+    body = b"".join(compress_stream(iter_result_json(fh, index), "gzip"))
+    assert json.loads(gzip.decompress(body)) == _decoded(chord_result)
+
+
+def _notes(*offsets):
+    notes = NoteTableBuilder("Flute", 2)
+    for offset in offsets or (0.0,):
+        notes.append(measure=1, offset=offset)
+    return notes.build()
+
+
+def test_note_without_comments_serializes_empty_dict():
+    assert to_json_safe(_notes())[0]["comments"] == {}
+    assert _notes()[0].to_dict()["comments"] == {}
+
+
+def test_note_comments_are_kept():
+    notes = _notes()
+    notes[0].add_comment("range", "out of range")
+    assert to_json_safe(notes)[0]["comments"] == {"range": "out of range"}
+
+
+def test_encoded_note_chunks_never_carry_null_comments():
+    result = {"analysis_notes": {"range": {"Flute": {"Note Data": _notes(0.0, 1.0)}}}}
+    for header, data in encode_result(result):
+        if header.get("type") == "notes":
+            assert b'"comments":null' not in data
+            assert json.loads(data)["Note Data"][0]["comments"] == {}
+
+
+@pytest.fixture(scope="module")
+def tuplet_score(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("scores") / "tuplets.musicxml")
+    write_synthetic_score(SyntheticScoreSpec(parts=2, measures=8, tuplet_density=0.5), path)
+    return path
+
+
+@pytest.fixture(scope="module")
+def tuplet_result(tuplet_score):
+    return run_analysis_engine(tuplet_score, 2, analysis_options=AnalysisOptions(run_observed=False))
+
+
+def _tuplet_offsets(result):
+    rows = [n for part in result["analysis_notes"]["rhythm"].values() for n in part["note_data"]]
+    return [n["offset"] for n in rows if n["tuplet_id"] is not None]
+
+
+def test_tuplet_score_encodes_fractions_as_floats(tuplet_result):
+    fh, index = _spill(tuplet_result)
+    decoded = json.loads(b"".join(iter_result_json(fh, index)))
+    offsets = _tuplet_offsets(decoded)
+    assert any(offset == pytest.approx(1 / 3) for offset in offsets)
+    assert all(type(offset) in (int, float) for offset in offsets)
+
+
+def test_tuplet_score_encodes_as_gzip(tuplet_result):
+    fh, index = _spill(tuplet_result)
+    body = b"".join(compress_stream(iter_result_json(fh, index), "gzip"))
+    assert _tuplet_offsets(json.loads(gzip.decompress(body)))
+
+
+def test_tuplet_score_encodes_as_ndjson(tuplet_result):
+    fh, _ = _spill(tuplet_result)
+    lines = b"".join(iter_ndjson(fh)).splitlines()
+    records = [json.loads(line) for line in lines]
+    assert records[0]["type"] == "summary"
+    rhythm = [r for r in records if r.get("analyzer") == "rhythm"]
+    assert any(n["tuplet_id"] is not None for r in rhythm for n in r["data"]["note_data"])
+
+
+def test_stdlib_fallback_encodes_fractions(monkeypatch, tuplet_result):
+    monkeypatch.setattr(result_serializer, "orjson", None)
+    fh, index = _spill(tuplet_result)
+    assert _tuplet_offsets(json.loads(b"".join(iter_result_json(fh, index))))
+
+
+def test_reconciled_notes_are_left_out_by_default(tuplet_result):
+    assert "reconciled" not in tuplet_result["analysis_notes"]
+
+
+def test_reconciled_notes_stream_as_a_compact_table_per_part(tuplet_score):
+    options = AnalysisOptions(run_observed=False, reconciled_notes=True)
+    result = run_analysis_engine(tuplet_score, 2, analysis_options=options)
+    fh, _ = _spill(result)
+    records = [json.loads(line) for line in b"".join(iter_ndjson(fh)).splitlines()]
+    reconciled = [r for r in records if r.get("analyzer") == "reconciled"]
+    assert {r["part"] for r in reconciled} == set(result["analysis_notes"]["rhythm"])
+    for record in reconciled:
+        columns = record["data"]["columns"]
+        assert all(len(row) == len(columns) for row in record["data"]["rows"])
+        rows = [dict(zip(columns, row)) for row in record["data"]["rows"]]
+        assert any(row["rhythm_token"] is not None and row["written_pitch"] is not None for row in rows)
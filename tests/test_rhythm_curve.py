@@ -0,0 +1,36 @@
+import glob
+
+import pytest
+
+from analyzers.rhythm.analyzer import build_rhythm_notes, extract_rhythm_features, rhythm_part_confidence, score_rhythm_notes
+from analyzers.rhythm.curve import rhythm_confidence_curve
+from analyzers.rhythm.rules import load_rhythm_rule_matrix, load_rhythm_rules
+from analyzers.shared.score_ir import load_score_ir
+from app_data import GRADES
+from utilities import get_closest_grade
+
+SCORES = sorted(glob.glob("input_files/*.musicxml"))
+
+
+def _scalar_confidence(score, rules, grade):
+    """The per-note rule_* path: duration-weighted per part, averaged over the parts with any duration."""
+    rules_for_grade = rules.get(get_closest_grade(grade, rules.keys()))
+    if rules_for_grade is None:
+        return None
+    part_confs = []
+    for part in score.parts:
+        notes = build_rhythm_notes(part, part.name or "", grade)
+        conf = rhythm_part_confidence(score_rhythm_notes(notes, rules_for_grade, grade))
+        if conf is not None:
+            part_confs.append(conf)
+    return sum(part_confs) / len(part_confs) if part_confs else None
+
+
+@pytest.mark.parametrize("path", SCORES)
+def test_curve_matches_the_scalar_rules_at_every_grade(path):
+    score = load_score_ir(path)
+    rules = load_rhythm_rules()
+    curve = rhythm_confidence_curve(extract_rhythm_features(score), load_rhythm_rule_matrix(), GRADES)
+
+    expected = [_scalar_confidence(score, rules, grade) for grade in GRADES]
+    assert curve == pytest.approx(expected, abs=1e-9)
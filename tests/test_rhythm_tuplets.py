@@ -0,0 +1,43 @@
+from analyzers.rhythm.analyzer import build_rhythm_notes
+from analyzers.shared.musicxml_reader import read_score_ir
+
+SCORE = "input_files/articulation_test.musicxml"
+
+
+def _flute_notes():
+    score = read_score_ir(SCORE)
+    flute = next(part for part in score.parts if part.name == "Flute")
+    return flute, build_rhythm_notes(flute, flute.name, 1)
+
+
+def test_tuplets_stay_on_their_notes_after_an_implicit_empty_measure():
+    # Flute has an implicit empty measure at m.13; its placeholder row used to
+    # shift every later note onto the next note's tuplet
+    _, notes = _flute_notes()
+    assert any(n.measure == 13 and n.rhythm_token is None for n in notes)
+
+    m18 = [n for n in notes if n.measure == 18]
+    quarter = next(n for n in m18 if n.offset == 1.0)
+    assert quarter.rhythm_token == "q"
+    assert quarter.tuplet_id is None
+
+    triplet = [n for n in m18 if n.tuplet_id is not None]
+    assert [n.offset for n in triplet][0] == 2.0
+    assert len({n.tuplet_id for n in triplet}) == 1
+    assert [n.tuplet_index for n in triplet] == [0, 1, 2]
+    assert all((n.tuplet_actual, n.tuplet_normal) == (3, 2) for n in triplet)
+
+
+def test_only_tuplet_events_are_tagged():
+    flute, notes = _flute_notes()
+    events = {
+        (m.number, n.offset, line_index, event_index): n.tuplet
+        for m in flute.measures
+        for line_index, line in enumerate(m.lines)
+        for event_index, n in enumerate(line)
+    }
+    for note in notes:
+        if note.rhythm_token is None:
+            continue
+        tuplet = events[(note.measure, note.offset, note.voice_index, note.chord_index)]
+        assert (note.tuplet_id is not None) == (tuplet is not None)
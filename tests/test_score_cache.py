@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+import analyzers.shared.score_ir as score_ir
+from utilities.score_cache import ScoreCache, default_score_cache
+
+
+def test_cache_directory_is_created_private(tmp_path):
+    cache = ScoreCache(tmp_path / "cache")
+    assert os.stat(cache.directory).st_mode & 0o777 == 0o700
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX permissions")
+def test_cache_refuses_directory_writable_by_others(tmp_path):
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    shared.chmod(0o777)
+    with pytest.raises(PermissionError):
+        ScoreCache(shared)
+
+
+def test_default_cache_is_disabled_for_unsafe_directory(tmp_path, monkeypatch):
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    shared.chmod(0o777)
+    monkeypatch.setenv("SCORE_CACHE_DIR", str(shared))
+    default_score_cache.cache_clear()
+    try:
+        with pytest.warns(UserWarning):
+            assert default_score_cache() is None
+    finally:
+        default_score_cache.cache_clear()
+
+
+def test_cached_ir_is_only_served_to_the_reader_that_built_it(tmp_path, monkeypatch):
+    cache = ScoreCache(tmp_path / "cache")
+    assert cache.key_for("abc", "music21") != cache.key_for("abc", "stream")
+
+    score = "input_files/chord_test.musicxml"
+    first = score_ir.load_score_ir(score, cache=cache, reader="stream")
+    assert score_ir.load_score_ir(score, cache=cache, reader="stream") == first
+
+    built = []
+    read = score_ir._read_score_path
+    monkeypatch.setattr(score_ir, "_read_score_path", lambda path, reader: built.append(reader) or read(path, reader))
+    score_ir.load_score_ir(score, cache=cache, reader="music21")
+    score_ir.load_score_ir(score, cache=cache, reader="stream")
+    assert built == ["music21"]
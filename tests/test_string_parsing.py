@@ -0,0 +1,60 @@
+import glob
+import re
+
+import pytest
+
+from data_processing import build_instrument_data
+from utilities.string_parsing import _match_instrument, _normalize_part_name
+
+# spellings the instrument table should classify, beyond its own names
+PART_NAMES = [
+    "",
+    "Clarinet 1 in Bb",
+    "B♭ Clarinet 2",
+    "Eb Clarinet",
+    "Clarinet in Eb",
+    "Bass Clarinet in Bb",
+    "Contra Bass Clarinet",
+    "Alto Saxophone 1, 2 in Eb",
+    "Baritone Saxophone",
+    "Baritone",
+    "Bass",
+    "Double Bass",
+    "Bass Drum",
+    "Electric Bass",
+    "French Horn in F",
+    "English Horn",
+    "Tenor Trombone 2",
+    "Grand Piano",
+    "Pipe Organ",
+    "Violoncello",
+    "Glockenspiel",
+    "Drum Kit",
+    "Solo Voice",
+]
+
+
+def _table_names():
+    names = set(PART_NAMES)
+    names.update(instrument.replace("_", " ") for instrument in build_instrument_data())
+    for path in glob.glob("input_files/*.musicxml"):
+        with open(path, encoding="utf-8") as fh:
+            names.update(re.findall(r"<part-name>([^<]*)</part-name>", fh.read()))
+    return sorted(names)
+
+
+def _first_match(name, range_only):
+    # the linear scan the combined pattern replaces
+    for instrument, data in build_instrument_data().items():
+        if range_only and not data.range_analysis:
+            continue
+        if re.search(data.regex, name):
+            return instrument
+    return "unknown"
+
+
+@pytest.mark.parametrize("range_only", [True, False])
+def test_combined_pattern_picks_the_first_matching_instrument(range_only):
+    names = [_normalize_part_name(name) for name in _table_names()]
+    assert [_match_instrument(n, range_only) for n in names] == [_first_match(n, range_only) for n in names]
+
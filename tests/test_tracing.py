@@ -0,0 +1,97 @@
+import os
+
+import flask_app
+from models import AnalysisOptions
+from run_analysis import run_analysis_engine
+from utilities import Tracer, chrome_trace, record_timing, span, timed_call, tracing
+
+SCORE = os.path.abspath("input_files/chord_test.musicxml")
+
+
+def test_spans_nest_and_inherit_the_analyzer():
+    tracer = Tracer()
+    with tracing(tracer):
+        with span("outer", analyzer="rhythm", parts=2) as outer:
+            with span("inner") as inner:
+                inner.set(notes=5)
+            _, timing = timed_call(sum, [1, 2])
+            record_timing("worker", timing, measures=3)
+            outer.set(measures=4)
+        with span("detached"):
+            pass
+
+    spans = {s["name"]: s for s in tracer.spans}
+    assert [s["name"] for s in tracer.spans] == ["inner", "worker", "outer", "detached"]
+    assert spans["inner"]["analyzer"] == "rhythm"
+    assert spans["worker"]["analyzer"] == "rhythm"
+    assert spans["detached"]["analyzer"] is None
+    assert spans["inner"]["args"] == {"notes": 5}
+    assert spans["worker"]["args"] == {"measures": 3}
+    assert spans["outer"]["args"] == {"parts": 2, "measures": 4}
+    assert spans["outer"]["ts"] <= spans["inner"]["ts"]
+    assert spans["outer"]["duration_ms"] >= spans["inner"]["duration_ms"]
+
+
+def test_span_is_a_no_op_without_a_tracer():
+    with span("untraced") as untraced:
+        untraced.set(notes=1)
+    assert untraced.active is False
+    record_timing("untraced", (0.0, 0.0, 0, 0))
+
+
+def test_failed_span_records_the_error():
+    tracer = Tracer()
+    try:
+        with tracing(tracer), span("boom"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    assert tracer.spans[0]["args"] == {"error": "ValueError"}
+
+
+def test_chrome_trace_uses_complete_events_in_microseconds():
+    spans = [
+        {"name": "parse", "analyzer": None, "ts": 12.5, "duration_ms": 1.5, "pid": 7, "tid": 9, "args": {}},
+        {"name": "rhythm", "analyzer": "rhythm", "ts": 13.0, "duration_ms": 0.25, "pid": 8, "tid": 10, "args": {"notes": 3}},
+    ]
+    trace = chrome_trace(spans)
+    assert trace["displayTimeUnit"] == "ms"
+    assert trace["traceEvents"] == [
+        {"name": "parse", "cat": "engine", "ph": "X", "ts": 12_500_000, "dur": 1500, "pid": 7, "tid": 9, "args": {}},
+        {"name": "rhythm", "cat": "rhythm", "ph": "X", "ts": 13_000_000, "dur": 250, "pid": 8, "tid": 10, "args": {"notes": 3}},
+    ]
+
+
+def test_worker_spans_reach_the_parent_tracer_in_process_mode():
+    tracer = Tracer()
+    options = AnalysisOptions(run_observed=False, parallelism="process", max_workers=2)
+    run_analysis_engine(SCORE, 2, analysis_options=options, tracer=tracer)
+
+    names = {s["name"] for s in tracer.spans}
+    assert "analysis" in names
+    worker_spans = [s for s in tracer.spans if s["pid"] != os.getpid()]
+    assert worker_spans
+    # every analyzer's own span came back from its worker
+    relayed = {s["name"] for s in worker_spans if s["name"] == s["analyzer"]}
+    assert relayed and relayed <= names
+    assert all(s["analyzer"] is not None for s in worker_spans)
+
+
+def test_trace_endpoint_serves_the_job_spans_as_a_chrome_trace():
+    client = flask_app.app.test_client()
+    flask_app.JOBS.create("traced-job")
+    try:
+        assert client.get("/api/trace/traced-job").status_code == 404
+        flask_app._job_event("traced-job", {"type": "progress", "percent": 10})
+        flask_app._job_event(
+            "traced-job",
+            {"type": "span", "name": "parse", "analyzer": None, "ts": 1.0, "duration_ms": 2.0, "pid": 1, "tid": 2, "args": {}},
+        )
+        response = client.get("/api/trace/traced-job")
+        assert response.status_code == 200
+        assert "traced-job.trace.json" in response.headers["Content-Disposition"]
+        events = response.get_json()["traceEvents"]
+        assert [(e["name"], e["ph"], e["ts"], e["dur"]) for e in events] == [("parse", "X", 1_000_000, 2000)]
+    finally:
+        flask_app.JOBS.discard("traced-job")
+    assert client.get("/api/trace/unknown-job").status_code == 404
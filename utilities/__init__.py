@@ -1,6 +1,21 @@
 from .confidence import confidence_curve, traffic_light
+from .event_broadcaster import SSE_HEARTBEAT, EventBroadcaster, format_sse
+from .job_scheduler import JobScheduler, QueueFull
+from .job_store import JobStore
 from .measure_lines import extract_measure_lines, iter_measure_events, iter_measure_lines
 from .note_reconciler import NoteReconciler
+from .result_cache import MemoryResultCache, ResultCache, SqliteResultCache, default_curve_cache, default_result_cache, result_cache_key, shared_curve_cache
+from .result_serializer import (
+    compress_stream,
+    dumps,
+    encode_result,
+    iter_ndjson,
+    iter_result_json,
+    negotiate_encoding,
+    to_json_safe,
+    write_chunks,
+)
+from .score_cache import ScoreCache, SnapshotCache, default_score_cache, default_snapshot_cache, hash_file
 from .string_parsing import (
     get_closest_grade,
     get_rounded_grade,
@@ -9,6 +24,7 @@ from .string_parsing import (
     validate_part_for_availability,
     validate_part_for_range_analysis,
 )
+from .tracing import Tracer, chrome_trace, current_tracer, record_timing, span, timed_call, tracing
 
 __all__ = [
     "confidence_curve",
@@ -16,11 +32,44 @@ __all__ = [
     "extract_measure_lines",
     "iter_measure_events",
     "iter_measure_lines",
+    "SSE_HEARTBEAT",
+    "EventBroadcaster",
+    "format_sse",
+    "JobScheduler",
+    "QueueFull",
+    "JobStore",
     "NoteReconciler",
+    "MemoryResultCache",
+    "ResultCache",
+    "SqliteResultCache",
+    "default_curve_cache",
+    "default_result_cache",
+    "result_cache_key",
+    "shared_curve_cache",
+    "compress_stream",
+    "dumps",
+    "encode_result",
+    "iter_ndjson",
+    "iter_result_json",
+    "negotiate_encoding",
+    "to_json_safe",
+    "write_chunks",
+    "ScoreCache",
+    "SnapshotCache",
+    "default_score_cache",
+    "default_snapshot_cache",
+    "hash_file",
     "get_closest_grade",
     "get_rounded_grade",
     "normalize_key_name",
     "parse_part_name",
     "validate_part_for_availability",
     "validate_part_for_range_analysis",
+    "Tracer",
+    "chrome_trace",
+    "current_tracer",
+    "record_timing",
+    "span",
+    "timed_call",
+    "tracing",
 ]
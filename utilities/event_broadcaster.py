@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+
+
+def format_sse(event_id: int, event: dict) -> str:
+    return f"id: {event_id}\ndata: {json.dumps(event)}\n\n"
+
+
+# comment line; keeps proxies from timing out an idle stream
+SSE_HEARTBEAT = ": keepalive\n\n"
+
+
+class EventBroadcaster:
+    """
+    Fan-out of one job's events to any number of SSE subscribers. Events are
+    numbered from 1 and kept, so a reconnecting client resumes after its
+    Last-Event-ID. Subscribers sleep until the next publish instead of polling;
+    a quiet period of `heartbeat` seconds yields None so the caller can send a
+    keepalive. Subscriptions end once the broadcaster is closed and drained.
+    """
+
+    def __init__(self):
+        self._events: list[dict] = []
+        self._closed = False
+        self._cond = threading.Condition()
+        self._async_waiters = set()  # (loop, asyncio.Event)
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._events)
+
+    @property
+    def events(self) -> list[dict]:
+        with self._cond:
+            return list(self._events)
+
+    def publish(self, event: dict):
+        with self._cond:
+            if self._closed:
+                return
+            self._events.append(event)
+            self._wake()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._wake()
+
+    def _wake(self):
+        # caller holds the lock
+        self._cond.notify_all()
+        for loop, flag in self._async_waiters:
+            loop.call_soon_threadsafe(flag.set)
+
+    def subscribe(self, last_event_id: int = 0, heartbeat: float = 15.0):
+        """Yields (event_id, event) after last_event_id, or None after a quiet heartbeat."""
+        cursor = max(0, last_event_id)
+        while True:
+            with self._cond:
+                if cursor >= len(self._events) and not self._closed:
+                    self._cond.wait(heartbeat)
+                batch = self._events[cursor:]
+                closed = self._closed
+            if batch:
+                for event in batch:
+                    cursor += 1
+                    yield cursor, event
+            elif closed:
+                return
+            else:
+                yield None
+
+    async def subscribe_async(self, last_event_id: int = 0, heartbeat: float = 15.0):
+        """subscribe() for an event loop: waits without holding a thread."""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        flag = waiter[1]
+        with self._cond:
+            self._async_waiters.add(waiter)
+        try:
+            cursor = max(0, last_event_id)
+            while True:
+                # cleared before reading, so a publish after the read still wakes us
+                flag.clear()
+                with self._cond:
+                    batch = self._events[cursor:]
+                    closed = self._closed
+                if batch:
+                    for event in batch:
+                        cursor += 1
+                        yield cursor, event
+                    continue
+                if closed:
+                    return
+                try:
+                    await asyncio.wait_for(flag.wait(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._cond:
+                self._async_waiters.discard(waiter)
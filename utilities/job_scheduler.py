@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+
+# per-worker state, set once by the pool initializer
+_WORKER_EVENTS = None
+
+
+def _init_job_worker(events):
+    global _WORKER_EVENTS
+    _WORKER_EVENTS = events
+
+
+def _run_job_in_worker(job_id, fn, args):
+    def progress_cb(event):
+        _WORKER_EVENTS.put(("event", job_id, event))
+
+    try:
+        return fn(*args, progress_cb=progress_cb)
+    finally:
+        # sent after every progress event from this job, so the parent can tell the stream is drained
+        _WORKER_EVENTS.put(("finished", job_id))
+
+
+class QueueFull(Exception):
+    """Raised by JobScheduler.submit when max_pending jobs are already waiting."""
+
+
+class JobScheduler:
+    """
+    Runs fn(*args, progress_cb=...) jobs on a bounded pool of worker processes
+    (or threads). At most `workers` jobs run at once and at most `max_pending`
+    wait; waiting jobs start lowest priority value first, then in submission order.
+
+    Everything is reported back in the parent process: on_event(job_id, event)
+    receives the job's progress events plus {"type": "queued", "position": n}
+    whenever its place in the queue changes and {"type": "started"} when it
+    leaves it; on_done(job_id, result, error) fires once per job.
+    """
+
+    def __init__(self, fn, *, on_event, on_done, workers: int = 1, max_pending: int = 16, executor: str = "process"):
+        if executor not in ("process", "thread"):
+            raise ValueError(f"Unknown job executor: {executor!r}")
+        self._fn = fn
+        self._on_event = on_event
+        self._on_done = on_done
+        self._workers = max(1, workers)
+        self._max_pending = max_pending
+        self._executor = executor
+
+        self._lock = threading.Lock()
+        self._notify_lock = threading.Lock()  # keeps queue events in dispatch order once _lock is released
+        self._pending = []  # heap of (priority, seq, job_id, args)
+        self._seq = itertools.count()
+        self._positions = {}
+        self._running = {}  # job_id -> future
+        self._finished = set()  # jobs whose "finished" event arrived before their future completed
+        self._closed = False
+
+        if executor == "process":
+            self._events = multiprocessing.get_context().Queue()
+        else:
+            self._events = queue.Queue()
+        self._pool = self._new_pool()
+        threading.Thread(target=self._relay_events, daemon=True).start()
+
+    def _new_pool(self):
+        if self._executor == "process":
+            return ProcessPoolExecutor(
+                max_workers=self._workers,
+                mp_context=multiprocessing.get_context(),
+                initializer=_init_job_worker,
+                initargs=(self._events,),
+            )
+        return ThreadPoolExecutor(
+            max_workers=self._workers,
+            initializer=_init_job_worker,
+            initargs=(self._events,),
+        )
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    @property
+    def running(self) -> int:
+        with self._lock:
+            return len(self._running)
+
+    def submit(self, job_id: str, args: tuple, *, priority: int = 0) -> int:
+        """Queues a job; returns its queue position (0 once it is running)."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("JobScheduler is shut down")
+            if len(self._pending) >= self._max_pending:
+                raise QueueFull(f"{len(self._pending)} jobs already waiting")
+            heapq.heappush(self._pending, (priority, next(self._seq), job_id, args))
+            dispatched = self._dispatch()
+            position = self._positions.get(job_id, 0)
+            self._notify_lock.acquire()
+        self._notify(*dispatched)
+        return position
+
+    def shutdown(self, wait: bool = True):
+        """Drops waiting jobs and stops the pool; running jobs finish if wait is True."""
+        with self._lock:
+            self._closed = True
+            self._pending.clear()
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    # -------------------------------------------------------------
+    # internals; _dispatch runs with the lock held and only records what
+    # happened. Callers take _notify_lock before releasing _lock and pass the
+    # record to _notify, which reports it without holding _lock: a done
+    # callback can run synchronously on registration and needs that lock.
+    # -------------------------------------------------------------
+
+    def _dispatch(self) -> tuple[list, list]:
+        """Starts waiting jobs while workers are free; returns (events, started futures)."""
+        events = []
+        started = []
+        while self._pending and len(self._running) < self._workers:
+            _, _, job_id, args = heapq.heappop(self._pending)
+            self._positions.pop(job_id, None)
+            try:
+                future = self._pool.submit(_run_job_in_worker, job_id, self._fn, args)
+            except BrokenExecutor:
+                # a worker died and took the pool with it; later jobs get a fresh one
+                self._pool = self._new_pool()
+                future = self._pool.submit(_run_job_in_worker, job_id, self._fn, args)
+            self._running[job_id] = future
+            started.append((job_id, future))
+            events.append((job_id, {"type": "started"}))
+
+        for position, (_, _, job_id, _) in enumerate(sorted(self._pending), start=1):
+            if self._positions.get(job_id) != position:
+                self._positions[job_id] = position
+                events.append((job_id, {"type": "queued", "position": position}))
+        return events, started
+
+    def _notify(self, events, started):
+        # called holding _notify_lock, released here
+        try:
+            for job_id, event in events:
+                self._on_event(job_id, event)
+        finally:
+            self._notify_lock.release()
+        for job_id, future in started:
+            future.add_done_callback(lambda f, job_id=job_id: self._future_done(job_id, f))
+
+    def _relay_events(self):
+        while True:
+            kind, job_id, *rest = self._events.get()
+            if kind == "event":
+                self._on_event(job_id, rest[0])
+                continue
+            with self._lock:
+                future = self._running.get(job_id)
+                if future is None or not future.done():
+                    self._finished.add(job_id)
+                    continue
+            self._complete(job_id, future)
+
+    def _future_done(self, job_id, future):
+        # A job completes once its future is done and its events are drained.
+        # A worker that died never sends "finished", so a broken pool completes at once.
+        with self._lock:
+            drained = job_id in self._finished
+            self._finished.discard(job_id)
+        if drained or isinstance(future.exception(), BrokenExecutor):
+            self._complete(job_id, future)
+
+    def _complete(self, job_id, future):
+        with self._lock:
+            if self._running.pop(job_id, None) is None:
+                return
+            dispatched = self._dispatch()
+            self._notify_lock.acquire()
+        self._notify(*dispatched)
+        error = future.exception()
+        self._on_done(job_id, None if error is not None else future.result(), error)
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from .event_broadcaster import EventBroadcaster
+from .result_serializer import write_chunks
+
+
+def _deep_sizeof(value) -> int:
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_deep_sizeof(k) + _deep_sizeof(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(_deep_sizeof(v) for v in value)
+    return size
+
+
+def _remove(path: str | None):
+    if path:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class JobStore:
+    """
+    Web-app job records: an LRU of at most max_entries finished jobs, each kept
+    for ttl_seconds after it finishes. Results arrive as encode_result chunks
+    and are spilled to spill_dir as NDJSON when a job finishes, with an index
+    of the data slices so either form can be served straight from the file.
+    The job's upload is deleted by release_upload() once the score is parsed,
+    or at the latest when the job finishes or is evicted. Jobs still queued or
+    running are never evicted.
+    """
+
+    def __init__(self, spill_dir: str, *, max_entries: int = 128, ttl_seconds: float | None = 3600):
+        self.spill_dir = spill_dir
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._jobs: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(spill_dir, exist_ok=True)
+
+    def create(self, job_id: str, *, upload_path: str | None = None, result_key: str | None = None) -> dict:
+        job = {
+            "events": EventBroadcaster(),
+            "error": None,
+            "done": False,
+            "cache_hit": False,
+            "created_at": time.time(),
+            "finished_at": None,
+            "upload_path": upload_path,
+            "result_key": result_key,  # where the caller caches the finished result
+            "result_path": None,
+            "result_index": None,
+            "result_bytes": 0,
+        }
+        with self._lock:
+            self._evict()
+            self._jobs[job_id] = job
+        return job
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            self._evict()
+            job = self._jobs.get(job_id)
+            if job is not None:
+                self._jobs.move_to_end(job_id)
+            return job
+
+    def discard(self, job_id: str):
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+        if job is not None:
+            self._cleanup(job)
+
+    def release_upload(self, job_id: str):
+        """Deletes the job's uploaded score, if it still has one."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            path = job["upload_path"] if job is not None else None
+            if path is not None:
+                job["upload_path"] = None
+        _remove(path)
+
+    def finish(self, job_id: str, chunks=None, *, cache_hit: bool = False, error: str | None = None) -> dict | None:
+        """Spills an encoded result and releases the upload; returns the job, if still known."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return None
+
+        if error is None:
+            path = os.path.join(self.spill_dir, f"{job_id}.ndjson")
+            with open(path, "wb") as fh:
+                job["result_index"] = write_chunks(fh, chunks or [])
+            job["result_path"] = path
+            job["result_bytes"] = os.path.getsize(path)
+        _remove(job["upload_path"])
+        job["upload_path"] = None
+
+        job["error"] = error
+        job["cache_hit"] = cache_hit
+        job["finished_at"] = time.time()
+        job["done"] = True
+        return job
+
+    def open_result(self, job: dict):
+        """The spilled file opened for reading, or None; stays readable if the job is evicted meanwhile."""
+        if not job["result_path"]:
+            return None
+        try:
+            return open(job["result_path"], "rb")
+        except OSError:
+            return None
+
+    def stats(self) -> list[dict]:
+        """One row per job. Jobs are labelled by a digest of their id, which is what grants access to them."""
+        with self._lock:
+            self._evict()
+            jobs = list(self._jobs.items())
+        rows = []
+        for job_id, job in jobs:
+            events = job["events"].events
+            record = {k: v for k, v in job.items() if k != "events"}
+            rows.append(
+                {
+                    "job": hashlib.sha256(job_id.encode()).hexdigest()[:12],
+                    "done": job["done"],
+                    "error": job["error"],
+                    "created_at": job["created_at"],
+                    "finished_at": job["finished_at"],
+                    "events": len(events),
+                    "memory_bytes": _deep_sizeof(record) + _deep_sizeof(events),
+                    "result_bytes": job["result_bytes"],
+                }
+            )
+        return rows
+
+    def _evict(self):
+        # caller holds the lock
+        now = time.time()
+        finished = [(job_id, job) for job_id, job in self._jobs.items() if job["done"]]
+        expired = []
+        if self.ttl_seconds is not None:
+            expired = [job_id for job_id, job in finished if now - job["finished_at"] > self.ttl_seconds]
+        overflow = len(finished) - len(expired) - self.max_entries
+        if overflow > 0:
+            # least recently used first, skipping the ones already expiring
+            expiring = set(expired)
+            expired += [job_id for job_id, _ in finished if job_id not in expiring][:overflow]
+        for job_id in expired:
+            self._cleanup(self._jobs.pop(job_id))
+
+    def _cleanup(self, job: dict):
+        _remove(job["upload_path"])
+        _remove(job["result_path"])
@@ -1,32 +1,131 @@
-from dataclasses import fields
-from models import PartialNoteData
+import json
+
+import numpy as np
+
+from models import NoteTable
+from models.note_table import NOTE_COLUMNS, is_set
+
+_MERGE_FIELDS = tuple(name for name in NOTE_COLUMNS if name != "comments")
+
 
 class NoteReconciler:
+    """
+    Keyed join of the per-analyzer note tables on (instrument, measure,
+    offset, midi, chord token). Rows sharing a key are coalesced onto the
+    first one added, later non-None values winning.
+
+    The rows of every table are sorted once by key; each column is then
+    coalesced for all groups at a time.
+    """
+
     def __init__(self):
-        self._notes = {}
-
-    def _key(self, n: PartialNoteData):
-        chord_token = None
-        if n.is_chord and n.chord_size:
-            chord_token = (n.chord_size, n.chord_index)
-        return (
-            n.instrument,
-            n.measure,
-            round(n.offset, 5),
-            n.written_midi_value,
-            chord_token,
-        )
-
-    def add(self, n: PartialNoteData):
-        key = self._key(n)
-        if key not in self._notes:
-            self._notes[key] = n
-        else:
-            self.merge(self._notes[key], n)
-
-    def merge(self, base: PartialNoteData, incoming: PartialNoteData):
-        for f in base.__dataclass_fields__:
-            val = getattr(incoming, f)
-            if val is not None:
-                setattr(base, f, val)
-        base.comments.update(incoming.comments)
+        self._tables: list[NoteTable] = []
+        self._merged: dict | None = None
+
+    def add(self, table: NoteTable):
+        self._tables.append(table)
+        self._merged = None
+
+    def extend(self, tables):
+        self._tables.extend(tables)
+        self._merged = None
+
+    @property
+    def row_count(self) -> int:
+        return sum(len(table) for table in self._tables)
+
+    def finalize(self) -> dict:
+        """
+        Coalesce the rows added so far, in place, and return the merged rows as
+        {instrument: NoteTable}, each in the order its rows were added.
+        """
+        if self._merged is None:
+            self._merged = self._reconcile()
+        return self._merged
+
+    @property
+    def notes(self) -> dict:
+        return self.finalize()
+
+    def to_table(self) -> dict:
+        """Merged notes as {instrument: {"columns": [...], "rows": [[...], ...]}}."""
+        return {instrument: table.to_table() for instrument, table in self.finalize().items()}
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_table(), separators=(",", ":"), default=float)
+
+    def _column(self, name: str) -> np.ndarray:
+        if not self._tables:
+            return np.zeros(0, dtype=NOTE_COLUMNS[name])
+        return np.concatenate([table.cells(name) for table in self._tables])
+
+    def _sort_keys(self, instruments: list) -> tuple:
+        codes = {}
+        instrument = np.concatenate(
+            [np.full(len(t), codes.setdefault(t.instrument, len(codes)), dtype=np.intp) for t in self._tables]
+        ) if self._tables else np.zeros(0, dtype=np.intp)
+        instruments.extend(codes)
+
+        offset = np.round(self._column("offset").astype(np.float64), 5)
+        chord_size = self._column("chord_size")
+        chord = (self._column("is_chord") == 1) & is_set("chord_size", chord_size) & (chord_size != 0)
+        chord_size = np.where(chord, chord_size, -1)
+        chord_index = np.where(chord, self._column("chord_index"), 0)
+        # np.lexsort sorts by the last key first
+        return (chord_index, chord_size, self._column("written_midi_value"), offset, self._column("measure"), instrument)
+
+    def _reconcile(self) -> dict:
+        instruments = []
+        keys = self._sort_keys(instruments)
+        order = np.lexsort(keys)  # stable: rows of a group stay in the order added
+        n = len(order)
+
+        starts = np.ones(n, dtype=bool)
+        for key in keys:
+            ordered = key[order]
+            starts[1:] &= ordered[1:] == ordered[:-1]
+        starts = ~starts
+        if n:
+            starts[0] = True
+        group = np.cumsum(starts) - 1
+        base = order[starts]  # the first row added of each group
+
+        runs = np.bincount(group, minlength=len(base))[group] > 1
+        self._coalesce(order[runs], group[runs], base)
+
+        # merged rows: one per group, at its base row
+        bounds = np.cumsum([0] + [len(t) for t in self._tables])
+        base.sort()
+        pieces = {instrument: [] for instrument in instruments}
+        for i, table in enumerate(self._tables):
+            lo, hi = np.searchsorted(base, bounds[i : i + 2])
+            if hi > lo:
+                pieces[table.instrument].append(table.take(base[lo:hi] - bounds[i]))
+        return {instrument: NoteTable.concat(tables) for instrument, tables in pieces.items() if tables}
+
+    def _coalesce(self, rows: np.ndarray, group: np.ndarray, base: np.ndarray):
+        """rows: the rows of multi-row groups in sorted order; group: their group numbers."""
+        if not len(rows):
+            return
+        bounds = np.cumsum([0] + [len(t) for t in self._tables])
+
+        def write(name, column, winners, groups):
+            cells = column[winners]
+            targets = base[groups]
+            table_of = np.searchsorted(bounds, targets, side="right") - 1
+            for i in np.unique(table_of):
+                at = table_of == i
+                self._tables[i].put(name, targets[at] - bounds[i], cells[at])
+
+        for name in _MERGE_FIELDS:
+            column = self._column(name)
+            valid = is_set(name, column[rows])
+            if not valid.any():
+                continue
+            winners, groups = rows[valid], group[valid]
+            keep = np.append(groups[1:] != groups[:-1], True)  # the last value set in each group
+            write(name, column, winners[keep], groups[keep])
+
+        last = np.append(group[1:] != group[:-1], True)
+        # the last row's comments replace the base's, set or not
+        write("comments", self._column("comments"), rows[last], group[last])
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import fields
+from functools import lru_cache
+from pathlib import Path
+
+from app_data import ANALYZER_VERSION
+
+from .score_cache import _check_private, user_cache_dir
+
+# AnalysisOptions fields that change how the work is scheduled, not what it returns
+EXECUTION_FIELDS = {"parallelism", "max_workers", "grade_parallelism", "grade_workers", "score_reader"}
+
+
+def result_cache_key(score_hash: str, target_grade: float, analysis_options) -> str:
+    """
+    Stable key for a full analysis: score bytes, target grade, the result-affecting
+    AnalysisOptions fields and ANALYZER_VERSION.
+    """
+    options = {}
+    for f in fields(analysis_options):
+        if f.name in EXECUTION_FIELDS:
+            continue
+        value = getattr(analysis_options, f.name)
+        if isinstance(value, (list, tuple)):
+            value = [float(v) for v in value]
+        options[f.name] = value
+
+    return json.dumps(
+        {
+            "score": score_hash,
+            "target_grade": float(target_grade),
+            "options": options,
+            "version": ANALYZER_VERSION,
+        },
+        sort_keys=True,
+    )
+
+
+class ResultCache:
+    """
+    Backend interface for cached analysis results. get() returns None on a miss
+    or an expired entry. Cached results are shared; treat them as read-only.
+    """
+
+    def get(self, key: str):
+        raise NotImplementedError
+
+    def put(self, key: str, value) -> None:
+        raise NotImplementedError
+
+
+class MemoryResultCache(ResultCache):
+    """In-process LRU with a TTL per entry."""
+
+    def __init__(self, max_entries: int = 128, ttl_seconds: float | None = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if self.ttl_seconds is not None and time.time() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def snapshot(self) -> dict:
+        """The unexpired entries as {key: value}."""
+        now = time.time()
+        with self._lock:
+            return {
+                key: value
+                for key, (stored_at, value) in self._entries.items()
+                if self.ttl_seconds is None or now - stored_at <= self.ttl_seconds
+            }
+
+
+class SqliteResultCache(ResultCache):
+    """
+    Results pickled into a local SQLite file, so they survive restarts and are
+    shared between worker processes. LRU by last access, TTL by store time.
+    The file and its directory must belong to the current user and not be
+    writable by anyone else; PermissionError otherwise.
+    """
+
+    def __init__(self, path: str | Path, max_entries: int = 1024, ttl_seconds: float | None = 24 * 3600):
+        self.path = str(path)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        directory = Path(self.path).parent
+        directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        _check_private(directory)
+        # create the file owner-only before sqlite opens it with the umask's mode
+        os.close(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600))
+        _check_private(Path(self.path))
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY,"
+                " stored_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL,"
+                " value BLOB NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:  # commit / rollback
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str):
+        now = time.time()
+        _check_private(Path(self.path))
+        with self._connect() as conn:
+            row = conn.execute("SELECT stored_at, value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            stored_at, blob = row
+            if self.ttl_seconds is not None and now - stored_at > self.ttl_seconds:
+                conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+        try:
+            return pickle.loads(blob)
+        except Exception:
+            return None
+
+    def put(self, key: str, value) -> None:
+        now = time.time()
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, stored_at, accessed_at, value) VALUES (?, ?, ?, ?)",
+                (key, now, now, blob),
+            )
+            if self.ttl_seconds is not None:
+                conn.execute("DELETE FROM results WHERE stored_at < ?", (now - self.ttl_seconds,))
+            conn.execute(
+                "DELETE FROM results WHERE key NOT IN"
+                " (SELECT key FROM results ORDER BY accessed_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+
+def _cache_from_env(prefix: str, *, default_name: str, backend: str | None = None) -> ResultCache | None:
+    if backend is None:
+        backend = os.environ.get(prefix, "memory").strip().lower()
+    ttl = float(os.environ.get(f"{prefix}_TTL", "3600"))
+    max_entries = int(os.environ.get(f"{prefix}_MAX_ENTRIES", "128"))
+
+    if backend in ("", "none", "off"):
+        return None
+    if backend == "memory":
+        return MemoryResultCache(max_entries=max_entries, ttl_seconds=ttl)
+    if backend == "sqlite":
+        path = os.environ.get(f"{prefix}_PATH") or str(user_cache_dir("results") / default_name)
+        try:
+            return SqliteResultCache(path, max_entries=max_entries, ttl_seconds=ttl)
+        except PermissionError as exc:
+            warnings.warn(f"{prefix}_PATH: {exc}; caching disabled", stacklevel=3)
+            return None
+    raise ValueError(f"Unknown {prefix} backend: {backend!r}")
+
+
+@lru_cache(maxsize=1)
+def default_result_cache() -> ResultCache | None:
+    """
+    Process-wide result cache configured by RESULT_CACHE ("memory", "sqlite" or
+    "none"), RESULT_CACHE_PATH (default: a file in a private per-user cache
+    directory), RESULT_CACHE_TTL (seconds) and RESULT_CACHE_MAX_ENTRIES.
+    """
+    return _cache_from_env("RESULT_CACHE", default_name="analysis_results.sqlite3")
+
+
+@lru_cache(maxsize=1)
+def default_curve_cache() -> ResultCache | None:
+    """
+    Process-wide cache of observed-grade curves, configured like the result cache
+    through CURVE_CACHE, CURVE_CACHE_PATH, CURVE_CACHE_TTL and CURVE_CACHE_MAX_ENTRIES.
+    """
+    return _cache_from_env("CURVE_CACHE", default_name="observed_curves.sqlite3")
+
+
+@lru_cache(maxsize=1)
+def shared_curve_cache() -> SqliteResultCache | None:
+    """
+    The sqlite curve cache whatever CURVE_CACHE says, configured by CURVE_CACHE_PATH,
+    CURVE_CACHE_TTL and CURVE_CACHE_MAX_ENTRIES. Picklable, so worker processes
+    handed it share one set of curves.
+    """
+    return _cache_from_env("CURVE_CACHE", default_name="observed_curves.sqlite3", backend="sqlite")
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import json
+import numbers
+import zlib
+
+from models import NoteTable
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder gives the same output, slower
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+_SCALARS = frozenset({str, int, float, bool, type(None)})
+
+READ_BLOCK = 64 * 1024
+
+
+def _json_default(value):
+    # tuplet offsets and durations are Fractions; like the generic walk, any
+    # other number becomes a float and anything else its str()
+    if isinstance(value, numbers.Real):
+        return float(value)
+    return str(value)
+
+
+def to_json_safe(value):
+    """
+    JSON-safe copy of an analysis result. Note tables are encoded from their
+    columns instead of being walked row by row, so their Fraction offsets
+    and durations are only converted by dumps(); anything else is converted
+    the way the generic walk always did.
+    """
+    kind = type(value)
+    if kind in _SCALARS:
+        return value
+    if kind is NoteTable:
+        return value.to_dicts()
+    if kind is dict:
+        return {key if type(key) is str else str(key): to_json_safe(val) for key, val in value.items()}
+    if kind is list or kind is tuple:
+        return [to_json_safe(item) for item in value]
+
+    if isinstance(value, dict):
+        return {str(key): to_json_safe(val) for key, val in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [to_json_safe(item) for item in value]
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, numbers.Real):
+        return float(value)
+    if hasattr(value, "to_dict"):
+        return to_json_safe(value.to_dict())
+    if hasattr(value, "__dict__"):
+        return to_json_safe(vars(value))
+    return str(value)
+
+
+def dumps(value) -> bytes:
+    """Compact JSON for a to_json_safe() value; Fractions are written as floats."""
+    if orjson is not None:
+        return orjson.dumps(value, default=_json_default)
+    return json.dumps(value, separators=(",", ":"), default=_json_default).encode()
+
+
+def _per_part(notes) -> bool:
+    return isinstance(notes, dict) and bool(notes) and all(isinstance(v, dict) for v in notes.values())
+
+
+def encode_result(result) -> list[tuple[dict, bytes]]:
+    """
+    Splits a final analysis result into (header, data) chunks: the summary
+    (everything but analysis_notes) first, then the notes of each analyzer,
+    one chunk per part for analyzers that report per part.
+    """
+    result = to_json_safe(result)
+    if not isinstance(result, dict):
+        return [({"type": "summary"}, dumps(result))]
+
+    notes = result.get("analysis_notes") or {}
+    summary = {key: val for key, val in result.items() if key != "analysis_notes"}
+    chunks = [({"type": "summary"}, dumps(summary))]
+    for analyzer, data in notes.items():
+        if _per_part(data):
+            for part, part_data in data.items():
+                chunks.append(({"type": "notes", "analyzer": analyzer, "part": part}, dumps(part_data)))
+        else:
+            chunks.append(({"type": "notes", "analyzer": analyzer}, dumps(data)))
+    return chunks
+
+
+def write_chunks(fh, chunks) -> list[tuple[dict, int, int]]:
+    """
+    Writes chunks to a binary file as NDJSON, one {..., "data": ...} object
+    per line, and returns (header, offset, length) of each data slice.
+    """
+    index = []
+    offset = 0
+    for header, data in chunks:
+        prefix = dumps(header)[:-1] + (b',"data":' if header else b'"data":')
+        fh.write(prefix)
+        fh.write(data)
+        fh.write(b"}\n")
+        index.append((header, offset + len(prefix), len(data)))
+        offset += len(prefix) + len(data) + 2
+    return index
+
+
+def _read_span(fh, offset: int, length: int):
+    fh.seek(offset)
+    while length > 0:
+        block = fh.read(min(READ_BLOCK, length))
+        if not block:
+            return
+        length -= len(block)
+        yield block
+
+
+def iter_ndjson(fh):
+    """The spilled NDJSON as written."""
+    fh.seek(0)
+    while block := fh.read(READ_BLOCK):
+        yield block
+
+
+def iter_result_json(fh, index):
+    """
+    The original result object, rebuilt from the data slices of a spilled
+    file without decoding them: the summary with analysis_notes put back.
+    """
+    if not index or index[0][0].get("type") != "summary":
+        return
+    _, offset, length = index[0]
+    summary = b"".join(_read_span(fh, offset, length))
+    if summary.strip() == b"{}":
+        yield b'{"analysis_notes":{'
+    elif summary.endswith(b"}"):
+        yield summary[:-1] + b',"analysis_notes":{'
+    else:
+        # not an object; nothing to attach notes to
+        yield summary
+        return
+
+    current = None
+    for header, offset, length in index[1:]:
+        analyzer = header["analyzer"]
+        if analyzer != current:
+            if current is not None:
+                yield b"}," if current_per_part else b","
+            current = analyzer
+            current_per_part = "part" in header
+            yield dumps(analyzer) + (b":{" if current_per_part else b":")
+        elif current_per_part:
+            yield b","
+        if current_per_part:
+            yield dumps(header["part"]) + b":"
+        yield from _read_span(fh, offset, length)
+    if current is not None and current_per_part:
+        yield b"}"
+    yield b"}}"
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """Picks br (when brotli is installed) or gzip from an Accept-Encoding header."""
+    accepted = set()
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip().lower())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress_stream(blocks, encoding: str | None):
+    """Compresses an iterable of byte blocks as it is consumed."""
+    if encoding is None:
+        yield from blocks
+        return
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=5)
+        compress, flush = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31: gzip container
+        compress, flush = compressor.compress, compressor.flush
+    for block in blocks:
+        out = compress(block)
+        if out:
+            yield out
+    yield flush()
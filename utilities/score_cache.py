@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import gc
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+import warnings
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+
+from app_data import ANALYZER_VERSION
+
+
+def hash_file(path: str | Path, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 hex digest of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _check_private(path: Path) -> None:
+    # entries are unpickled, so anyone who can write here can run code in this process
+    if not hasattr(os, "getuid"):
+        return
+    st = path.stat()
+    if st.st_uid != os.getuid():
+        raise PermissionError(f"cache path {path} is not owned by the current user")
+    if st.st_mode & 0o022:
+        raise PermissionError(f"cache path {path} is writable by other users")
+
+
+def user_cache_dir(name: str) -> Path:
+    """Per-user cache location: XDG_CACHE_HOME, LOCALAPPDATA on Windows, else ~/.cache."""
+    base = os.environ.get("XDG_CACHE_HOME")
+    if not base and sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA")
+    if not base:
+        base = os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "musicxml_score_analyzer" / name
+
+
+def _open_cache(cls, env_dir: str, default_name: str, env_max_mb: str, default_max_mb: str):
+    directory = os.environ.get(env_dir, str(user_cache_dir(default_name)))
+    if not directory:
+        return None
+    max_mb = float(os.environ.get(env_max_mb, default_max_mb))
+    try:
+        return cls(directory, max_bytes=int(max_mb * 1024 * 1024))
+    except PermissionError as exc:
+        warnings.warn(f"{env_dir}: {exc}; caching disabled", stacklevel=3)
+        return None
+
+
+@contextmanager
+def _gc_paused():
+    # (un)pickling a large object graph otherwise triggers collection after collection
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class ScoreCache:
+    """
+    On-disk cache of extracted ScoreIRs, keyed by the SHA-256 of the MusicXML
+    bytes, the reader that built the IR and ANALYZER_VERSION. Entries are pickles; a hit refreshes the file's
+    mtime and the oldest entries are evicted once the directory exceeds max_bytes.
+    """
+
+    suffix = ".score.pickle"
+
+    def __init__(self, directory: str | Path, max_bytes: int = 512 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        _check_private(self.directory)
+
+    def key_for(self, content_hash: str, reader: str | None = None) -> str:
+        # the music21 and stream readers build IRs that can differ in detail
+        if reader is None:
+            return f"{content_hash}-{ANALYZER_VERSION}"
+        return f"{content_hash}-{reader}-{ANALYZER_VERSION}"
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def get(self, key: str):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f, _gc_paused():
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # truncated or written by an incompatible version: treat as a miss
+            path.unlink(missing_ok=True)
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return value
+
+    def put(self, key: str, value) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f, _gc_paused():
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for path in self.directory.glob(f"*{self.suffix}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+class SnapshotCache(ScoreCache):
+    """
+    ScoreCache for incremental-analysis snapshots. Keyed by the score's path
+    rather than its bytes: each run replaces the snapshot of the version
+    graded before it at the same path.
+    """
+
+    suffix = ".snapshot.pickle"
+
+    def key_for_path(self, path: str | Path) -> str:
+        resolved = str(Path(path).resolve())
+        return self.key_for(hashlib.sha256(resolved.encode("utf-8")).hexdigest())
+
+
+@lru_cache(maxsize=1)
+def default_score_cache() -> ScoreCache | None:
+    """
+    Process-wide cache configured by SCORE_CACHE_DIR (default: a private per-user
+    cache directory; empty string disables it) and SCORE_CACHE_MAX_MB.
+    """
+    return _open_cache(ScoreCache, "SCORE_CACHE_DIR", "score_ir", "SCORE_CACHE_MAX_MB", "512")
+
+
+@lru_cache(maxsize=1)
+def default_snapshot_cache() -> SnapshotCache | None:
+    """
+    Process-wide snapshot cache configured by SNAPSHOT_CACHE_DIR (default: a
+    private per-user cache directory; empty string disables it) and SNAPSHOT_CACHE_MAX_MB.
+    """
+    return _open_cache(SnapshotCache, "SNAPSHOT_CACHE_DIR", "score_snapshots", "SNAPSHOT_CACHE_MAX_MB", "1024")
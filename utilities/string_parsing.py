@@ -1,5 +1,6 @@
 from data_processing import build_instrument_data
 import re, math
+from functools import lru_cache
 
 
 def parse_part_name(name):
@@ -29,27 +30,36 @@ def _normalize_part_name(name: str) -> str:
     return ascii_name.lower().strip()
 
 
-def validate_part_for_range_analysis(name):
-    instrument_data = build_instrument_data()
-    name = _normalize_part_name(name)
+@lru_cache(maxsize=2)
+def _instrument_pattern(range_only: bool):
+    # one regex for all instruments, a named group per instrument in
+    # build_instrument_data() order. Each alternative is a lookahead from the
+    # start, so the first instrument whose pattern occurs anywhere in the name
+    # wins, as it would scanning the patterns one by one with search()
+    instruments = {}
+    alternatives = []
+    for instrument, data in build_instrument_data().items():
+        if range_only and not data.range_analysis:
+            continue
+        group = f"i{len(instruments)}"
+        instruments[group] = instrument
+        alternatives.append(rf"(?P<{group}>(?=[\s\S]*?(?:{data.regex})))")
+    return re.compile(r"\A(?:" + "|".join(alternatives) + ")"), instruments
 
-    for instrument in instrument_data:
-        if re.search(instrument_data[instrument].regex, name):
-            if instrument_data[instrument].range_analysis:
-                return instrument
 
-    return "unknown"
+@lru_cache(maxsize=1024)
+def _match_instrument(name: str, range_only: bool) -> str:
+    pattern, instruments = _instrument_pattern(range_only)
+    m = pattern.match(name)
+    return instruments[m.lastgroup] if m else "unknown"
 
 
-def validate_part_for_availability(name):
-    instrument_data = build_instrument_data()
-    name = _normalize_part_name(name)
+def validate_part_for_range_analysis(name):
+    return _match_instrument(_normalize_part_name(name), True)
 
-    for instrument in instrument_data:
-        if re.search(instrument_data[instrument].regex, name):
-            return instrument
 
-    return "unknown"
+def validate_part_for_availability(name):
+    return _match_instrument(_normalize_part_name(name), False)
 
 
 def get_rounded_grade(grade):  # can only return discrete values for getting ranges
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_TRACER = ContextVar("tracer", default=None)
+_PARENT = ContextVar("trace_parent", default=None)
+
+
+class _NullSpan:
+    active = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **counts):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    active = True
+
+    def __init__(self, tracer, name, analyzer, args):
+        self.tracer = tracer
+        self.name = name
+        self.analyzer = analyzer
+        self.args = args
+
+    def __enter__(self):
+        parent = _PARENT.get()
+        if self.analyzer is None and parent is not None:
+            self.analyzer = parent.analyzer
+        self._token = _PARENT.set(self)
+        self._ts = time.time()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._started
+        _PARENT.reset(self._token)
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.add(_span_dict(self.name, self.analyzer, self._ts, duration, self.args))
+        return False
+
+    def set(self, **counts):
+        self.args.update(counts)
+
+
+def _span_dict(name, analyzer, ts, duration, args, pid=None, tid=None) -> dict:
+    return {
+        "name": name,
+        "analyzer": analyzer,
+        "ts": ts,
+        "duration_ms": round(duration * 1000, 3),
+        "pid": os.getpid() if pid is None else pid,
+        "tid": threading.get_native_id() if tid is None else tid,
+        "args": args,
+    }
+
+
+class Tracer:
+    """
+    Timing spans for one analysis run. Spans are recorded while the tracer is
+    active (see tracing()) and handed to on_span(span) as each one closes; a
+    span is a dict of name, analyzer, ts (epoch seconds), duration_ms, pid,
+    tid and args (counts such as parts, measures or notes).
+    """
+
+    def __init__(self, on_span=None):
+        self.on_span = on_span
+        self.spans: list[dict] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: dict):
+        with self._lock:
+            self.spans.append(span)
+        if self.on_span is not None:
+            self.on_span(span)
+
+    def to_chrome_trace(self) -> dict:
+        with self._lock:
+            return chrome_trace(self.spans)
+
+    def write_chrome_trace(self, path: str):
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(self.to_chrome_trace(), fh)
+
+
+@contextmanager
+def tracing(tracer: Tracer | None):
+    """Makes tracer the one span() records to, for this thread or task."""
+    if tracer is None:
+        yield None
+        return
+    token = _TRACER.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _TRACER.reset(token)
+
+
+def current_tracer() -> Tracer | None:
+    return _TRACER.get()
+
+
+def span(name: str, *, analyzer: str | None = None, **counts):
+    """
+    Times a with-block as a span of the active tracer; a no-op without one.
+    The analyzer is inherited from the enclosing span when not given, and
+    counts can be added on the way with .set(); check .active before
+    computing expensive ones.
+    """
+    tracer = _TRACER.get()
+    if tracer is None:
+        return _NULL_SPAN
+    return _Span(tracer, name, analyzer, counts)
+
+
+def timed_call(fn, *args):
+    """fn(*args) with its timing, for pool workers the tracer does not reach."""
+    ts = time.time()
+    started = time.perf_counter()
+    value = fn(*args)
+    return value, (ts, time.perf_counter() - started, os.getpid(), threading.get_native_id())
+
+
+def record_timing(name: str, timing: tuple, **counts):
+    """Adds a span measured by timed_call to the active tracer."""
+    tracer = _TRACER.get()
+    if tracer is None:
+        return
+    parent = _PARENT.get()
+    ts, duration, pid, tid = timing
+    tracer.add(_span_dict(name, parent.analyzer if parent is not None else None, ts, duration, counts, pid, tid))
+
+
+def chrome_trace(spans) -> dict:
+    """Spans in Chrome's trace-event format (chrome://tracing, Perfetto)."""
+    events = [
+        {
+            "name": s["name"],
+            "cat": s.get("analyzer") or "engine",
+            "ph": "X",
+            "ts": round(s["ts"] * 1_000_000),
+            "dur": round(s["duration_ms"] * 1000),
+            "pid": s["pid"],
+            "tid": s["tid"],
+            "args": s.get("args") or {},
+        }
+        for s in spans
+    ]
+    return {"traceEvents": events, "displayTimeUnit": "ms"}